@@ -0,0 +1,118 @@
+"""Tokenizador de cifra x a análise anterior do visualizador, e a marcação da cifra no PDF
+
+Usa as maiores cifras do repertorio.db, se existir; senão, cifras sintéticas grandes.
+Uso: python benchmarks/bench_cifra.py [caminho/do/repertorio.db]
+"""
+import os
+import re
+import sys
+import sqlite3
+import timeit
+from html import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cifra import tokenizar_cifra
+from utils.templates_pdf import processar_cifra_para_pdf
+
+NUM_CIFRAS = 20
+REPETICOES = 50
+
+LINHA_EXEMPLO = "Am7 - D [inicio pizzicato] G - C [fim pizzicato] Am7 - D -- G - C - D & F#m7(b5)"
+
+def cifras_sinteticas():
+    """Cifras grandes com linhas em branco entre as partes"""
+    return [
+        "\n".join(LINHA_EXEMPLO if j % 5 else "" for j in range(40 + 10 * i))
+        for i in range(NUM_CIFRAS)
+    ]
+
+def maiores_cifras(caminho):
+    """As NUM_CIFRAS maiores cifras do banco"""
+    conn = sqlite3.connect(caminho)
+    try:
+        linhas = conn.execute(
+            "SELECT cifra FROM musicas WHERE cifra IS NOT NULL ORDER BY LENGTH(cifra) DESC LIMIT ?",
+            (NUM_CIFRAS,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [linha[0] for linha in linhas]
+
+# Implementações anteriores, só para comparação
+def _legado_visualizacao(cifra):
+    linhas = []
+    for linha in cifra.split('\n'):
+        if not linha.strip():
+            linhas.append(None)
+            continue
+        partes = []
+        texto_atual = ""
+        i = 0
+        while i < len(linha):
+            if linha[i] == '[':
+                if texto_atual:
+                    partes.append(("texto", texto_atual))
+                    texto_atual = ""
+                j = i + 1
+                while j < len(linha) and linha[j] != ']':
+                    j += 1
+                if j < len(linha):
+                    partes.append(("acorde", linha[i + 1:j]))
+                    i = j + 1
+                else:
+                    texto_atual += linha[i]
+                    i += 1
+            else:
+                texto_atual += linha[i]
+                i += 1
+        if texto_atual:
+            partes.append(("texto", texto_atual))
+        linhas.append(partes)
+    return linhas
+
+def _legado_pdf(cifra):
+    cifra = escape(cifra, quote=False)
+    cifra = re.sub(r'--', '→', cifra)
+    return re.sub(r'(\[[^\]]+\])', lambda m: f'<span class="colchetes">{m.group(1)}</span>', cifra)
+
+def medir(funcao, cifras, antes=None):
+    """Tempo médio, em ms, para processar todas as cifras uma vez"""
+    def rodada():
+        if antes:
+            antes()
+        for cifra in cifras:
+            funcao(cifra)
+    return min(timeit.repeat(rodada, number=REPETICOES, repeat=5)) / REPETICOES * 1000
+
+def main():
+    caminho = sys.argv[1] if len(sys.argv) > 1 else "repertorio.db"
+    cifras = maiores_cifras(caminho) if os.path.exists(caminho) else []
+    origem = caminho
+    if not cifras:
+        cifras = cifras_sinteticas()
+        origem = "cifras sintéticas"
+
+    tamanho_medio = sum(len(c) for c in cifras) / len(cifras) / 1024
+    print(f"{len(cifras)} cifras de {origem} (média {tamanho_medio:.1f} KB, média de {REPETICOES} execuções)")
+
+    t_legado = medir(_legado_visualizacao, cifras)
+    t_frio = medir(tokenizar_cifra, cifras, antes=tokenizar_cifra.cache_clear)
+    t_quente = medir(tokenizar_cifra, cifras)
+    print(f"  visualizador  anterior: {t_legado:7.3f} ms   tokenizador: {t_frio:7.3f} ms   "
+          f"com cache: {t_quente:7.3f} ms   ({t_legado / t_frio:.1f}x / {t_legado / t_quente:.1f}x)")
+
+    # O PDF monta a marcação a partir dos tokens: sem cache, os dois caches começam vazios,
+    # como na primeira exportação em cada worker
+    def limpar_caches():
+        tokenizar_cifra.cache_clear()
+        processar_cifra_para_pdf.cache_clear()
+
+    t_legado = medir(_legado_pdf, cifras)
+    t_frio = medir(processar_cifra_para_pdf, cifras, antes=limpar_caches)
+    t_quente = medir(processar_cifra_para_pdf, cifras)
+    print(f"  PDF           anterior: {t_legado:7.3f} ms   sem cache:   {t_frio:7.3f} ms   "
+          f"com cache: {t_quente:7.3f} ms   ({t_legado / t_frio:.1f}x / {t_legado / t_quente:.1f}x)")
+
+if __name__ == "__main__":
+    main()
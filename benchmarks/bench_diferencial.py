@@ -0,0 +1,67 @@
+"""Backup completo x diferencial depois de alterar um único item de checklist
+
+Uso: python benchmarks/bench_diferencial.py
+"""
+import os
+import sys
+import time
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from database import Database
+from utils.backup import escrever_backup, escrever_diferencial
+
+NUM_MUSICAS = 20000
+NUM_SHOWS = 500
+MUSICAS_POR_SHOW = 25
+
+CIFRA = "\n".join(["[Intro] Am7 - D [inicio pizzicato] G - C [fim pizzicato]", "letra da música " * 6] * 15)
+
+def popular(db):
+    cursor = db.cursor
+    cursor.executemany(
+        "INSERT INTO musicas (musica, autor, estilo, tom, cifra) VALUES (?, ?, ?, ?, ?)",
+        [(f"Música {i}", f"Autor {i % 300}", "Samba", "(Am)", CIFRA) for i in range(NUM_MUSICAS)]
+    )
+    cursor.executemany(
+        "INSERT INTO shows (data_show, local_show, artista) VALUES (?, ?, ?)",
+        [(f"{i % 28 + 1:02d}/01/2025", f"Local {i}", "Artista") for i in range(NUM_SHOWS)]
+    )
+    cursor.executemany(
+        "INSERT INTO repertorios_shows (id_show, id_musica, sequencia) VALUES (?, ?, ?)",
+        [(i + 1, (i * 37 + j) % NUM_MUSICAS + 1, j + 1) for i in range(NUM_SHOWS) for j in range(MUSICAS_POR_SHOW)]
+    )
+    cursor.execute("INSERT INTO checklist (data, titulo) VALUES ('01/01/2025', 'Equipamento')")
+    cursor.executemany(
+        "INSERT INTO checklist_detail (id_checklist, descricao, status) VALUES (?, ?, 0)",
+        [(cursor.lastrowid, f"Item {i}") for i in range(30)]
+    )
+    db.conn.commit()
+
+def medir(funcao, *argumentos):
+    inicio = time.perf_counter()
+    resultado = funcao(*argumentos)
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+def main():
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)
+        db = Database()
+        popular(db)
+        print(f"Banco com {NUM_MUSICAS} músicas e {NUM_SHOWS * MUSICAS_POR_SHOW} itens de repertório")
+
+        linhas, ms_completo = medir(escrever_backup, db.caminho, "completo.ndjson.gz")
+        print(f"  completo:    {ms_completo:8.1f} ms  {os.path.getsize('completo.ndjson.gz'):>10} bytes  ({linhas} linhas)")
+
+        db.cursor.execute("UPDATE checklist_detail SET status = 1 WHERE descricao = 'Item 7'")
+        db.conn.commit()
+
+        alteracoes, ms_diferencial = medir(escrever_diferencial, db.caminho, "diferencial.ndjson.gz")
+        print(f"  diferencial: {ms_diferencial:8.1f} ms  {os.path.getsize('diferencial.ndjson.gz'):>10} bytes  ({alteracoes} alteração)")
+        db.close()
+        os.chdir(RAIZ)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Micro-benchmark da montagem do HTML dos PDFs para repertórios de 200 músicas
+
+Uso: python benchmarks/bench_html.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pdf import gerar_html_simplificado, gerar_html_cifrado
+
+NUM_MUSICAS = 200
+REPETICOES = 200
+
+CIFRA_EXEMPLO = "Am7 - D [inicio pizzicato] G - C [fim pizzicato] Am7 - D -- G - C - D " * 3
+
+def gerar_repertorio(num_musicas=NUM_MUSICAS):
+    """Repertório sintético com nomes, tons e cifras de tamanho realista"""
+    return [
+        (i, f"Música de teste número {i}" + (" & convidados" if i % 10 == 0 else ""), "(F#m)", CIFRA_EXEMPLO, i)
+        for i in range(1, num_musicas + 1)
+    ]
+
+# Implementação anterior (concatenação com += e regex recompilada por música), só para comparação
+def _legado_cifra(cifra):
+    if not cifra:
+        return cifra
+    cifra = re.sub(r'--', '→', cifra)
+    return re.sub(r'(\[[^\]]+\])', lambda m: f'<span class="colchetes">{m.group(1)}</span>', cifra)
+
+def legado_simplificado(repertorio):
+    html_content = "<html><head><style>" + "x" * 1200 + "</style></head><body><table><tr><td>"
+    metade = (len(repertorio) + 1) // 2
+    for i in range(metade):
+        musica = repertorio[i]
+        html_content += f"""
+            <div class="musica">
+                <span class="numero">{i+1}.</span>
+                <span class="conteudo">
+                    <span class="nome">{musica[1]}</span>
+                    <span class="tom"> {musica[2]}</span>
+                </span>
+            </div>"""
+    html_content += "</td><td>"
+    for i in range(metade, len(repertorio)):
+        musica = repertorio[i]
+        html_content += f"""
+            <div class="musica">
+                <span class="numero">{i+1}.</span>
+                <span class="conteudo">
+                    <span class="nome">{musica[1]}</span>
+                    <span class="tom"> {musica[2]}</span>
+                </span>
+            </div>"""
+    html_content += "</td></tr></table></body></html>"
+    return html_content
+
+def legado_cifrado(repertorio):
+    textos = [f"➔ {m[1]} {m[2]} {m[3] or ''}" for m in repertorio]
+    tamanho_fonte = min(34, 26 + (max(len(t) for t in textos) // 3))
+    html_parts = [f"<html><head><style>body {{ font-size: {tamanho_fonte}px; }}" + "x" * 1500 + "</style></head><body>"]
+    for musica in repertorio:
+        html_parts.append(f"""
+                <div class="musica">
+                    <span class="seta">➔</span>
+                    <span class="nome">{musica[1]}</span>
+                    <span class="tom">{musica[2]}</span>
+                    <span class="cifra">{_legado_cifra(musica[3] or "")}</span>
+                </div>""")
+    html_parts.append("</body></html>")
+    return "\n".join(html_parts)
+
+def medir(funcao, repertorio):
+    """Tempo médio por chamada em milissegundos"""
+    segundos = min(timeit.repeat(lambda: funcao(repertorio), number=REPETICOES, repeat=5))
+    return segundos / REPETICOES * 1000
+
+def main():
+    repertorio = gerar_repertorio()
+    print(f"Montagem do HTML para {NUM_MUSICAS} músicas (média de {REPETICOES} execuções)")
+    for nome, anterior, atual in (
+        ("simplificado", legado_simplificado, gerar_html_simplificado),
+        ("cifrado", legado_cifrado, gerar_html_cifrado),
+    ):
+        t_anterior = medir(anterior, repertorio)
+        t_atual = medir(atual, repertorio)
+        kb_anterior = len(anterior(repertorio).encode("utf-8")) / 1024
+        kb_atual = len(atual(repertorio).encode("utf-8")) / 1024
+        print(f"  {nome:<13} anterior: {t_anterior:7.3f} ms ({kb_anterior:6.1f} KB)   "
+              f"templates: {t_atual:7.3f} ms ({kb_atual:6.1f} KB)   ({t_anterior / t_atual:.1f}x)")
+
+if __name__ == "__main__":
+    main()
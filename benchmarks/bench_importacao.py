@@ -0,0 +1,143 @@
+"""Importação de backup: sincronização linha a linha (antiga) x mesclagem em conjunto
+
+Uso: python benchmarks/bench_importacao.py
+"""
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.importacao import importar_backup
+from utils.indice_acordes import reindexar_pendentes
+
+NUM_MUSICAS = 20000
+NUM_SHOWS = 1000
+MUSICAS_POR_SHOW = 20
+NUM_CHECKLISTS = 200
+
+ESQUEMA = '''
+    CREATE TABLE musicas (id INTEGER PRIMARY KEY AUTOINCREMENT, musica TEXT NOT NULL, autor TEXT,
+                          estilo TEXT, tom TEXT, cifra TEXT);
+    CREATE TABLE shows (id INTEGER PRIMARY KEY AUTOINCREMENT, data_show TEXT NOT NULL,
+                        local_show TEXT NOT NULL, artista TEXT NOT NULL);
+    CREATE TABLE repertorios_shows (id INTEGER PRIMARY KEY AUTOINCREMENT, id_show INTEGER NOT NULL,
+                                    id_musica INTEGER NOT NULL, sequencia INTEGER NOT NULL,
+                                    transposicao INTEGER NOT NULL DEFAULT 0, arranjo_show TEXT,
+                                    UNIQUE(id_show, id_musica));
+    CREATE TABLE checklist (id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL, titulo TEXT NOT NULL);
+    CREATE TABLE checklist_detail (id INTEGER PRIMARY KEY AUTOINCREMENT, id_checklist INTEGER NOT NULL,
+                                   descricao TEXT NOT NULL, status INTEGER DEFAULT 0);
+    CREATE TABLE musica_acordes (id_musica INTEGER NOT NULL, acorde TEXT NOT NULL,
+                                 PRIMARY KEY (id_musica, acorde)) WITHOUT ROWID;
+    CREATE TABLE musicas_indexadas (id_musica INTEGER PRIMARY KEY);
+    CREATE INDEX idx_musicas_musica_autor ON musicas(musica, autor);
+    CREATE INDEX idx_shows_chave ON shows(data_show, local_show, artista);
+    CREATE INDEX idx_checklist_data_titulo ON checklist(data, titulo);
+    CREATE INDEX idx_checklist_detail_id_checklist ON checklist_detail(id_checklist);
+'''
+
+def gerar_backup():
+    """Linhas (seção, linha) como as de iterar_backup, com algumas repetidas e autores nulos"""
+    linhas = []
+    for i in range(NUM_MUSICAS):
+        autor = None if i % 7 == 0 else f"Autor {i % 50}"
+        linhas.append(("musicas", [f"Música {i}", autor, "Samba", "(Am)", "[Am] letra [D] letra [G]"]))
+    linhas += linhas[:100]
+    for i in range(NUM_SHOWS):
+        linhas.append(("shows", [f"{i % 28 + 1:02d}/01/2025", f"Local {i}", "Artista"]))
+    for i in range(NUM_SHOWS):
+        for j in range(MUSICAS_POR_SHOW):
+            k = (i * 17 + j) % NUM_MUSICAS
+            autor = None if k % 7 == 0 else f"Autor {k % 50}"
+            linhas.append(("repertorios", [f"{i % 28 + 1:02d}/01/2025", f"Local {i}", "Artista",
+                                           f"Música {k}", autor, j + 1, j % 3, None]))
+    for i in range(NUM_CHECKLISTS):
+        linhas.append(("checklists", [f"{i % 28 + 1:02d}/02/2025", f"Checklist {i}"]))
+        for j in range(5):
+            linhas.append(("checklist_detalhes", [f"{i % 28 + 1:02d}/02/2025", f"Checklist {i}", f"Item {j}", j % 2]))
+    return linhas
+
+def sincronizar_linha_a_linha(conn, linhas):
+    """A sincronização antiga: um SELECT e talvez um INSERT para cada linha do backup"""
+    cursor = conn.cursor()
+    for secao, linha in linhas:
+        if secao == "musicas":
+            cursor.execute("SELECT id FROM musicas WHERE musica = ? AND (autor = ? OR (autor IS NULL AND ? IS NULL))",
+                           (linha[0], linha[1], linha[1]))
+            if not cursor.fetchone():
+                cursor.execute("INSERT INTO musicas (musica, autor, estilo, tom, cifra) VALUES (?, ?, ?, ?, ?)", linha[:5])
+        elif secao == "shows":
+            cursor.execute("SELECT id FROM shows WHERE data_show = ? AND local_show = ? AND artista = ?", linha[:3])
+            if not cursor.fetchone():
+                cursor.execute("INSERT INTO shows (data_show, local_show, artista) VALUES (?, ?, ?)", linha[:3])
+        elif secao == "repertorios":
+            cursor.execute("SELECT id FROM shows WHERE data_show = ? AND local_show = ? AND artista = ?", linha[:3])
+            show = cursor.fetchone()
+            cursor.execute("SELECT id FROM musicas WHERE musica = ? AND (autor = ? OR (autor IS NULL AND ? IS NULL))",
+                           (linha[3], linha[4], linha[4]))
+            musica = cursor.fetchone()
+            if show and musica:
+                cursor.execute("SELECT id FROM repertorios_shows WHERE id_show = ? AND id_musica = ?", (show[0], musica[0]))
+                if not cursor.fetchone():
+                    cursor.execute(
+                        "INSERT INTO repertorios_shows (id_show, id_musica, sequencia, transposicao, arranjo_show) VALUES (?, ?, ?, ?, ?)",
+                        (show[0], musica[0], linha[5], linha[6] or 0, linha[7]))
+        elif secao == "checklists":
+            cursor.execute("SELECT id FROM checklist WHERE data = ? AND titulo = ?", linha[:2])
+            if not cursor.fetchone():
+                cursor.execute("INSERT INTO checklist (data, titulo) VALUES (?, ?)", linha[:2])
+        elif secao == "checklist_detalhes":
+            cursor.execute("SELECT id FROM checklist WHERE data = ? AND titulo = ?", linha[:2])
+            checklist = cursor.fetchone()
+            if checklist:
+                cursor.execute("SELECT id FROM checklist_detail WHERE id_checklist = ? AND descricao = ?", (checklist[0], linha[2]))
+                if not cursor.fetchone():
+                    cursor.execute("INSERT INTO checklist_detail (id_checklist, descricao, status) VALUES (?, ?, ?)",
+                                   (checklist[0], linha[2], linha[3]))
+    reindexar_pendentes(cursor)
+    conn.commit()
+
+def banco_vazio(pasta, nome):
+    conn = sqlite3.connect(os.path.join(pasta, nome))
+    conn.executescript(ESQUEMA)
+    return conn
+
+def conteudo(conn):
+    """Retrato comparável do banco, pelas chaves naturais"""
+    return [
+        conn.execute(consulta).fetchall() for consulta in (
+            "SELECT musica, autor, estilo, tom, cifra FROM musicas ORDER BY id",
+            "SELECT data_show, local_show, artista FROM shows ORDER BY id",
+            "SELECT id_show, id_musica, sequencia, transposicao, arranjo_show FROM repertorios_shows ORDER BY id",
+            "SELECT data, titulo FROM checklist ORDER BY id",
+            "SELECT id_checklist, descricao, status FROM checklist_detail ORDER BY id",
+        )
+    ]
+
+def main():
+    linhas = gerar_backup()
+    print(f"Importação de {len(linhas)} linhas de backup em um banco vazio e de novo sobre o banco já importado")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        antigo = banco_vazio(pasta, "antigo.db")
+        novo = banco_vazio(pasta, "novo.db")
+        for rodada in ("banco vazio", "reimportação"):
+            inicio = time.perf_counter()
+            sincronizar_linha_a_linha(antigo, linhas)
+            tempo_antigo = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            importar_backup(novo, iter(linhas))
+            tempo_novo = time.perf_counter() - inicio
+
+            print(f"  {rodada:<13} linha a linha: {tempo_antigo:6.2f} s ({len(linhas) / tempo_antigo:8.0f} linhas/s)"
+                  f"   em conjunto: {tempo_novo:6.2f} s ({len(linhas) / tempo_novo:8.0f} linhas/s)")
+        print(f"  mesmo resultado nos dois bancos: {conteudo(antigo) == conteudo(novo)}")
+        antigo.close()
+        novo.close()
+
+if __name__ == "__main__":
+    main()
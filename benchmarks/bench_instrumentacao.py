@@ -0,0 +1,57 @@
+"""Custo do cursor instrumentado em relação ao cursor comum do sqlite3
+
+Uso: python benchmarks/bench_instrumentacao.py
+"""
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from database import Database
+from utils.instrumentacao import RegistroConsultas, conectar_instrumentado
+from bench_diferencial import popular, NUM_MUSICAS
+
+NUM_CONSULTAS = 20000
+
+def medir(conn):
+    """Consultas curtas pela chave (o pior caso: o tempo da medição pesa mais) e uma varredura"""
+    cursor = conn.cursor()
+    inicio = time.perf_counter()
+    for i in range(NUM_CONSULTAS):
+        cursor.execute("SELECT musica, autor, tom FROM musicas WHERE id = ?", (i % NUM_MUSICAS + 1,))
+        cursor.fetchone()
+    curtas = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    cursor.execute("SELECT id, musica, autor, estilo, tom FROM musicas ORDER BY musica")
+    cursor.fetchall()
+    return curtas, time.perf_counter() - inicio
+
+def main():
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)
+        db = Database()
+        popular(db)
+        db.close()
+
+        comum = sqlite3.connect(db.caminho)
+        registro = RegistroConsultas()
+        instrumentada = conectar_instrumentado(db.caminho, registro)
+        medir(comum)
+        curtas_comum, varredura_comum = medir(comum)
+        curtas_instr, varredura_instr = medir(instrumentada)
+        print(f"{NUM_CONSULTAS} consultas pela chave:")
+        print(f"  cursor comum:        {curtas_comum * 1000:8.1f} ms  ({curtas_comum / NUM_CONSULTAS * 1e6:.1f} µs cada)")
+        print(f"  cursor instrumentado:{curtas_instr * 1000:8.1f} ms  ({curtas_instr / NUM_CONSULTAS * 1e6:.1f} µs cada)")
+        print(f"Lista de {NUM_MUSICAS} músicas: {varredura_comum * 1000:.1f} ms comum, {varredura_instr * 1000:.1f} ms instrumentado")
+        for consulta in registro.resumo()["consultas"][:3]:
+            print(f"  {consulta['execucoes']:>6}x  p95 {consulta['p95_ms']:7.3f} ms  {consulta['sql'][:70]}")
+        comum.close()
+        instrumentada.close()
+        os.chdir(RAIZ)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Manutenção do banco depois de excluir metade das músicas e dos shows
+
+Mede as consultas de sondagem antes e depois (ANALYZE, optimize, vacuum), o tamanho do arquivo
+e o custo da manutenção leve feita ao fechar o banco.
+
+Uso: python benchmarks/bench_manutencao.py
+"""
+import os
+import sys
+import time
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from database import Database
+from utils.indice_acordes import reindexar_pendentes
+from utils.manutencao import executar_manutencao
+from bench_diferencial import popular, NUM_MUSICAS
+
+def main():
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)
+        db = Database()
+        popular(db)
+        reindexar_pendentes(db.cursor)
+        db.cursor.execute("DELETE FROM musicas WHERE id % 2 = 0")
+        db.cursor.execute("DELETE FROM shows WHERE id % 2 = 0")
+        db.conn.commit()
+        print(f"Banco com {NUM_MUSICAS} músicas, metade delas e dos shows excluída")
+
+        resultado = executar_manutencao(db.conn)
+        antes, depois = resultado["antes"], resultado["depois"]
+        print(f"  arquivo: {antes['bytes'] / 1048576:.1f} MB -> {depois['bytes'] / 1048576:.1f} MB, "
+              f"páginas livres: {antes['livres']} -> {depois['livres']}")
+        for etapa, segundos in resultado["etapas"].items():
+            print(f"  {etapa:<20} {segundos * 1000:8.1f} ms")
+        for nome, ms in antes["consultas"].items():
+            print(f"  {nome:<20} {ms:8.2f} ms -> {depois['consultas'][nome]:8.2f} ms")
+
+        # Já incremental: a próxima exclusão em massa é devolvida aos poucos, sem VACUUM completo
+        db.cursor.execute("DELETE FROM musicas WHERE id % 3 = 0")
+        db.conn.commit()
+        inicio = time.perf_counter()
+        db.close()
+        print(f"  fechar o banco (optimize + vacuum incremental): {(time.perf_counter() - inicio) * 1000:.1f} ms, "
+              f"arquivo com {os.path.getsize(db.caminho) / 1048576:.1f} MB")
+        os.chdir(RAIZ)
+
+if __name__ == "__main__":
+    main()
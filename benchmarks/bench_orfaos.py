@@ -0,0 +1,63 @@
+"""Varredura de órfãos: um banco em que um terço das músicas e dos shows foi excluído sem os filhos
+
+Uso: python benchmarks/bench_orfaos.py
+"""
+import os
+import sys
+import time
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from database import Database
+from utils.integridade import varrer_orfaos
+from utils.indice_acordes import reindexar_pendentes
+from utils.diferencial import criar_registro_alteracoes, FILHOS_ANTES_DO_PAI
+from bench_diferencial import popular, NUM_MUSICAS
+
+CONSULTA_REPERTORIOS = '''
+    SELECT COUNT(*) FROM repertorios_shows rs
+    LEFT JOIN shows s ON rs.id_show = s.id
+    LEFT JOIN musicas m ON rs.id_musica = m.id
+'''
+
+def main():
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)
+        db = Database()
+        popular(db)
+        reindexar_pendentes(db.cursor)
+        db.conn.commit()
+        # Como o app fazia antes das chaves estrangeiras: o pai sai e os filhos ficam
+        # (sem os gatilhos que hoje apagam os filhos antes do pai)
+        db.conn.execute("PRAGMA foreign_keys = OFF")
+        for pai in FILHOS_ANTES_DO_PAI:
+            db.cursor.execute(f"DROP TRIGGER alteracoes_{pai}_filhos")
+        db.cursor.execute("DELETE FROM musicas WHERE id % 3 = 0")
+        db.cursor.execute("DELETE FROM shows WHERE id % 3 = 0")
+        db.cursor.execute("DELETE FROM checklist")
+        criar_registro_alteracoes(db.cursor)
+        db.conn.commit()
+        db.conn.execute("PRAGMA foreign_keys = ON")
+        print(f"Banco com {NUM_MUSICAS} músicas, um terço excluído sem os repertórios e acordes")
+
+        inicio = time.perf_counter()
+        resultado = varrer_orfaos(db.conn)
+        segundos = time.perf_counter() - inicio
+        for tabela, linhas in resultado["linhas"].items():
+            print(f"  {tabela:<18} {linhas:>7} órfãos removidos")
+        print(f"  varredura: {segundos * 1000:.1f} ms, {resultado['paginas']} páginas liberadas "
+              f"({resultado['bytes'] / 1024:.0f} KB)")
+
+        inicio = time.perf_counter()
+        db.cursor.execute("DELETE FROM musicas WHERE id = (SELECT MAX(id_musica) FROM repertorios_shows)")
+        db.conn.commit()
+        print(f"  excluir uma música com repertórios (gatilho e cascata): {(time.perf_counter() - inicio) * 1000:.1f} ms")
+        db.cursor.execute(CONSULTA_REPERTORIOS + " WHERE s.id IS NULL OR m.id IS NULL")
+        print(f"  órfãos restantes: {db.cursor.fetchone()[0]}")
+        db.close()
+        os.chdir(RAIZ)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Escalabilidade do PDF cifrado dividido em partes com 1, 2, 4 e 8 workers
+
+Uso: python benchmarks/bench_pdf_paralelo.py
+"""
+import os
+import sys
+import time
+import logging
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.exportacao import ServicoExportacaoPDF
+from utils.layout_pdf import paginar_repertorio
+
+NUM_MUSICAS = 60
+WORKERS = (1, 2, 4, 8)
+REPETICOES = 3
+
+CIFRA_EXEMPLO = "Am7 - D [inicio pizzicato] G - C [fim pizzicato] Am7 - D -- G - C - D "
+
+def gerar_repertorio(num_musicas=NUM_MUSICAS):
+    """Repertório sintético com cifras de tamanhos variados"""
+    return [
+        (i, f"Música de teste número {i}", "(F#m)", CIFRA_EXEMPLO * (1 + i % 6), i)
+        for i in range(1, num_musicas + 1)
+    ]
+
+def exportar(servico, repertorio, destino):
+    """Exporta e espera o término, retornando o tempo em segundos"""
+    terminou = threading.Event()
+    erros = []
+
+    def concluir(caminho, erro):
+        if erro:
+            erros.append(erro)
+        terminou.set()
+
+    inicio = time.perf_counter()
+    servico.exportar("cifrado", repertorio, destino, concluir)
+    terminou.wait()
+    if erros:
+        raise erros[0]
+    return time.perf_counter() - inicio
+
+def main():
+    logging.disable(logging.WARNING)
+    repertorio = gerar_repertorio()
+    paginas = len(paginar_repertorio(repertorio))
+    print(f"PDF cifrado com {NUM_MUSICAS} músicas (~{paginas} páginas), {os.cpu_count()} CPU(s) disponíveis")
+
+    base = None
+    with tempfile.TemporaryDirectory() as pasta:
+        destino = os.path.join(pasta, "cifrado.pdf")
+        for workers in WORKERS:
+            servico = ServicoExportacaoPDF(max_workers=workers)
+            servico.aquecer(workers)
+            exportar(servico, repertorio, destino)  # aquecimento: sobe todos os workers
+
+            tempo = min(exportar(servico, repertorio, destino) for _ in range(REPETICOES))
+            servico.encerrar()
+
+            base = base or tempo
+            print(f"  {workers} worker(s): {tempo * 1000:8.0f} ms   speedup {base / tempo:4.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Compara os motores do PDF simplificado: xhtml2pdf (HTML) x desenho direto (nativo)
+
+Uso: python benchmarks/bench_pdf_simplificado.py
+"""
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pdf import renderizar_pdf
+
+TAMANHOS = (20, 40, 80)
+REPETICOES = 5
+
+def gerar_repertorio(num_musicas):
+    """Repertório sintético com nomes e tons"""
+    return [(i, f"Música de teste número {i}", "(F#m)", "", i) for i in range(1, num_musicas + 1)]
+
+def medir(backend, repertorio, destino):
+    """Retorna (melhor tempo em ms, pico de memória em KB, tamanho do arquivo em KB)"""
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        renderizar_pdf("simplificado", repertorio, destino, backend=backend)
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    renderizar_pdf("simplificado", repertorio, destino, backend=backend)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return min(tempos) * 1000, pico / 1024, os.path.getsize(destino) / 1024
+
+def main():
+    # O xhtml2pdf avisa sobre propriedades CSS não suportadas a cada chamada
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as pasta:
+        destino = os.path.join(pasta, "simplificado.pdf")
+        print(f"PDF simplificado, A4 paisagem (melhor de {REPETICOES} execuções)")
+        for num_musicas in TAMANHOS:
+            repertorio = gerar_repertorio(num_musicas)
+            t_html, m_html, kb_html = medir("html", repertorio, destino)
+            t_nativo, m_nativo, kb_nativo = medir("nativo", repertorio, destino)
+            print(f"  {num_musicas:3d} músicas  html: {t_html:7.1f} ms, {m_html:7.0f} KB pico, {kb_html:5.1f} KB   "
+                  f"nativo: {t_nativo:6.1f} ms, {m_nativo:6.0f} KB pico, {kb_nativo:5.1f} KB   "
+                  f"({t_html / t_nativo:.0f}x mais rápido)")
+
+if __name__ == "__main__":
+    main()
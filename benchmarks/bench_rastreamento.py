@@ -0,0 +1,79 @@
+"""Custo do rastreamento por ação: handler vazio com e sem rastro, e a divisão de um handler típico
+
+Uso: python benchmarks/bench_rastreamento.py
+"""
+import os
+import sys
+import time
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from database import Database
+from utils.rastreamento import Rastreador
+from bench_diferencial import popular
+
+NUM_ACOES = 2000
+
+class PaginaFalsa:
+    """O mínimo de uma página do Flet: run_thread roda o handler na hora, update simula o envio"""
+
+    def run_thread(self, handler, *argumentos):
+        handler(*argumentos)
+
+    def update(self, *controles):
+        time.sleep(0.001)
+
+    def add(self, *controles):
+        self.update()
+
+class Evento:
+    def __init__(self, name):
+        self.control = self
+        self.name = name
+
+def main():
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)
+        db = Database()
+        popular(db)
+        pagina = PaginaFalsa()
+
+        def vazio(e):
+            pass
+
+        inicio = time.perf_counter()
+        for _ in range(NUM_ACOES):
+            pagina.run_thread(vazio, Evento("click"))
+        sem_rastro = time.perf_counter() - inicio
+
+        rastreador = Rastreador()
+        rastreador.instalar(pagina)
+        inicio = time.perf_counter()
+        for _ in range(NUM_ACOES):
+            pagina.run_thread(vazio, Evento("click"))
+        com_rastro = time.perf_counter() - inicio
+        print(f"{NUM_ACOES} ações vazias: {sem_rastro * 1000:.1f} ms sem rastro, {com_rastro * 1000:.1f} ms com "
+              f"({(com_rastro - sem_rastro) / NUM_ACOES * 1e6:.0f} µs por ação)")
+
+        # Como marcar um item de checklist: grava, relê a lista e atualiza a tela duas vezes
+        def marcar_item(e):
+            db.cursor.execute("UPDATE checklist_detail SET status = 1 - status WHERE id = 1")
+            db.conn.commit()
+            db.cursor.execute("SELECT id, descricao, status FROM checklist_detail ORDER BY id")
+            linhas = db.cursor.fetchall()
+            [dict(id=linha[0], texto=linha[1] * 20) for linha in linhas * 200]
+            pagina.update()
+            pagina.update()
+
+        for _ in range(20):
+            pagina.run_thread(marcar_item, Evento("change"))
+        for acao in rastreador.resumir():
+            print(f"  {acao['acao']:<45} {acao['vezes']:>5}x  total {acao['total_ms']:6.2f} ms  banco {acao['banco_ms']:6.2f}"
+                  f"  controles {acao['controles_ms']:6.2f}  update {acao['update_ms']:6.2f} ({acao['updates']:.0f}x)")
+        db.close()
+        os.chdir(RAIZ)
+
+if __name__ == "__main__":
+    main()
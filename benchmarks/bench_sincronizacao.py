@@ -0,0 +1,63 @@
+"""Sincronização entre dois aparelhos: primeira vez (tudo novo) e depois de poucas alterações
+
+Uso: python benchmarks/bench_sincronizacao.py
+"""
+import os
+import sys
+import time
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from database import Database
+from utils.backup import escrever_pacote_sincronizacao, iterar_backup, ler_cabecalho
+from utils.sincronizacao import sincronizar
+from bench_diferencial import popular, NUM_MUSICAS
+
+NUM_ALTERACOES = 50
+
+def abrir(pasta):
+    os.makedirs(pasta)
+    os.chdir(pasta)
+    db = Database()
+    db.caminho = os.path.abspath(db.caminho)
+    return db
+
+def sincronizar_pacote(origem, destino, pacote):
+    inicio = time.perf_counter()
+    escrever_pacote_sincronizacao(origem.caminho, pacote)
+    meio = time.perf_counter()
+    resumo, conflitos, _ = sincronizar(destino.conn, iterar_backup(pacote), ler_cabecalho(pacote))
+    fim = time.perf_counter()
+    gravadas = sum(secao["incluidas"] + secao["atualizadas"] + secao["removidas"] for secao in resumo.values())
+    return (meio - inicio) * 1000, (fim - meio) * 1000, gravadas, len(conflitos)
+
+def main():
+    with tempfile.TemporaryDirectory() as pasta:
+        a = abrir(os.path.join(pasta, "a"))
+        b = abrir(os.path.join(pasta, "b"))
+        popular(a)
+        print(f"Aparelho A com {NUM_MUSICAS} músicas; B vazio")
+
+        def alterar():
+            a.cursor.execute(f"UPDATE musicas SET tom = '(C)' WHERE id <= {NUM_ALTERACOES}")
+            a.conn.commit()
+
+        for nome, origem, destino, antes in (
+            ("A -> B", a, b, None),
+            ("B -> A", b, a, None),
+            (f"{NUM_ALTERACOES} alterações", a, b, alterar),
+        ):
+            if antes:
+                antes()
+            pacote = os.path.join(pasta, "pacote.ndjson.gz")
+            exportar, mesclar, gravadas, conflitos = sincronizar_pacote(origem, destino, pacote)
+            print(f"  {nome:<16} pacote: {exportar:7.1f} ms {os.path.getsize(pacote):>9} bytes"
+                  f"   mesclagem: {mesclar:7.1f} ms   {gravadas} registros gravados, {conflitos} conflitos")
+        a.close()
+        b.close()
+        os.chdir(RAIZ)
+
+if __name__ == "__main__":
+    main()
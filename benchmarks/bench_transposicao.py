@@ -0,0 +1,48 @@
+"""Tempo da prévia de transposição de um repertório inteiro a cada clique de meio tom
+
+Uso: python benchmarks/bench_transposicao.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cifra import linhas_cifra, tokenizar_cifra
+from utils.transposicao import previa_transposicao, transpor_cifra, transpor_acorde, analisar_acorde, transpor_tom
+
+NUM_MUSICAS = 60
+
+LINHA_EXEMPLO = "Am7 - D [inicio pizzicato] G - C [fim pizzicato] F#m7(b5) B7 Em -- Bb7M C/E G7(9,13)"
+
+def gerar_repertorio():
+    """(id, nome, tom, cifra, deslocamento) com cifras de 20 a 70 linhas"""
+    return [
+        (i, f"Música {i}", "(Am)", "\n".join([LINHA_EXEMPLO] * (20 + i % 6 * 10)), 0)
+        for i in range(1, NUM_MUSICAS + 1)
+    ]
+
+def limpar_caches():
+    """Zera os caches para medir o primeiro clique"""
+    for funcao in (transpor_cifra, transpor_acorde, analisar_acorde, transpor_tom, linhas_cifra, tokenizar_cifra):
+        funcao.cache_clear()
+
+def main():
+    repertorio = gerar_repertorio()
+    print(f"Prévia de transposição de {NUM_MUSICAS} músicas (tom e cifra completa de cada uma)")
+
+    limpar_caches()
+    inicio = time.perf_counter()
+    for semitons in range(1, 12):
+        previa_transposicao(repertorio, semitons)
+    frio = (time.perf_counter() - inicio) / 11 * 1000
+
+    inicio = time.perf_counter()
+    for semitons in range(1, 12):
+        previa_transposicao(repertorio, semitons)
+    quente = (time.perf_counter() - inicio) / 11 * 1000
+
+    print(f"  primeiro clique em cada tom: {frio:7.2f} ms   voltando a um tom já visto: {quente:6.3f} ms")
+
+if __name__ == "__main__":
+    main()
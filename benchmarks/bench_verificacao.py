@@ -0,0 +1,53 @@
+"""Verificação (simulação) de um backup grande x importação de verdade do mesmo arquivo
+
+Uso: python benchmarks/bench_verificacao.py
+"""
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from database import Database
+from utils.backup import escrever_backup, iterar_backup
+from utils.importacao import importar_backup
+from utils.verificacao import verificar_backup
+from bench_diferencial import popular
+from bench_importacao import ESQUEMA
+
+def medir(funcao, *argumentos):
+    inicio = time.perf_counter()
+    resultado = funcao(*argumentos)
+    return resultado, time.perf_counter() - inicio
+
+def main():
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)
+        db = Database()
+        popular(db)
+        for nome in ("backup.ndjson", "backup.ndjson.gz"):
+            escrever_backup(db.caminho, nome)
+            print(f"{nome}: {os.path.getsize(nome) / 1024 / 1024:.1f} MB")
+
+            somente_leitura = sqlite3.connect(f"file:{db.caminho}?mode=ro", uri=True)
+            relatorio, segundos = medir(verificar_backup, nome, somente_leitura)
+            somente_leitura.close()
+            print(f"  verificação contra o mesmo banco: {segundos:5.2f} s  "
+                  f"(válido: {relatorio['valido']}, novos: {sum(relatorio['novas'].values())})")
+
+            relatorio, segundos = medir(verificar_backup, nome)
+            print(f"  verificação sem banco:            {segundos:5.2f} s  (novos: {sum(relatorio['novas'].values())})")
+
+            destino = sqlite3.connect(os.path.join(pasta, f"importado-{nome}.db"))
+            destino.executescript(ESQUEMA)
+            _, segundos = medir(importar_backup, destino, iterar_backup(nome))
+            destino.close()
+            print(f"  importação em banco vazio:        {segundos:5.2f} s")
+        db.close()
+        os.chdir(RAIZ)
+
+if __name__ == "__main__":
+    main()
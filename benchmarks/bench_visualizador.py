@@ -0,0 +1,81 @@
+"""Controles e tempo até o primeiro envio da cifra no visualizador: um Text por trecho x trechos (spans)
+
+Conta os controles que o Flet serializa e mede montagem + serialização da mensagem
+que vai para o cliente (o layout feito pelo cliente Flutter não entra na medida).
+Uso: python benchmarks/bench_visualizador.py
+"""
+import os
+import sys
+import json
+import timeit
+
+import flet as ft
+from flet_core.protocol import CommandEncoder
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.visualizacao_cifra import formatar_cifra_para_visualizacao
+from utils.cifra import tokenizar_cifra, TEXTO, ACORDE
+
+TAMANHOS = (20, 80, 200)  # linhas de cifra
+REPETICOES = 20
+
+LINHA_EXEMPLO = "Am7 - D [inicio pizzicato] G - C [fim pizzicato] Am7 - D -- G - C - D"
+
+def gerar_cifra(num_linhas):
+    """Cifra sintética com uma linha em branco a cada cinco"""
+    return "\n".join(LINHA_EXEMPLO if i % 5 else "" for i in range(1, num_linhas + 1))
+
+# Implementação anterior (uma Row por linha e um Text por trecho), só para comparação
+def legado_visualizacao(cifra, tamanho=16):
+    controles = []
+    linha = []
+    for tipo, valor in tokenizar_cifra(cifra) + (("quebra", "\n"),):
+        if tipo not in (TEXTO, ACORDE):
+            if all(t == TEXTO and not v.strip() for t, v in linha):
+                controles.append(ft.Divider(height=5))
+            else:
+                partes = []
+                texto_atual = ""
+                for t, v in linha:
+                    if t != ACORDE:
+                        texto_atual += v
+                        continue
+                    if texto_atual:
+                        partes.append(ft.Text(texto_atual, size=tamanho))
+                        texto_atual = ""
+                    partes.append(ft.Text(v, size=tamanho, weight=ft.FontWeight.BOLD, color=ft.colors.BLUE_700))
+                if texto_atual:
+                    partes.append(ft.Text(texto_atual, size=tamanho))
+                controles.append(ft.Row(partes, spacing=2, wrap=True))
+            linha = []
+        else:
+            linha.append((tipo, valor))
+    return controles
+
+def primeiro_envio(formatar, cifra):
+    """Monta os controles dentro da Column do visualizador e serializa o comando de inclusão"""
+    coluna = ft.Column(controls=formatar(cifra), spacing=5, expand=True)
+    adicionados = []
+    comandos = coluna._build_add_commands(index={"page": None}, added_controls=adicionados)
+    mensagem = json.dumps(comandos, cls=CommandEncoder, separators=(",", ":"))
+    return len(adicionados), len(mensagem)
+
+def medir(formatar, cifra):
+    """Melhor tempo por envio em ms"""
+    return min(timeit.repeat(lambda: primeiro_envio(formatar, cifra), number=REPETICOES, repeat=5)) / REPETICOES * 1000
+
+def main():
+    print(f"Cifra no visualizador (melhor média de {REPETICOES} execuções)")
+    for num_linhas in TAMANHOS:
+        cifra = gerar_cifra(num_linhas)
+        controles_antes, bytes_antes = primeiro_envio(legado_visualizacao, cifra)
+        controles_depois, bytes_depois = primeiro_envio(formatar_cifra_para_visualizacao, cifra)
+        t_antes = medir(legado_visualizacao, cifra)
+        t_depois = medir(formatar_cifra_para_visualizacao, cifra)
+        print(f"  {num_linhas:3d} linhas  anterior: {controles_antes:5d} controles, {bytes_antes / 1024:6.1f} KB, {t_antes:7.2f} ms   "
+              f"spans: {controles_depois:4d} controles, {bytes_depois / 1024:6.1f} KB, {t_depois:6.2f} ms   "
+              f"({t_antes / t_depois:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,32 @@
 import sqlite3
+from utils.indice_acordes import atualizar_indice
+from utils.snapshots import restaurar_arquivo
+from utils.diferencial import criar_registro_alteracoes
+from utils.sincronizacao import preparar_sincronizacao
+from utils.integridade import criar_cascatas, varrer_orfaos, ligar_chaves_estrangeiras
+from utils.manutencao import manutencao_leve, INCREMENTAL
+from utils.instrumentacao import RegistroConsultas, conectar_instrumentado
 
 class Database:
     def __init__(self):
-        self.conn = sqlite3.connect('repertorio.db', check_same_thread=False)
+        self.caminho = 'repertorio.db'
+        # Tempo de cada consulta feita pelos cursores do app (sobrevive à troca da conexão)
+        self.consultas = RegistroConsultas()
+        self.conectar()
+
+    def conectar(self):
+        """Abre a conexão com o banco e garante o esquema atual"""
+        self.conn = conectar_instrumentado(self.caminho, self.consultas, check_same_thread=False)
         self.cursor = self.conn.cursor()
         self.setup_tables()
+        # Só depois do esquema: a reconstrução das tabelas antigas precisa delas desligadas
+        ligar_chaves_estrangeiras(self.conn)
 
     def setup_tables(self):
         """Cria as tabelas se não existirem"""
+        # Só vale para um banco novo (antes da primeira tabela); os antigos mudam no próximo VACUUM
+        self.cursor.execute(f"PRAGMA auto_vacuum = {INCREMENTAL}")
+
         # Tabela de músicas
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS musicas (
@@ -37,14 +56,24 @@ class Database:
                 id_show INTEGER NOT NULL,
                 id_musica INTEGER NOT NULL,
                 sequencia INTEGER NOT NULL,
-                FOREIGN KEY (id_show) REFERENCES shows (id),
-                FOREIGN KEY (id_musica) REFERENCES musicas (id),
+                FOREIGN KEY (id_show) REFERENCES shows (id) ON DELETE CASCADE,
+                FOREIGN KEY (id_musica) REFERENCES musicas (id) ON DELETE CASCADE,
                 UNIQUE(id_show, id_musica)
             )
         ''')
         
         self.conn.commit()
 
+        # Ajustes da música só para o show (bancos antigos não têm as colunas):
+        # transposição em semitons em relação ao tom do cadastro e arranjo (cifra) próprio
+        self.cursor.execute("PRAGMA table_info(repertorios_shows)")
+        colunas = [coluna[1] for coluna in self.cursor.fetchall()]
+        if "transposicao" not in colunas:
+            self.cursor.execute("ALTER TABLE repertorios_shows ADD COLUMN transposicao INTEGER NOT NULL DEFAULT 0")
+        if "arranjo_show" not in colunas:
+            self.cursor.execute("ALTER TABLE repertorios_shows ADD COLUMN arranjo_show TEXT")
+        self.conn.commit()
+
         # Tabela de checklists
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS checklist (
@@ -71,6 +100,74 @@ class Database:
         self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_checklist_detail_id_checklist ON checklist_detail(id_checklist)')
         self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_checklist_detail_status ON checklist_detail(status)')
 
+        # Índice de acordes extraídos das cifras, para buscar músicas por acorde sem reler as cifras
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS musica_acordes (
+                id_musica INTEGER NOT NULL,
+                acorde TEXT NOT NULL,
+                PRIMARY KEY (id_musica, acorde),
+                FOREIGN KEY (id_musica) REFERENCES musicas (id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+        ''')
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_musica_acordes_acorde ON musica_acordes(acorde, id_musica)')
+        # Músicas já processadas pelo índice (inclusive as sem acordes); a troca da cifra tira a marca
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS musicas_indexadas (
+                id_musica INTEGER PRIMARY KEY,
+                FOREIGN KEY (id_musica) REFERENCES musicas (id) ON DELETE CASCADE
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS musicas_indexadas_cifra AFTER UPDATE OF cifra ON musicas
+            WHEN OLD.cifra IS NOT NEW.cifra
+            BEGIN
+                DELETE FROM musicas_indexadas WHERE id_musica = NEW.id;
+            END
+        ''')
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_musicas_tom ON musicas(tom)')
+
+        # Bancos antigos: chaves estrangeiras sem cascata são recriadas (índices e gatilhos vêm abaixo)
+        cascatas_criadas = criar_cascatas(self.cursor)
+        self.conn.commit()
+        # A cascata de uma música apaga os repertórios dela por este índice
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_repertorios_shows_id_musica ON repertorios_shows(id_musica)')
+
+        # Chaves naturais usadas pela importação de backup para achar o que já existe
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_musicas_musica_autor ON musicas(musica, autor)')
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_shows_chave ON shows(data_show, local_show, artista)')
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_checklist_data_titulo ON checklist(data, titulo)')
+
+        # Registro de alterações (gatilhos) para os backups diferenciais
+        criar_registro_alteracoes(self.cursor)
+
+        # uuid e carimbo de alteração em todas as tabelas, para sincronizar entre aparelhos
+        preparar_sincronizacao(self.cursor)
+
+        # Preenche o índice das músicas que ainda não estão nele (bancos antigos e importações)
+        # e o refaz inteiro se foi montado por uma extração de acordes anterior
+        atualizar_indice(self.cursor)
+        self.conn.commit()
+
+        # Os órfãos deixados enquanto as chaves não eram conferidas saem uma vez, na migração
+        if cascatas_criadas:
+            varrer_orfaos(self.conn)
+
+    def restaurar_snapshot(self, caminho_snapshot):
+        """Troca o arquivo do banco pelo snapshot e reabre a conexão
+
+        Quem guardou self.conn ou self.cursor precisa pegar os novos depois disso.
+        """
+        self.conn.close()
+        try:
+            restaurar_arquivo(self.caminho, caminho_snapshot)
+        finally:
+            # Reabre mesmo se a troca falhar, para o app continuar com o banco que estiver lá
+            self.conectar()
+
     def close(self):
-        """Fecha a conexão com o banco"""
+        """Fecha a conexão com o banco, depois da manutenção leve (optimize e parte das páginas livres)"""
+        try:
+            manutencao_leve(self.conn)
+        except sqlite3.Error:
+            pass  # banco ocupado ou só leitura: a manutenção fica para a próxima vez
         self.conn.close()
\ No newline at end of file
@@ -5,6 +5,7 @@ from tabs.configuracoes import ConfiguracoesTab
 from tabs.sobre import SobreTab
 from database import Database
 from tabs.checklists import ChecklistsTab
+from utils.rastreamento import Rastreador
 
 class MusicApp:
     def __init__(self, page: ft.Page):
@@ -21,6 +22,17 @@ class MusicApp:
         # Inicializar banco de dados
         self.db = Database()
         
+        # Cada handler de evento (síncrono ou async) vira uma linha em rastros/acoes.jsonl (banco, controles e page.update)
+        self.rastreador = Rastreador()
+        self.rastreador.instalar(self.page)
+        
+        # Fechar a janela passa por self.fechar, que faz a manutenção do banco antes de sair
+        try:
+            self.page.window.prevent_close = True
+            self.page.window.on_event = self.ao_evento_janela
+        except AttributeError:
+            self.page.on_disconnect = lambda e: self.db.close()
+        
         # Inicializar abas
         self.tabs = {}
         self.setup_tabs()
@@ -65,6 +77,17 @@ class MusicApp:
         elif e.control.selected_index == 4:
             self.tabs['sobre'].on_enter()
 
+    def ao_evento_janela(self, e):
+        if e.data == "close":
+            self.fechar()
+
+    def fechar(self):
+        """Para os timers e o pool de PDFs, fecha o banco (com a manutenção leve) e a janela"""
+        self.tabs['configuracoes'].parar_timers()
+        self.tabs['shows'].exportador.encerrar()
+        self.db.close()
+        self.page.window.destroy()
+
 def main(page: ft.Page):
     app = MusicApp(page)
 
@@ -2,4 +2,5 @@ from .musicas import MusicasTab
 from .shows import ShowsTab
 from .checklists import ChecklistsTab
 from .configuracoes import ConfiguracoesTab
-from .sobre import SobreTab
\ No newline at end of file
+from .sobre import SobreTab
+from .palco import ModoPalco
\ No newline at end of file
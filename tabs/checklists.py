@@ -1,5 +1,6 @@
 import flet as ft
 from datetime import datetime
+from utils.rastreamento import trecho
 
 class ChecklistsTab:
     def __init__(self, app, page, db):
@@ -349,12 +350,14 @@ class ChecklistsTab:
                 self.conn.commit()
                 
                 # Atualizar dados e tabela
-                self.checklists_data = self.carregar_checklists()
-                self.atualizar_tabela()
+                with trecho("atualizar tabela"):
+                    self.checklists_data = self.carregar_checklists()
+                    self.atualizar_tabela()
                 
                 # Atualizar cards de estatística
                 if hasattr(self.app, 'tabs') and 'configuracoes' in self.app.tabs:
-                    self.app.tabs['configuracoes'].atualizar_cards()
+                    with trecho("cards de estatística"):
+                        self.app.tabs['configuracoes'].atualizar_cards()
                 
                 # Fechar o diálogo
                 self.page.dialog.open = False
@@ -451,12 +454,14 @@ class ChecklistsTab:
         def alternar_status_item(id_item, checkbox):
             """Alterna o status de um item do checklist"""
             novo_status = 1 if checkbox.value else 0
-            self.cursor.execute(
-                "UPDATE checklist_detail SET status = ? WHERE id = ?",
-                (novo_status, id_item)
-            )
-            self.conn.commit()
-            carregar_itens()
+            with trecho("gravar item"):
+                self.cursor.execute(
+                    "UPDATE checklist_detail SET status = ? WHERE id = ?",
+                    (novo_status, id_item)
+                )
+                self.conn.commit()
+            with trecho("recarregar itens"):
+                carregar_itens()
             self.page.update()
         
         def carregar_itens():
@@ -1,7 +1,41 @@
 import flet as ft
-import json
 import os
+import threading
+import time
 from datetime import datetime
+from utils.backup import (
+    escrever_backup, escrever_diferencial, escrever_pacote_sincronizacao, iterar_backup, iterar_diferencial,
+    ler_cabecalho, caminho_banco, nome_arquivo_backup
+)
+from utils.importacao import importar_backup, importar_diferencial, ImportacaoCancelada
+from utils.sincronizacao import sincronizar, TIPO_PACOTE
+from utils.verificacao import verificar_backup
+from utils.integridade import varrer_orfaos, ligar_chaves_estrangeiras
+from utils.instrumentacao import conectar_instrumentado, salvar_diagnostico, LIMITE_LENTA_MS
+from utils.manutencao import (
+    executar_manutencao, estatisticas_banco, resumo_arquivo, manutencao_leve, INCREMENTAL, INTERVALO_MANUTENCAO,
+    OCIOSIDADE_MANUTENCAO, VERIFICACAO_OCIOSIDADE
+)
+from utils.snapshots import (
+    criar_snapshot, listar_snapshots, snapshot_automatico, verificar_snapshot,
+    segundos_para_proximo_automatico, TIPOS_SNAPSHOT, INTERVALO_AUTOMATICO, DIAS_RETENCAO
+)
+
+NOMES_SECOES = {
+    "musicas": "músicas",
+    "shows": "shows",
+    "repertorios": "repertórios",
+    "checklists": "checklists",
+    "checklist_detalhes": "itens de checklist",
+    "remocoes": "remoções",
+    "alteracoes": "alterações",
+}
+NOMES_TABELAS_ORFAOS = {
+    "repertorios_shows": "repertórios",
+    "checklist_detail": "itens de checklist",
+    "musica_acordes": "acordes indexados",
+    "musicas_indexadas": "marcas de indexação",
+}
 
 class ConfiguracoesTab:
     def __init__(self, app, page, db):
@@ -13,12 +47,24 @@ class ConfiguracoesTab:
         
         self.card_total_musicas = None
         self.card_total_shows = None
+        
+        # Snapshots automáticos e manutenção leve enquanto o app está aberto
+        self._timer_snapshot = None
+        self._timer_manutencao = None
+        self._ultima_manutencao = time.monotonic()
+        self.agendar_snapshot_automatico()
+        self.agendar_manutencao_automatica()
 
     def build(self):
         """Constrói a interface da aba de configurações"""
         self.card_total_musicas = self.criar_card_estatistica("Total de Músicas", self.obter_total_musicas())
         self.card_total_shows = self.criar_card_estatistica("Total de Shows", self.obter_total_shows())
         self.card_total_checklists = self.criar_card_estatistica("Total de Checklists", self.obter_total_checklists())
+        self.check_pacote_completo = ft.Checkbox(
+            label="Pacote completo",
+            tooltip="Para um aparelho novo ou que ficou muito tempo sem sincronizar"
+        )
+        self.texto_manutencao = ft.Text(self.obter_resumo_banco(), size=12, color=ft.colors.GREY_700)
 
         return ft.Container(
             content=ft.Column([
@@ -34,10 +80,119 @@ class ConfiguracoesTab:
                         icon=ft.icons.BACKUP,
                         on_click=self.exportar_banco_dados
                     ),
+                    ft.ElevatedButton(
+                        "Backup Diferencial",
+                        icon=ft.icons.DIFFERENCE,
+                        tooltip="Só o que mudou desde o último backup",
+                        on_click=lambda e: self.exportar_banco_dados(e, tipo="diferencial")
+                    ),
                     ft.ElevatedButton(
                         "Importar Banco de Dados", 
                         icon=ft.icons.RESTORE,
                         on_click=self.importar_banco_dados
+                    ),
+                    ft.ElevatedButton(
+                        "Verificar Backup",
+                        icon=ft.icons.VERIFIED,
+                        tooltip="Confere o arquivo e mostra o que seria importado, sem alterar o banco",
+                        on_click=self.verificar_banco_dados
+                    )
+                ]),
+                ft.Divider(),
+                ft.ListTile(
+                    title=ft.Text("Sincronização entre Aparelhos", weight=ft.FontWeight.BOLD),
+                    subtitle=ft.Text(
+                        "Exporte o pacote e importe-o no outro aparelho (e vice-versa): fica a versão mais "
+                        "nova de cada registro, com renomeações e remoções"
+                    ),
+                ),
+                ft.Row([
+                    ft.ElevatedButton(
+                        "Exportar Pacote de Sincronização",
+                        icon=ft.icons.SYNC,
+                        on_click=lambda e: self.exportar_banco_dados(e, tipo=TIPO_PACOTE)
+                    ),
+                    self.check_pacote_completo,
+                    ft.ElevatedButton(
+                        "Importar Pacote",
+                        icon=ft.icons.SYNC_ALT,
+                        on_click=self.importar_banco_dados
+                    )
+                ]),
+                ft.Divider(),
+                ft.ListTile(
+                    title=ft.Text("Snapshots do Banco", weight=ft.FontWeight.BOLD),
+                    subtitle=ft.Text(
+                        f"Cópia exata do banco (ids e esquema), feita com o app aberto; automática a cada "
+                        f"{INTERVALO_AUTOMATICO // 3600} h, guardada por {DIAS_RETENCAO} dias"
+                    ),
+                ),
+                ft.Row([
+                    ft.ElevatedButton(
+                        "Criar Snapshot",
+                        icon=ft.icons.CAMERA_ALT,
+                        on_click=self.criar_snapshot_manual
+                    ),
+                    ft.ElevatedButton(
+                        "Restaurar Snapshot",
+                        icon=ft.icons.HISTORY,
+                        on_click=self.abrir_dialog_snapshots
+                    )
+                ]),
+                ft.Divider(),
+                ft.ListTile(
+                    title=ft.Text("Manutenção do Banco", weight=ft.FontWeight.BOLD),
+                    subtitle=ft.Text(
+                        f"Estatísticas para o planejador de consultas e devolução do espaço livre; uma versão "
+                        f"leve roda depois de {OCIOSIDADE_MANUTENCAO // 60} min sem uso (no máximo a cada "
+                        f"{INTERVALO_MANUTENCAO // 60} min) e ao fechar o app"
+                    ),
+                ),
+                self.texto_manutencao,
+                ft.Row([
+                    ft.ElevatedButton(
+                        "Otimizar Banco",
+                        icon=ft.icons.SPEED,
+                        tooltip="ANALYZE, PRAGMA optimize e vacuum, com o tempo das consultas antes e depois",
+                        on_click=self.otimizar_banco
+                    ),
+                    ft.ElevatedButton(
+                        "Estatísticas do Banco",
+                        icon=ft.icons.QUERY_STATS,
+                        on_click=self.abrir_estatisticas_banco
+                    ),
+                    ft.ElevatedButton(
+                        "Remover Registros Órfãos",
+                        icon=ft.icons.CLEANING_SERVICES,
+                        tooltip="Repertórios e itens cujo show, música ou checklist já foi excluído",
+                        on_click=self.remover_orfaos
+                    )
+                ]),
+                ft.Divider(),
+                ft.ListTile(
+                    title=ft.Text("Diagnóstico de Consultas", weight=ft.FontWeight.BOLD),
+                    subtitle=ft.Text(
+                        f"Tempo de cada consulta feita pelo app desde que ele foi aberto (as que passam de "
+                        f"{LIMITE_LENTA_MS} ms ficam registradas com o plano de execução) e de cada ação da interface"
+                    ),
+                ),
+                ft.Row([
+                    ft.ElevatedButton(
+                        "Consultas do App",
+                        icon=ft.icons.TIMER,
+                        on_click=self.abrir_diagnostico_consultas
+                    ),
+                    ft.ElevatedButton(
+                        "Ações da Interface",
+                        icon=ft.icons.TOUCH_APP,
+                        tooltip="Tempo de cada ação da interface: banco, montagem dos controles e page.update",
+                        on_click=self.abrir_acoes_interface
+                    ),
+                    ft.ElevatedButton(
+                        "Exportar Diagnóstico",
+                        icon=ft.icons.DATA_OBJECT,
+                        tooltip="Grava as estatísticas e as consultas lentas em JSON",
+                        on_click=self.exportar_diagnostico
                     )
                 ]),
                 ft.Divider(),
@@ -81,9 +236,19 @@ class ConfiguracoesTab:
         self.card_total_musicas.content.content.controls[1].value = str(total_musicas)
         self.card_total_shows.content.content.controls[1].value = str(total_shows)
         self.card_total_checklists.content.content.controls[1].value = str(total_checklists)
+        self.texto_manutencao.value = self.obter_resumo_banco()
         
         self.page.update()
 
+    def obter_resumo_banco(self):
+        """Tamanho do arquivo e espaço livre, em uma linha"""
+        resumo = resumo_arquivo(self.conn)
+        modo = "incremental" if resumo["auto_vacuum"] == INCREMENTAL else "desligado (o primeiro Otimizar faz um VACUUM completo)"
+        return (
+            f"Arquivo: {resumo['bytes'] / 1048576:.1f} MB • páginas livres: {resumo['livres']} "
+            f"({resumo['bytes_livres'] / 1024:.0f} KB) • auto_vacuum {modo}"
+        )
+
     def obter_total_musicas(self):
         """Retorna o total de músicas no banco"""
         self.cursor.execute("SELECT COUNT(*) FROM musicas")
@@ -99,70 +264,22 @@ class ConfiguracoesTab:
         self.cursor.execute("SELECT COUNT(*) FROM checklist")
         return self.cursor.fetchone()[0]
 
-    def exportar_banco_dados(self, e):
-        """Exporta todos os dados do banco para um arquivo de texto"""
+    def exportar_banco_dados(self, e, tipo="completo"):
+        """Exporta os dados do banco para um arquivo de backup (NDJSON, compactado se .gz)
+
+        Com tipo="diferencial", grava só o que mudou desde o último backup; com
+        tipo=TIPO_PACOTE, o pacote de sincronização para outro aparelho.
+        """
         try:
-            dados_exportacao = {}
-            
-            # Músicas
-            self.cursor.execute("SELECT musica, autor, estilo, tom, cifra FROM musicas")
-            dados_exportacao['musicas'] = self.cursor.fetchall()
-            
-            # Shows
-            self.cursor.execute("SELECT data_show, local_show, artista FROM shows")
-            dados_exportacao['shows'] = self.cursor.fetchall()
-            
-            # Repertórios
-            self.cursor.execute('''
-                SELECT s.data_show, s.local_show, s.artista, m.musica, m.autor, rs.sequencia 
-                FROM repertorios_shows rs 
-                JOIN shows s ON rs.id_show = s.id 
-                JOIN musicas m ON rs.id_musica = m.id
-            ''')
-            dados_exportacao['repertorios'] = self.cursor.fetchall()
-            
-            # Checklists
-            self.cursor.execute("SELECT data, titulo FROM checklist")
-            dados_exportacao['checklists'] = self.cursor.fetchall()
-            
-            # Checklist Detalhes
-            self.cursor.execute('''
-                SELECT c.data, c.titulo, cd.descricao, cd.status 
-                FROM checklist_detail cd 
-                JOIN checklist c ON cd.id_checklist = c.id
-            ''')
-            dados_exportacao['checklist_detalhes'] = self.cursor.fetchall()
-            
-            # Criar nome do arquivo
-            data_atual = datetime.now().strftime("%d-%m-%Y")
-            nome_arquivo = f"backup-app-repertorio-{data_atual}.txt"
-            
-            # Converter para JSON string
-            dados_json = json.dumps(dados_exportacao, ensure_ascii=False, indent=2)
-            
             def salvar_arquivo(e: ft.FilePickerResultEvent):
                 if e.path:
-                    try:
-                        if hasattr(e, 'files') and e.files:
-                            caminho_completo = e.files[0].path
-                        else:
-                            if os.path.isdir(e.path):
-                                caminho_completo = os.path.join(e.path, nome_arquivo)
-                            else:
-                                caminho_completo = e.path
-                        
-                        with open(caminho_completo, 'w', encoding='utf-8') as f:
-                            f.write(dados_json)
-                        
-                        self.page.snack_bar = ft.SnackBar(
-                            ft.Text(f"Backup exportado com sucesso: {os.path.basename(caminho_completo)}")
-                        )
-                        self.page.snack_bar.open = True
-                        self.page.update()
-                    except Exception as ex:
-                        self.page.snack_bar = ft.SnackBar(ft.Text(f"Erro ao salvar arquivo: {str(ex)}"))
-                        self.page.snack_bar.open = True
-                        self.page.update()
+                    caminho_completo = e.path
+                    if os.path.isdir(caminho_completo):
+                        caminho_completo = os.path.join(caminho_completo, nome_arquivo_backup(tipo=tipo))
+                    if tipo == "diferencial":
+                        self._gravar_diferencial(caminho_completo)
+                    else:
+                        self._gravar_backup(caminho_completo, tipo)
                 else:
                     self.page.snack_bar = ft.SnackBar(ft.Text("Exportação cancelada"))
                     self.page.snack_bar.open = True
@@ -172,10 +289,11 @@ class ConfiguracoesTab:
             self.page.overlay.append(file_picker)
             self.page.update()
             
+            # O destino é escolhido antes: os dados vão direto do banco para o arquivo
             file_picker.save_file(
-                file_name=nome_arquivo,
+                file_name=nome_arquivo_backup(tipo=tipo),
                 file_type=ft.FilePickerFileType.CUSTOM,
-                allowed_extensions=["txt"]
+                allowed_extensions=["gz", "ndjson"]
             )
             
         except Exception as ex:
@@ -183,55 +301,68 @@ class ConfiguracoesTab:
             self.page.snack_bar.open = True
             self.page.update()
 
+    def _gravar_diferencial(self, caminho_completo):
+        """Grava o backup diferencial (pequeno: não precisa de progresso)"""
+        try:
+            inicio = time.perf_counter()
+            total = escrever_diferencial(caminho_banco(self.conn), caminho_completo)
+            milissegundos = (time.perf_counter() - inicio) * 1000
+            mensagem = (
+                f"Backup diferencial exportado: {os.path.basename(caminho_completo)} "
+                f"({total} alterações em {milissegundos:.0f} ms)"
+            )
+        except Exception as ex:
+            mensagem = f"Erro ao salvar backup diferencial: {str(ex)}"
+        self.page.snack_bar = ft.SnackBar(ft.Text(mensagem))
+        self.page.snack_bar.open = True
+        self.page.update()
+
+    def _gravar_backup(self, caminho_completo, tipo="completo"):
+        """Grava o backup (ou o pacote de sincronização) em segundo plano mostrando o progresso"""
+        sincronizacao = tipo == TIPO_PACOTE
+        texto_progresso = ft.Text("Preparando backup...")
+        barra_progresso = ft.ProgressBar(width=400, value=0)
+        
+        dialog_progresso = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Exportando Pacote de Sincronização" if sincronizacao else "Exportando Backup"),
+            content=ft.Column([texto_progresso, barra_progresso], tight=True)
+        )
+        self.page.dialog = dialog_progresso
+        dialog_progresso.open = True
+        self.page.update()
+        
+        def atualizar_progresso(gravadas, total):
+            texto_progresso.value = f"{gravadas} de {total} registros gravados..."
+            barra_progresso.value = gravadas / total if total else None
+            self.page.update()
+        
+        def gravar():
+            try:
+                if sincronizacao:
+                    total = escrever_pacote_sincronizacao(
+                        caminho_banco(self.conn), caminho_completo, ao_progresso=atualizar_progresso,
+                        completo=self.check_pacote_completo.value
+                    )
+                else:
+                    total = escrever_backup(caminho_banco(self.conn), caminho_completo, ao_progresso=atualizar_progresso)
+                descricao = "Pacote de sincronização" if sincronizacao else "Backup"
+                mensagem = f"{descricao} exportado com sucesso: {os.path.basename(caminho_completo)} ({total} registros)"
+            except Exception as ex:
+                mensagem = f"Erro ao salvar arquivo: {str(ex)}"
+            dialog_progresso.open = False
+            self.page.snack_bar = ft.SnackBar(ft.Text(mensagem))
+            self.page.snack_bar.open = True
+            self.page.update()
+        
+        threading.Thread(target=gravar, daemon=True).start()
+
     def importar_banco_dados(self, e):
-        """Importa dados de um arquivo de texto para o banco de dados"""
+        """Importa dados de um arquivo de backup para o banco de dados"""
         try:
             def carregar_arquivo(e: ft.FilePickerResultEvent):
                 if e.files and e.files[0].path:
-                    caminho_arquivo = e.files[0].path
-                    
-                    try:
-                        with open(caminho_arquivo, 'r', encoding='utf-8') as f:
-                            dados_importacao = json.loads(f.read())
-                        
-                        # Sincronizar músicas
-                        musicas_adicionadas = self._sincronizar_musicas(dados_importacao.get('musicas', []))
-                        shows_adicionados = self._sincronizar_shows(dados_importacao.get('shows', []))
-                        repertorios_adicionados = self._sincronizar_repertorios(dados_importacao.get('repertorios', []))
-                        checklists_adicionados = self._sincronizar_checklists(
-                            dados_importacao.get('checklists', []),
-                            dados_importacao.get('checklist_detalhes', [])
-                        )
-                        
-                        self.conn.commit()
-                        
-                        # Atualizar dados na aba de músicas
-                        if hasattr(self.app, 'tabs') and 'musicas' in self.app.tabs:
-                            self.app.tabs['musicas'].musicas_data = self.app.tabs['musicas'].carregar_musicas()
-                            self.app.tabs['musicas'].atualizar_tabela()
-                        
-                        # Atualizar dados na aba de shows
-                        if hasattr(self.app, 'tabs') and 'shows' in self.app.tabs:
-                            self.app.tabs['shows'].shows_data = self.app.tabs['shows'].carregar_shows()
-                            self.app.tabs['shows'].atualizar_tabela()
-                        
-                        # Atualizar dados na aba de checklists
-                        if hasattr(self.app, 'tabs') and 'checklists' in self.app.tabs:
-                            self.app.tabs['checklists'].checklists_data = self.app.tabs['checklists'].carregar_checklists()
-                            self.app.tabs['checklists'].atualizar_tabela()
-                        
-                        self.atualizar_cards()
-                        
-                        self.page.snack_bar = ft.SnackBar(
-                            ft.Text(f"Backup importado com sucesso! Músicas: {musicas_adicionadas}, Shows: {shows_adicionados}, Repertórios: {repertorios_adicionados}, Checklists: {checklists_adicionados}")
-                        )
-                        self.page.snack_bar.open = True
-                        self.page.update()
-                        
-                    except Exception as ex:
-                        self.page.snack_bar = ft.SnackBar(ft.Text(f"Erro ao importar backup: {str(ex)}"))
-                        self.page.snack_bar.open = True
-                        self.page.update()
+                    self._importar_backup(e.files[0].path)
                 else:
                     self.page.snack_bar = ft.SnackBar(ft.Text("Importação cancelada"))
                     self.page.snack_bar.open = True
@@ -242,7 +373,7 @@ class ConfiguracoesTab:
             self.page.update()
             
             file_picker.pick_files(
-                allowed_extensions=['txt'],
+                allowed_extensions=['gz', 'ndjson', 'txt', 'json'],
                 dialog_title="Selecione o arquivo de backup"
             )
             
@@ -251,133 +382,701 @@ class ConfiguracoesTab:
             self.page.snack_bar.open = True
             self.page.update()
 
-    def _sincronizar_musicas(self, musicas_importadas):
-        """Sincroniza músicas importadas com o banco existente"""
-        musicas_adicionadas = 0
-        
-        for musica in musicas_importadas:
-            self.cursor.execute(
-                "SELECT id FROM musicas WHERE musica = ? AND (autor = ? OR (autor IS NULL AND ? IS NULL))",
-                (musica[0], musica[1], musica[1])
+    def verificar_banco_dados(self, e):
+        """Escolhe um arquivo de backup para conferir sem importar"""
+        def carregar_arquivo(e: ft.FilePickerResultEvent):
+            if e.files and e.files[0].path:
+                self._verificar_backup(e.files[0].path)
+
+        file_picker = ft.FilePicker(on_result=carregar_arquivo)
+        self.page.overlay.append(file_picker)
+        self.page.update()
+        file_picker.pick_files(
+            allowed_extensions=['gz', 'ndjson', 'txt', 'json'],
+            dialog_title="Selecione o arquivo de backup para verificar"
+        )
+
+    def _verificar_backup(self, caminho_arquivo):
+        """Lê o backup inteiro em segundo plano (o banco só é consultado) e mostra o relatório"""
+        texto_progresso = ft.Text("Lendo backup...")
+        dialog_progresso = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Verificando Backup"),
+            content=ft.Column([texto_progresso, ft.ProgressBar(width=400)], tight=True)
+        )
+        self.page.dialog = dialog_progresso
+        dialog_progresso.open = True
+        self.page.update()
+
+        def atualizar_progresso(secao, linhas):
+            texto_progresso.value = f"Lendo {NOMES_SECOES.get(secao, secao)}: {linhas} registros"
+            self.page.update()
+
+        def verificar():
+            try:
+                # Somente leitura: a verificação não pode alterar nada no banco
+                conn = conectar_instrumentado(f"file:{caminho_banco(self.conn)}?mode=ro", self.db.consultas, uri=True, timeout=30)
+                try:
+                    relatorio = verificar_backup(caminho_arquivo, conn, ao_progresso=atualizar_progresso)
+                finally:
+                    conn.close()
+            except Exception as ex:
+                dialog_progresso.open = False
+                self.page.snack_bar = ft.SnackBar(ft.Text(f"Erro ao verificar backup: {str(ex)}"))
+                self.page.snack_bar.open = True
+                self.page.update()
+                return
+            dialog_progresso.open = False
+            self.mostrar_verificacao(os.path.basename(caminho_arquivo), relatorio)
+
+        threading.Thread(target=verificar, daemon=True).start()
+
+    def mostrar_verificacao(self, nome_arquivo, relatorio):
+        """Relatório da verificação: registros por seção, o que entraria e os problemas achados"""
+        def fechar(e):
+            dialog.open = False
+            self.page.update()
+
+        linhas = [
+            ft.Text(
+                f"{nome_arquivo} • {relatorio['tipo'] or 'desconhecido'} • "
+                f"{sum(relatorio['lidas'].values())} registros em {relatorio['segundos']:.1f}s",
+                size=12
             )
-            musica_existente = self.cursor.fetchone()
-            
-            if not musica_existente:
-                self.cursor.execute(
-                    "INSERT INTO musicas (musica, autor, estilo, tom, cifra) VALUES (?, ?, ?, ?, ?)",
-                    (musica[0], musica[1], musica[2], musica[3], musica[4])
-                )
-                musicas_adicionadas += 1
-        
-        return musicas_adicionadas
+        ]
+        for secao, lidas in relatorio["lidas"].items():
+            nome = NOMES_SECOES.get(secao, str(secao)).capitalize()
+            novas = f" • {relatorio['novas'][secao]} seriam adicionados" if relatorio["novas"] else ""
+            linhas.append(ft.Text(f"{nome}: {lidas}{novas}"))
+        if relatorio["problemas"]:
+            linhas.append(ft.Text(f"{relatorio['total_problemas']} problema(s):", weight=ft.FontWeight.BOLD))
+            linhas.append(ft.ListView(
+                [ft.Text(problema, size=12, color=ft.colors.RED_700) for problema in relatorio["problemas"]],
+                height=200
+            ))
+
+        dialog = ft.AlertDialog(
+            title=ft.Row([
+                ft.Icon(ft.icons.CHECK_CIRCLE if relatorio["valido"] else ft.icons.ERROR,
+                        color=ft.colors.GREEN if relatorio["valido"] else ft.colors.RED),
+                ft.Text("Backup íntegro" if relatorio["valido"] else "Backup com problemas")
+            ]),
+            content=ft.Column(linhas, tight=True, width=500),
+            actions=[ft.TextButton("Fechar", on_click=fechar)]
+        )
+        self.page.dialog = dialog
+        dialog.open = True
+        self.page.update()
 
-    def _sincronizar_shows(self, shows_importados):
-        """Sincroniza shows importados com o banco existente"""
-        shows_adicionados = 0
+    def _importar_backup(self, caminho_arquivo):
+        """Importa o backup em segundo plano, com progresso por seção e opção de cancelar"""
+        # Os totais por seção vêm do cabeçalho do NDJSON; o JSON antigo não tem (barra sem fim)
+        try:
+            cabecalho = ler_cabecalho(caminho_arquivo)
+        except (OSError, EOFError):
+            # Arquivo ilegível: a importação em segundo plano mostra o erro
+            cabecalho = None
+        totais = cabecalho.get("totais", {}) if cabecalho else {}
+        tipo = cabecalho.get("tipo") if cabecalho else None
+        cancelar = threading.Event()
         
-        for show in shows_importados:
-            self.cursor.execute(
-                "SELECT id FROM shows WHERE data_show = ? AND local_show = ? AND artista = ?",
-                (show[0], show[1], show[2])
-            )
-            show_existente = self.cursor.fetchone()
-            
-            if not show_existente:
-                self.cursor.execute(
-                    "INSERT INTO shows (data_show, local_show, artista) VALUES (?, ?, ?)",
-                    (show[0], show[1], show[2])
-                )
-                shows_adicionados += 1
+        texto_secao = ft.Text("Lendo backup...", weight=ft.FontWeight.BOLD)
+        barra_secao = ft.ProgressBar(width=400, value=None)
+        texto_progresso = ft.Text("", size=12, color=ft.colors.GREY_700)
         
-        return shows_adicionados
-
-    def _sincronizar_repertorios(self, repertorios_importados):
-        """Sincroniza repertórios importados com o banco existente"""
-        repertorios_adicionados = 0
+        def cancelar_importacao(e):
+            cancelar.set()
+            botao_cancelar.disabled = True
+            botao_cancelar.text = "Cancelando..."
+            self.page.update()
         
-        for repertorio in repertorios_importados:
-            data_show, local_show, artista, musica, autor, sequencia = repertorio
-            
-            self.cursor.execute(
-                "SELECT id FROM shows WHERE data_show = ? AND local_show = ? AND artista = ?",
-                (data_show, local_show, artista)
-            )
-            show_result = self.cursor.fetchone()
-            
-            self.cursor.execute(
-                "SELECT id FROM musicas WHERE musica = ? AND (autor = ? OR (autor IS NULL AND ? IS NULL))",
-                (musica, autor, autor)
-            )
-            musica_result = self.cursor.fetchone()
+        botao_cancelar = ft.TextButton("Cancelar", on_click=cancelar_importacao)
+        dialog_progresso = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Importando Backup"),
+            content=ft.Column([texto_secao, barra_secao, texto_progresso], tight=True),
+            actions=[botao_cancelar]
+        )
+        self.page.dialog = dialog_progresso
+        dialog_progresso.open = True
+        self.page.update()
+        
+        def atualizar_progresso(etapa, secao, linhas):
+            if etapa == "leitura":
+                total = totais.get(secao)
+                texto_secao.value = f"Lendo {NOMES_SECOES[secao]}"
+                barra_secao.value = min(linhas / total, 1) if total else None
+                texto_progresso.value = f"{linhas} de {total} registros" if total else f"{linhas} registros"
+            elif etapa == "diferencial":
+                total = cabecalho.get("alteracoes")
+                texto_secao.value = "Aplicando alterações"
+                barra_secao.value = min(linhas / total, 1) if total else None
+                texto_progresso.value = f"{linhas} de {total} alterações"
+            elif etapa == "mesclagem":
+                texto_secao.value = f"Gravando {NOMES_SECOES[secao]}"
+                barra_secao.value = None
+                texto_progresso.value = f"{linhas} registros lidos"
+            else:
+                texto_secao.value = "Atualizando o índice de acordes"
+                barra_secao.value = None
+                texto_progresso.value = ""
+            self.page.update()
+        
+        def importar():
+            # Conexão própria: a transação da importação não se mistura com a da interface
+            conn = conectar_instrumentado(caminho_banco(self.conn), self.db.consultas, timeout=30)
+            ligar_chaves_estrangeiras(conn)
+            conflitos = []
+            try:
+                if tipo == "diferencial":
+                    mensagem = self._aplicar_diferencial(conn, caminho_arquivo, atualizar_progresso, cancelar)
+                elif tipo == TIPO_PACOTE:
+                    mensagem, conflitos = self._sincronizar(conn, caminho_arquivo, cabecalho, atualizar_progresso, cancelar)
+                else:
+                    mensagem = self._importar_completo(conn, caminho_arquivo, atualizar_progresso, cancelar)
+            except ImportacaoCancelada:
+                mensagem = "Importação cancelada: nenhum dado foi alterado"
+            except Exception as ex:
+                mensagem = f"Erro ao importar backup (nenhum dado foi alterado): {str(ex)}"
+            finally:
+                conn.close()
             
-            if show_result and musica_result:
-                id_show = show_result[0]
-                id_musica = musica_result[0]
-                
-                self.cursor.execute(
-                    "SELECT id FROM repertorios_shows WHERE id_show = ? AND id_musica = ?",
-                    (id_show, id_musica)
-                )
-                repertorio_existente = self.cursor.fetchone()
-                
-                if not repertorio_existente:
-                    self.cursor.execute(
-                        "INSERT INTO repertorios_shows (id_show, id_musica, sequencia) VALUES (?, ?, ?)",
-                        (id_show, id_musica, sequencia)
+            dialog_progresso.open = False
+            self._atualizar_abas()
+            if conflitos:
+                self.mostrar_conflitos(mensagem, conflitos)
+            else:
+                self.page.snack_bar = ft.SnackBar(ft.Text(mensagem))
+                self.page.snack_bar.open = True
+                self.page.update()
+        
+        threading.Thread(target=importar, daemon=True).start()
+
+    def _importar_completo(self, conn, caminho_arquivo, ao_progresso, cancelar):
+        """Mescla um backup completo no banco; retorna a mensagem de resumo"""
+        lidas, adicionadas, tempos = importar_backup(
+            conn, iterar_backup(caminho_arquivo), ao_progresso=ao_progresso, cancelar=cancelar
+        )
+        total_lidas = sum(lidas.values())
+        linhas_por_segundo = total_lidas / tempos["total"] if tempos["total"] else total_lidas
+        return (
+            f"Backup importado com sucesso! Músicas: {adicionadas['musicas']}, "
+            f"Shows: {adicionadas['shows']}, Repertórios: {adicionadas['repertorios']}, "
+            f"Checklists: {adicionadas['checklists']} "
+            f"({total_lidas} linhas em {tempos['total']:.1f}s, {linhas_por_segundo:.0f} linhas/s; "
+            f"leitura {tempos['leitura']:.1f}s, gravação {sum(tempos['mesclagem'].values()):.1f}s, "
+            f"índice {tempos['indice']:.1f}s)"
+        )
+
+    def _aplicar_diferencial(self, conn, caminho_arquivo, ao_progresso, cancelar):
+        """Reaplica um backup diferencial no banco; retorna a mensagem de resumo"""
+        aplicadas, sem_efeito, segundos = importar_diferencial(
+            conn, iterar_diferencial(caminho_arquivo), ao_progresso=ao_progresso, cancelar=cancelar
+        )
+        return (
+            f"Backup diferencial aplicado! Incluídos: {aplicadas['inserir']}, "
+            f"alterados: {aplicadas['alterar']}, removidos: {aplicadas['remover']}, "
+            f"sem efeito: {sem_efeito} ({segundos * 1000:.0f} ms)"
+        )
+
+    def _sincronizar(self, conn, caminho_arquivo, cabecalho, ao_progresso, cancelar):
+        """Mescla o pacote de sincronização de outro aparelho; retorna (mensagem, conflitos)"""
+        resumo, conflitos, segundos = sincronizar(
+            conn, iterar_backup(caminho_arquivo), cabecalho, ao_progresso=ao_progresso, cancelar=cancelar
+        )
+        incluidas = sum(secao["incluidas"] for secao in resumo.values())
+        atualizadas = sum(secao["atualizadas"] for secao in resumo.values())
+        removidas = sum(secao["removidas"] for secao in resumo.values())
+        mensagem = (
+            f"Sincronização concluída! Incluídos: {incluidas}, atualizados: {atualizadas}, "
+            f"removidos: {removidas}, conflitos: {len(conflitos)} ({segundos * 1000:.0f} ms)"
+        )
+        return mensagem, conflitos
+
+    def mostrar_conflitos(self, mensagem, conflitos):
+        """Lista os registros alterados nos dois aparelhos e qual versão ficou"""
+        def fechar(e):
+            dialog.open = False
+            self.page.update()
+
+        dialog = ft.AlertDialog(
+            title=ft.Text("Conflitos da Sincronização"),
+            content=ft.Column([
+                ft.Text(mensagem, size=12),
+                ft.ListView([
+                    ft.ListTile(
+                        leading=ft.Icon(ft.icons.CALL_RECEIVED if vencedor == "remoto" else ft.icons.PHONE_ANDROID),
+                        title=ft.Text(descricao),
+                        subtitle=ft.Text(
+                            f"{NOMES_SECOES[secao].capitalize()} • aqui: {local[:19].replace('T', ' ')} • "
+                            f"outro aparelho: {remoto[:19].replace('T', ' ')} • ficou a versão "
+                            f"{'do outro aparelho' if vencedor == 'remoto' else 'daqui'}"
+                        ),
                     )
-                    repertorios_adicionados += 1
+                    for secao, descricao, local, remoto, vencedor in conflitos
+                ], height=300)
+            ], tight=True, width=500),
+            actions=[ft.TextButton("Fechar", on_click=fechar)]
+        )
+        self.page.dialog = dialog
+        dialog.open = True
+        self.page.update()
+
+    def _atualizar_abas(self):
+        """Recarrega as abas depois de uma importação"""
+        # Atualizar dados na aba de músicas
+        if hasattr(self.app, 'tabs') and 'musicas' in self.app.tabs:
+            self.app.tabs['musicas'].musicas_data = self.app.tabs['musicas'].carregar_musicas()
+            self.app.tabs['musicas'].atualizar_tabela()
         
-        return repertorios_adicionados
-    
-    def _sincronizar_checklists(self, checklists_importados, detalhes_importados):
-        """Sincroniza checklists importados com o banco existente"""
-        checklists_adicionados = 0
+        # Atualizar dados na aba de shows
+        if hasattr(self.app, 'tabs') and 'shows' in self.app.tabs:
+            self.app.tabs['shows'].shows_data = self.app.tabs['shows'].carregar_shows()
+            self.app.tabs['shows'].atualizar_tabela()
         
-        # Primeiro, importar checklists
-        for checklist in checklists_importados:
-            data, titulo = checklist
-            
-            # Verificar se o checklist já existe
-            self.cursor.execute(
-                "SELECT id FROM checklist WHERE data = ? AND titulo = ?",
-                (data, titulo)
-            )
-            checklist_existente = self.cursor.fetchone()
-            
-            if not checklist_existente:
-                # Inserir novo checklist
-                self.cursor.execute(
-                    "INSERT INTO checklist (data, titulo) VALUES (?, ?)",
-                    (data, titulo)
+        # Atualizar dados na aba de checklists
+        if hasattr(self.app, 'tabs') and 'checklists' in self.app.tabs:
+            self.app.tabs['checklists'].checklists_data = self.app.tabs['checklists'].carregar_checklists()
+            self.app.tabs['checklists'].atualizar_tabela()
+        
+        self.atualizar_cards()
+
+    def remover_orfaos(self, e):
+        """Apaga os registros órfãos e informa quantos registros e páginas foram liberados"""
+        try:
+            resultado = varrer_orfaos(self.conn)
+            removidos = sum(resultado["linhas"].values())
+            if removidos:
+                partes = ", ".join(
+                    f"{quantidade} {NOMES_TABELAS_ORFAOS[tabela]}" for tabela, quantidade in resultado["linhas"].items() if quantidade
                 )
-                checklists_adicionados += 1
+                mensagem = (
+                    f"{removidos} registros órfãos removidos ({partes}); "
+                    f"{resultado['paginas']} páginas liberadas ({resultado['bytes'] / 1024:.0f} KB)"
+                )
+            else:
+                mensagem = "Nenhum registro órfão encontrado"
+        except Exception as ex:
+            mensagem = f"Erro ao remover registros órfãos: {str(ex)}"
+        self.page.snack_bar = ft.SnackBar(ft.Text(mensagem))
+        self.page.snack_bar.open = True
+        self.page.update()
+
+    def otimizar_banco(self, e):
+        """Roda a manutenção completa em segundo plano e mostra o antes e depois"""
+        texto_progresso = ft.Text("Medindo as consultas...")
+        dialog_progresso = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Otimizando o Banco"),
+            content=ft.Column([texto_progresso, ft.ProgressBar(width=400)], tight=True)
+        )
+        self.page.dialog = dialog_progresso
+        dialog_progresso.open = True
+        self.page.update()
+
+        def atualizar_progresso(etapa):
+            texto_progresso.value = f"Executando {etapa}..."
+            self.page.update()
+
+        def otimizar():
+            # Conexão própria, como na importação: o VACUUM pode levar alguns segundos
+            conn = conectar_instrumentado(caminho_banco(self.conn), self.db.consultas, timeout=30)
+            try:
+                resultado = executar_manutencao(conn, ao_progresso=atualizar_progresso)
+            except Exception as ex:
+                dialog_progresso.open = False
+                self.page.snack_bar = ft.SnackBar(ft.Text(f"Erro ao otimizar o banco: {str(ex)}"))
+                self.page.snack_bar.open = True
+                self.page.update()
+                return
+            finally:
+                conn.close()
+            dialog_progresso.open = False
+            self.texto_manutencao.value = self.obter_resumo_banco()
+            self.mostrar_manutencao(resultado)
+
+        threading.Thread(target=otimizar, daemon=True).start()
+
+    def mostrar_manutencao(self, resultado):
+        """Tempo de cada etapa, tamanho do arquivo e tempo das consultas antes e depois"""
+        def fechar(e):
+            dialog.open = False
+            self.page.update()
+
+        antes, depois = resultado["antes"], resultado["depois"]
+        linhas = [
+            ft.Text(
+                f"Arquivo: {antes['bytes'] / 1048576:.1f} MB → {depois['bytes'] / 1048576:.1f} MB "
+                f"({resultado['paginas_devolvidas']} páginas devolvidas) • páginas livres: "
+                f"{antes['livres']} → {depois['livres']}"
+            ),
+            ft.Text("Etapas", weight=ft.FontWeight.BOLD),
+        ]
+        linhas += [ft.Text(f"{etapa}: {segundos * 1000:.0f} ms", size=12) for etapa, segundos in resultado["etapas"].items()]
+        linhas.append(ft.Text("Consultas (antes → depois)", weight=ft.FontWeight.BOLD))
+        linhas += [
+            ft.Text(f"{nome}: {ms:.1f} ms → {depois['consultas'][nome]:.1f} ms", size=12)
+            for nome, ms in antes["consultas"].items()
+        ]
+
+        dialog = ft.AlertDialog(
+            title=ft.Text("Banco Otimizado"),
+            content=ft.Column(linhas, tight=True, width=500),
+            actions=[ft.TextButton("Fechar", on_click=fechar)]
+        )
+        self.page.dialog = dialog
+        dialog.open = True
+        self.page.update()
+
+    def abrir_estatisticas_banco(self, e):
+        """Registros e páginas por tabela, e tamanho e seletividade de cada índice"""
+        def fechar(e):
+            dialog.open = False
+            self.page.update()
+
+        estatisticas = estatisticas_banco(self.conn)
+
+        def paginas(quantidade):
+            return "—" if quantidade is None else str(quantidade)
+
+        tabela_tabelas = ft.DataTable(
+            columns=[ft.DataColumn(ft.Text("Tabela")), ft.DataColumn(ft.Text("Registros"), numeric=True),
+                     ft.DataColumn(ft.Text("Páginas"), numeric=True)],
+            rows=[
+                ft.DataRow(cells=[ft.DataCell(ft.Text(nome)), ft.DataCell(ft.Text(str(registros))),
+                                  ft.DataCell(ft.Text(paginas(quantidade)))])
+                for nome, registros, quantidade in estatisticas["tabelas"]
+            ]
+        )
+        tabela_indices = ft.DataTable(
+            columns=[ft.DataColumn(ft.Text("Índice")), ft.DataColumn(ft.Text("Tabela")),
+                     ft.DataColumn(ft.Text("Páginas"), numeric=True),
+                     ft.DataColumn(ft.Text("Registros por chave"), numeric=True)],
+            rows=[
+                ft.DataRow(cells=[ft.DataCell(ft.Text(nome)), ft.DataCell(ft.Text(tabela)),
+                                  ft.DataCell(ft.Text(paginas(quantidade))),
+                                  ft.DataCell(ft.Text("não analisado" if por_chave is None else str(por_chave)))])
+                for nome, tabela, quantidade, por_chave in estatisticas["indices"]
+            ]
+        )
+
+        dialog = ft.AlertDialog(
+            title=ft.Text("Estatísticas do Banco"),
+            content=ft.Container(
+                ft.ListView([
+                    ft.Text(self.obter_resumo_banco(), size=12),
+                    tabela_tabelas,
+                    ft.Text("Índices (registros por chave vêm do último ANALYZE: quanto menor, mais seletivo)", size=12),
+                    tabela_indices,
+                ]),
+                width=650, height=450
+            ),
+            actions=[ft.TextButton("Fechar", on_click=fechar)]
+        )
+        self.page.dialog = dialog
+        dialog.open = True
+        self.page.update()
+
+    def abrir_diagnostico_consultas(self, e):
+        """Consultas ordenadas pelo tempo total (contagem, média, p95, máximo) e as lentas com o plano"""
+        resumo = self.db.consultas.resumo()
+
+        def fechar(e):
+            dialog.open = False
+            self.page.update()
+
+        def zerar(e):
+            self.db.consultas.zerar()
+            dialog.open = False
+            self.page.snack_bar = ft.SnackBar(ft.Text("Estatísticas das consultas zeradas"))
+            self.page.snack_bar.open = True
+            self.page.update()
+
+        def sql_curto(sql):
+            return sql if len(sql) <= 90 else f"{sql[:87]}..."
+
+        tabela_consultas = ft.DataTable(
+            columns=[ft.DataColumn(ft.Text("Consulta")), ft.DataColumn(ft.Text("Vezes"), numeric=True),
+                     ft.DataColumn(ft.Text("Total (ms)"), numeric=True), ft.DataColumn(ft.Text("p95 (ms)"), numeric=True),
+                     ft.DataColumn(ft.Text("Máx. (ms)"), numeric=True)],
+            rows=[
+                ft.DataRow(cells=[
+                    ft.DataCell(ft.Text(sql_curto(consulta["sql"]), size=12, tooltip=consulta["sql"])),
+                    ft.DataCell(ft.Text(str(consulta["execucoes"]))),
+                    ft.DataCell(ft.Text(f"{consulta['total_ms']:.1f}")),
+                    ft.DataCell(ft.Text(f"{consulta['p95_ms']:.2f}")),
+                    ft.DataCell(ft.Text(f"{consulta['maximo_ms']:.1f}")),
+                ])
+                for consulta in resumo["consultas"][:100]
+            ],
+            column_spacing=20
+        )
+        lentas = [
+            ft.Column([
+                ft.Text(f"{lenta['quando'][11:]} • {lenta['ms']:.0f} ms • {sql_curto(lenta['sql'])}", size=12,
+                        weight=ft.FontWeight.BOLD),
+                ft.Text("\n".join(lenta["plano"]) if lenta["plano"] else "sem plano", size=11,
+                        color=ft.colors.GREY_700, font_family="monospace"),
+            ], spacing=2)
+            for lenta in resumo["lentas"][:50]
+        ] or [ft.Text(f"Nenhuma consulta acima de {resumo['limite_lenta_ms']:.0f} ms", size=12)]
+
+        dialog = ft.AlertDialog(
+            title=ft.Text("Consultas do App"),
+            content=ft.Container(
+                ft.ListView([
+                    ft.Text(f"Desde {resumo['desde'].replace('T', ' ')} • {len(resumo['consultas'])} consultas diferentes", size=12),
+                    tabela_consultas,
+                    ft.Text("Consultas lentas (mais recentes primeiro)", weight=ft.FontWeight.BOLD),
+                    *lentas,
+                ], spacing=8),
+                width=800, height=500
+            ),
+            actions=[ft.TextButton("Zerar", on_click=zerar), ft.TextButton("Fechar", on_click=fechar)]
+        )
+        self.page.dialog = dialog
+        dialog.open = True
+        self.page.update()
+
+    def abrir_acoes_interface(self, e):
+        """Resumo dos rastros: por ação, vezes, total (média e p95) e onde o tempo foi gasto"""
+        def fechar(e):
+            dialog.open = False
+            self.page.update()
+
+        rastreador = getattr(self.app, 'rastreador', None)
+        try:
+            acoes = rastreador.resumir() if rastreador else []
+        except Exception as ex:
+            self.page.snack_bar = ft.SnackBar(ft.Text(f"Erro ao ler os rastros: {str(ex)}"))
+            self.page.snack_bar.open = True
+            self.page.update()
+            return
+
+        def acao_curta(nome):
+            return nome if len(nome) <= 70 else f"...{nome[-67:]}"
+
+        def detalhe(acao):
+            trechos = "".join(f"\n{parte}: {ms:.1f} ms" for parte, ms in acao["trechos"].items())
+            return acao["acao"] + trechos
+
+        colunas = ("Vezes", "Média (ms)", "p95 (ms)", "Banco (ms)", "Controles (ms)", "Update (ms)", "Updates")
+        tabela_acoes = ft.DataTable(
+            columns=[ft.DataColumn(ft.Text("Ação"))] + [ft.DataColumn(ft.Text(coluna), numeric=True) for coluna in colunas],
+            rows=[
+                ft.DataRow(cells=[
+                    ft.DataCell(ft.Text(acao_curta(acao["acao"]), size=12, tooltip=detalhe(acao))),
+                    ft.DataCell(ft.Text(str(acao["vezes"]))),
+                    ft.DataCell(ft.Text(f"{acao['total_ms']:.1f}")),
+                    ft.DataCell(ft.Text(f"{acao['p95_ms']:.1f}")),
+                    ft.DataCell(ft.Text(f"{acao['banco_ms']:.1f}")),
+                    ft.DataCell(ft.Text(f"{acao['controles_ms']:.1f}")),
+                    ft.DataCell(ft.Text(f"{acao['update_ms']:.1f}")),
+                    ft.DataCell(ft.Text(f"{acao['updates']:.1f}")),
+                ])
+                for acao in acoes[:100]
+            ],
+            column_spacing=16
+        )
+        descricao = (
+            f"{len(acoes)} ações diferentes em {os.path.abspath(rastreador.caminho)} (e nos arquivos girados); "
+            "médias por execução, das mais lentas (p95) para as mais rápidas"
+            if acoes else "Nenhuma ação registrada ainda"
+        )
+
+        dialog = ft.AlertDialog(
+            title=ft.Text("Ações da Interface"),
+            content=ft.Container(
+                ft.ListView([ft.Text(descricao, size=12), tabela_acoes], spacing=8),
+                width=950, height=500
+            ),
+            actions=[ft.TextButton("Fechar", on_click=fechar)]
+        )
+        self.page.dialog = dialog
+        dialog.open = True
+        self.page.update()
+
+    def exportar_diagnostico(self, e):
+        """Grava o resumo das consultas, as lentas e o estado do arquivo do banco em JSON"""
+        def salvar_arquivo(e: ft.FilePickerResultEvent):
+            if not e.path:
+                return
+            caminho = e.path
+            if os.path.isdir(caminho):
+                caminho = os.path.join(caminho, nome_diagnostico)
+            try:
+                rastreador = getattr(self.app, 'rastreador', None)
+                extras = {"banco": resumo_arquivo(self.conn), "acoes": rastreador.resumir() if rastreador else []}
+                salvar_diagnostico(self.db.consultas, caminho, extras)
+                mensagem = f"Diagnóstico salvo em {os.path.basename(caminho)}"
+            except Exception as ex:
+                mensagem = f"Erro ao salvar o diagnóstico: {str(ex)}"
+            self.page.snack_bar = ft.SnackBar(ft.Text(mensagem))
+            self.page.snack_bar.open = True
+            self.page.update()
+
+        nome_diagnostico = f"diagnostico_consultas_{datetime.now().strftime('%d-%m-%Y_%H-%M')}.json"
+        file_picker = ft.FilePicker(on_result=salvar_arquivo)
+        self.page.overlay.append(file_picker)
+        self.page.update()
+        file_picker.save_file(
+            file_name=nome_diagnostico,
+            file_type=ft.FilePickerFileType.CUSTOM,
+            allowed_extensions=["json"]
+        )
+
+    def agendar_manutencao_automatica(self):
+        """Agenda a próxima verificação de ociosidade para a manutenção leve"""
+        self._timer_manutencao = threading.Timer(VERIFICACAO_OCIOSIDADE, self._manutencao_automatica)
+        self._timer_manutencao.daemon = True
+        self._timer_manutencao.start()
+
+    def _app_ocioso(self):
+        """Se ninguém mexe na interface há OCIOSIDADE_MANUTENCAO (pelos rastros das ações)"""
+        rastreador = getattr(self.app, 'rastreador', None)
+        if rastreador is None:
+            return True
+        return rastreador.segundos_ocioso() >= OCIOSIDADE_MANUTENCAO
+
+    def _manutencao_automatica(self):
+        """Executado pelo timer: manutenção leve só com o app ocioso e sem gravação da interface pela metade"""
+        if (time.monotonic() - self._ultima_manutencao >= INTERVALO_MANUTENCAO
+                and self._app_ocioso() and not self.conn.in_transaction):
+            self._ultima_manutencao = time.monotonic()
+            try:
+                conn = conectar_instrumentado(caminho_banco(self.conn), self.db.consultas, timeout=30)
+                try:
+                    manutencao_leve(conn)
+                finally:
+                    conn.close()
+            except Exception as ex:
+                self.page.snack_bar = ft.SnackBar(ft.Text(f"Erro na manutenção automática: {str(ex)}"))
+                self.page.snack_bar.open = True
+                self.page.update()
+        self.agendar_manutencao_automatica()
+
+    def parar_timers(self):
+        """Cancela o snapshot e a manutenção automáticos (ao fechar o app ou recriar as abas)"""
+        for timer in (self._timer_snapshot, self._timer_manutencao):
+            if timer:
+                timer.cancel()
+
+    def agendar_snapshot_automatico(self):
+        """Agenda o próximo snapshot automático, contando do último que já existe"""
+        self._timer_snapshot = threading.Timer(segundos_para_proximo_automatico(), self._snapshot_automatico)
+        self._timer_snapshot.daemon = True
+        self._timer_snapshot.start()
+
+    def _snapshot_automatico(self):
+        """Executado pelo timer: snapshot (se o banco mudou), retenção e novo agendamento"""
+        try:
+            snapshot_automatico(self.db.caminho)
+        except Exception as ex:
+            self.page.snack_bar = ft.SnackBar(ft.Text(f"Erro no snapshot automático: {str(ex)}"))
+            self.page.snack_bar.open = True
+            self.page.update()
+        self.agendar_snapshot_automatico()
+
+    def criar_snapshot_manual(self, e):
+        """Cria um snapshot do banco agora"""
+        try:
+            caminho = criar_snapshot(self.db.caminho)
+            mensagem = f"Snapshot criado: {os.path.basename(caminho)}"
+        except Exception as ex:
+            mensagem = f"Erro ao criar snapshot: {str(ex)}"
+        self.page.snack_bar = ft.SnackBar(ft.Text(mensagem))
+        self.page.snack_bar.open = True
+        self.page.update()
+
+    def abrir_dialog_snapshots(self, e):
+        """Lista os snapshots para restaurar um deles"""
+        snapshots = listar_snapshots()
         
-        # Depois, importar detalhes
-        for detalhe in detalhes_importados:
-            data_checklist, titulo_checklist, descricao, status = detalhe
-            
-            # Buscar ID do checklist
-            self.cursor.execute(
-                "SELECT id FROM checklist WHERE data = ? AND titulo = ?",
-                (data_checklist, titulo_checklist)
-            )
-            checklist_result = self.cursor.fetchone()
-            
-            if checklist_result:
-                id_checklist = checklist_result[0]
-                
-                # Verificar se o detalhe já existe
-                self.cursor.execute(
-                    "SELECT id FROM checklist_detail WHERE id_checklist = ? AND descricao = ?",
-                    (id_checklist, descricao)
+        def fechar(e):
+            dialog.open = False
+            self.page.update()
+        
+        def escolher(caminho, data):
+            def ao_clicar(e):
+                dialog.open = False
+                self.confirmar_restauracao(caminho, data)
+            return ao_clicar
+        
+        if snapshots:
+            itens = [
+                ft.ListTile(
+                    leading=ft.Icon(ft.icons.STORAGE),
+                    title=ft.Text(data.strftime("%d/%m/%Y %H:%M:%S")),
+                    subtitle=ft.Text(f"{TIPOS_SNAPSHOT[tipo]} • {tamanho / 1024:.0f} KB"),
+                    trailing=ft.TextButton("Restaurar", on_click=escolher(caminho, data))
                 )
-                detalhe_existente = self.cursor.fetchone()
-                
-                if not detalhe_existente:
-                    # Inserir novo detalhe
-                    self.cursor.execute(
-                        "INSERT INTO checklist_detail (id_checklist, descricao, status) VALUES (?, ?, ?)",
-                        (id_checklist, descricao, status)
-                    )
+                for caminho, data, tipo, tamanho in snapshots
+            ]
+        else:
+            itens = [ft.Text("Nenhum snapshot encontrado")]
+        
+        dialog = ft.AlertDialog(
+            title=ft.Text("Restaurar Snapshot"),
+            content=ft.Container(ft.ListView(itens, spacing=0), width=450, height=350),
+            actions=[ft.TextButton("Fechar", on_click=fechar)]
+        )
+        self.page.dialog = dialog
+        dialog.open = True
+        self.page.update()
+
+    def confirmar_restauracao(self, caminho, data):
+        """Pede confirmação antes de substituir o banco pelo snapshot"""
+        def cancelar(e):
+            dialog.open = False
+            self.page.update()
         
-        return checklists_adicionados
\ No newline at end of file
+        def restaurar(e):
+            dialog.open = False
+            self.page.update()
+            self.restaurar_snapshot(caminho)
+        
+        dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Confirmar Restauração"),
+            content=ft.Text(
+                f"Todos os dados atuais serão substituídos pelo snapshot de {data.strftime('%d/%m/%Y %H:%M')}. "
+                "Um snapshot do estado atual será criado antes, para poder voltar atrás."
+            ),
+            actions=[
+                ft.TextButton("Cancelar", on_click=cancelar),
+                ft.TextButton("Restaurar", on_click=restaurar),
+            ]
+        )
+        self.page.dialog = dialog
+        dialog.open = True
+        self.page.update()
+
+    def restaurar_snapshot(self, caminho):
+        """Troca o arquivo do banco pelo snapshot e recria as abas com a nova conexão"""
+        try:
+            verificar_snapshot(caminho)
+            criar_snapshot(self.db.caminho, tipo="pre-restauracao")
+        except Exception as ex:
+            self.page.snack_bar = ft.SnackBar(ft.Text(f"Erro ao restaurar snapshot: {str(ex)}"))
+            self.page.snack_bar.open = True
+            self.page.update()
+            return
+        
+        try:
+            self.db.restaurar_snapshot(caminho)
+            mensagem = f"Snapshot restaurado: {os.path.basename(caminho)}"
+        except Exception as ex:
+            mensagem = f"Erro ao restaurar snapshot: {str(ex)}"
+        
+        # A conexão foi reaberta e as abas guardam a antiga: o app recria todas
+        # (inclusive esta, que agenda um novo timer, e a de shows, que cria outro pool de PDFs)
+        self.parar_timers()
+        if hasattr(self.app, 'tabs') and 'shows' in self.app.tabs:
+            self.app.tabs['shows'].exportador.encerrar()
+        if hasattr(self.app, 'setup_tabs'):
+            self.app.setup_tabs()
+            self.app.main_page()
+        
+        self.page.snack_bar = ft.SnackBar(ft.Text(mensagem))
+        self.page.snack_bar.open = True
+        self.page.update()
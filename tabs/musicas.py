@@ -1,5 +1,8 @@
 import flet as ft
 from utils.helpers import formatar_tom, verificar_musica_existente
+from utils.visualizacao_cifra import formatar_cifra_para_visualizacao
+from utils.indice_acordes import indexar_musica, remover_musica, buscar_musicas_por_acordes
+from utils.transposicao import transpor_musica, transpor_musica_cadastrada
 
 ESTILOS_MUSICAIS = [
     "Samba", "Salsa", "Bossa Nova", "MPB", "Rock", "Pop", "Jazz", "Blues",
@@ -18,6 +21,7 @@ class MusicasTab:
         self.musicas_data = []
         self.musicas_table = None
         self.campo_pesquisa = None
+        self.campo_acordes = None
         self.musica_em_visualizacao = None
 
     def build(self):
@@ -45,6 +49,13 @@ class MusicasTab:
             autofocus=True
         )
         
+        self.campo_acordes = ft.TextField(
+            label="Filtrar por acordes...",
+            hint_text="Ex.: F#m7(b5) E7",
+            width=300,
+            on_change=self.filtrar_musicas
+        )
+        
         btn_nova_musica = ft.ElevatedButton(
             "Nova Música",
             icon=ft.icons.ADD,
@@ -65,7 +76,7 @@ class MusicasTab:
         return ft.Container(
             content=ft.Column([
                 ft.Row([
-                    self.campo_pesquisa,
+                    ft.Row([self.campo_pesquisa, self.campo_acordes]),
                     btn_nova_musica
                 ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
                 table_container
@@ -131,10 +142,17 @@ class MusicasTab:
             musicas_filtradas = [m for m in self.musicas_data if 
                                termo in m[1].lower() or 
                                (m[2] and termo in m[2].lower()) or
-                               (m[3] and termo in m[3].lower())]
+                               (m[3] and termo in m[3].lower()) or
+                               (m[4] and termo in m[4].lower())]
         else:
             musicas_filtradas = self.musicas_data
         
+        # Filtro por acordes respondido pelo índice, sem reler as cifras
+        acordes = self.campo_acordes.value.split() if self.campo_acordes and self.campo_acordes.value else []
+        if acordes:
+            ids = buscar_musicas_por_acordes(self.cursor, acordes)
+            musicas_filtradas = [m for m in musicas_filtradas if m[0] in ids]
+        
         self.atualizar_tabela(musicas_filtradas)
 
     def abrir_dialog_musica(self, id_musica=None):
@@ -197,8 +215,14 @@ class MusicasTab:
                     (nome_musica, autor_musica, campo_estilo.value, 
                      tom_formatado, campo_cifra.value)
                 )
+            # Índice de acordes atualizado na mesma transação da música
+            indexar_musica(self.cursor, id_musica or self.cursor.lastrowid, campo_cifra.value)
             self.conn.commit()
             
+            # PDFs em cache que incluem esta música ficaram desatualizados
+            if id_musica:
+                self._invalidar_pdfs_da_musica(id_musica)
+            
             # Atualizar a tabela principal
             self.musicas_data = self.carregar_musicas()
             self.atualizar_tabela()
@@ -208,6 +232,8 @@ class MusicasTab:
                 self.app.tabs['configuracoes'].atualizar_cards()
             
             self.campo_pesquisa.value = ""
+            if self.campo_acordes:
+                self.campo_acordes.value = ""
             
             # Fechar o diálogo
             self.page.dialog.open = False
@@ -249,11 +275,18 @@ class MusicasTab:
             campo_tom.value = formatar_tom(campo_tom.value)
             self.page.update()
 
+    def _invalidar_pdfs_da_musica(self, id_musica):
+        """Descarta do cache apenas os PDFs que incluem a música"""
+        if hasattr(self.app, 'tabs') and 'shows' in self.app.tabs:
+            self.app.tabs['shows'].cache_pdf.invalidar_musica(id_musica)
+
     def excluir_musica(self, id_musica):
         """Exclui uma música do banco de dados"""
         def confirmar_exclusao(e):
             self.cursor.execute("DELETE FROM musicas WHERE id=?", (id_musica,))
+            remover_musica(self.cursor, id_musica)
             self.conn.commit()
+            self._invalidar_pdfs_da_musica(id_musica)
             self.musicas_data = self.carregar_musicas()
             self.atualizar_tabela()
             
@@ -299,7 +332,7 @@ class MusicasTab:
             self.page.update()
             return
         
-        cifra_formatada = self._formatar_cifra_para_visualizacao(musica[5] if musica[5] else "")
+        cifra_formatada = formatar_cifra_para_visualizacao(musica[5] if musica[5] else "")
         
         titulo = ft.Text(musica[1], size=28, weight=ft.FontWeight.BOLD)
         autor = ft.Row([
@@ -365,6 +398,11 @@ class MusicasTab:
                 expand=True
             ),
             ft.Row([
+                ft.ElevatedButton(
+                    "Transpor",
+                    icon=ft.icons.MUSIC_NOTE,
+                    on_click=lambda e: self.abrir_dialog_transposicao(id_musica)
+                ),
                 ft.ElevatedButton(
                     "Editar",
                     icon=ft.icons.EDIT,
@@ -376,59 +414,72 @@ class MusicasTab:
         self.page.clean()
         self.page.add(content)
 
-    def _formatar_cifra_para_visualizacao(self, cifra):
-        """Formata a cifra para visualização estilo Cifra Club"""
-        if not cifra:
-            return [ft.Text("Nenhuma cifra cadastrada", italic=True, color=ft.colors.GREY_600)]
-        
-        linhas = cifra.split('\n')
-        controles = []
-        
-        for linha in linhas:
-            if not linha.strip():
-                controles.append(ft.Divider(height=5))
-                continue
-                
-            partes = []
-            texto_atual = ""
-            i = 0
-            
-            while i < len(linha):
-                if linha[i] == '[':
-                    if texto_atual:
-                        partes.append(ft.Text(texto_atual, size=16))
-                        texto_atual = ""
-                    
-                    j = i + 1
-                    while j < len(linha) and linha[j] != ']':
-                        j += 1
-                    
-                    if j < len(linha):
-                        acorde = linha[i:j+1]
-                        acorde_limpo = acorde[1:-1]
-                        partes.append(
-                            ft.Text(
-                                acorde_limpo,
-                                size=16,
-                                weight=ft.FontWeight.BOLD,
-                                color=ft.colors.BLUE_700
-                            )
-                        )
-                        i = j + 1
-                    else:
-                        texto_atual += linha[i]
-                        i += 1
-                else:
-                    texto_atual += linha[i]
-                    i += 1
+    def abrir_dialog_transposicao(self, id_musica):
+        """Transpõe uma música com prévia ao vivo da cifra"""
+        self.cursor.execute("SELECT tom, cifra FROM musicas WHERE id=?", (id_musica,))
+        tom, cifra = self.cursor.fetchone()
+        semitons = 0
+        
+        texto_semitons = ft.Text(size=18, weight=ft.FontWeight.BOLD, width=220, text_align=ft.TextAlign.CENTER)
+        previa = ft.Column([], scroll=ft.ScrollMode.AUTO, height=300, width=500)
+        
+        def atualizar_previa():
+            tom_novo, cifra_nova = transpor_musica(tom, cifra, semitons)
+            texto_semitons.value = f"{tom or '-'} → {tom_novo or '-'} ({semitons:+d})"
+            previa.controls = formatar_cifra_para_visualizacao(cifra_nova)
+            self.page.update()
+        
+        def ajustar(passo):
+            nonlocal semitons
+            semitons = max(-11, min(11, semitons + passo))
+            atualizar_previa()
+        
+        def aplicar(e):
+            if semitons == 0:
+                self.page.dialog.open = False
+                self.page.update()
+                return
+            try:
+                id_gravada = transpor_musica_cadastrada(self.conn, id_musica, semitons)
+            except Exception as ex:
+                self.page.snack_bar = ft.SnackBar(ft.Text(f"Erro ao transpor: {str(ex)}"))
+                self.page.snack_bar.open = True
+                self.page.update()
+                return
             
-            if texto_atual:
-                partes.append(ft.Text(texto_atual, size=16))
+            self.musicas_data = self.carregar_musicas()
+            self.atualizar_tabela()
+            if hasattr(self.app, 'tabs') and 'configuracoes' in self.app.tabs:
+                self.app.tabs['configuracoes'].atualizar_cards()
             
-            if partes:
-                linha_container = ft.Row(partes, spacing=2, wrap=True)
-                controles.append(linha_container)
-            else:
-                controles.append(ft.Text(linha, size=16))
+            self.page.dialog.open = False
+            self.page.update()
+            self.visualizar_musica(id_gravada)
         
-        return controles
\ No newline at end of file
+        def cancelar(e):
+            self.page.dialog.open = False
+            self.page.update()
+        
+        dialog = ft.AlertDialog(
+            title=ft.Text("Transpor Música"),
+            content=ft.Column([
+                ft.Row([
+                    ft.IconButton(icon=ft.icons.REMOVE, tooltip="Meio tom abaixo", on_click=lambda e: ajustar(-1)),
+                    texto_semitons,
+                    ft.IconButton(icon=ft.icons.ADD, tooltip="Meio tom acima", on_click=lambda e: ajustar(1)),
+                ], alignment=ft.MainAxisAlignment.CENTER),
+                ft.Text("Cria uma nova versão da música no novo tom; o cadastro original não muda",
+                        color=ft.colors.GREY_700),
+                ft.Text("Prévia:", weight=ft.FontWeight.BOLD),
+                previa
+            ], tight=True),
+            actions=[
+                ft.TextButton("Cancelar", on_click=cancelar),
+                ft.TextButton("Aplicar", on_click=aplicar)
+            ],
+            actions_alignment=ft.MainAxisAlignment.END
+        )
+        
+        self.page.dialog = dialog
+        dialog.open = True
+        atualizar_previa()
@@ -0,0 +1,209 @@
+import flet as ft
+import threading
+from utils.transposicao import resolver_musica_show
+from utils.visualizacao_cifra import formatar_cifra_para_visualizacao
+
+# Quantas músicas à frente da atual têm prioridade na pré-construção
+MUSICAS_PREFETCH = 3
+TAMANHO_CIFRA_PALCO = 28
+
+# Teclado e pedais de virar página (que normalmente enviam setas, PageUp/PageDown ou espaço)
+TECLAS_PROXIMA = {"Arrow Right", "Arrow Down", "Page Down", " ", "Enter"}
+TECLAS_ANTERIOR = {"Arrow Left", "Arrow Up", "Page Up", "Backspace"}
+TECLAS_SAIR = {"Escape"}
+
+class ModoPalco:
+    """Tela cheia para tocar um show: repertório pré-carregado e troca de música instantânea"""
+
+    def __init__(self, app, page, db):
+        self.app = app
+        self.page = page
+        self.db = db
+        self.cursor = db.cursor
+        self.conn = db.conn
+
+        self.repertorio = []
+        self.atual = 0
+        self.camada = None
+        self.area_musica = None
+        self.indicador = None
+        self.proxima = None
+        self._visoes = {}
+        self._lock = threading.Lock()
+        self._aberto = False
+        self._geracao = 0
+        self._teclado_anterior = None
+        self._tela_cheia_anterior = False
+
+    def abrir(self, id_show):
+        """Carrega o repertório inteiro de uma vez e mostra a primeira música em tela cheia"""
+        self.cursor.execute('''
+            SELECT m.id, m.musica, m.autor, m.estilo, m.tom, m.cifra, rs.transposicao, rs.arranjo_show
+            FROM repertorios_shows rs
+            JOIN musicas m ON rs.id_musica = m.id
+            WHERE rs.id_show = ?
+            ORDER BY rs.sequencia
+        ''', (id_show,))
+        # Tom e cifra já resolvidos para o show (transposição e arranjo próprio)
+        self.repertorio = [
+            (id_musica, nome, autor, estilo, *resolver_musica_show(tom, cifra, transposicao, arranjo))
+            for id_musica, nome, autor, estilo, tom, cifra, transposicao, arranjo in self.cursor.fetchall()
+        ]
+
+        if not self.repertorio:
+            self.page.snack_bar = ft.SnackBar(ft.Text("O repertório deste show está vazio"))
+            self.page.snack_bar.open = True
+            self.page.update()
+            return
+
+        self.atual = 0
+        self._visoes = {}
+        self._aberto = True
+        self._geracao += 1
+
+        self.area_musica = ft.Container(content=self._obter_visao(0), expand=True, padding=20)
+        self.indicador = ft.Text(size=18, weight=ft.FontWeight.BOLD, color=ft.colors.WHITE)
+        self.proxima = ft.Text(size=18, color=ft.colors.GREY_400, text_align=ft.TextAlign.RIGHT, expand=True)
+
+        # Toques nas laterais também viram a música (útil em tablet)
+        zonas_toque = ft.Row([
+            ft.GestureDetector(on_tap=lambda e: self.anterior(), expand=1),
+            ft.Container(expand=3),
+            ft.GestureDetector(on_tap=lambda e: self.proxima_musica(), expand=1),
+        ], expand=True)
+
+        self.camada = ft.Container(
+            content=ft.Column([
+                ft.Container(
+                    content=ft.Row([
+                        ft.IconButton(icon=ft.icons.CLOSE, icon_color=ft.colors.WHITE, on_click=lambda e: self.fechar()),
+                        self.indicador,
+                        self.proxima,
+                    ]),
+                    bgcolor=ft.colors.BLACK,
+                    padding=ft.padding.symmetric(horizontal=10, vertical=5)
+                ),
+                ft.Stack([self.area_musica, zonas_toque], expand=True),
+            ], spacing=0, expand=True),
+            bgcolor=ft.colors.WHITE,
+            left=0, top=0, right=0, bottom=0
+        )
+        self._atualizar_cabecalho()
+
+        # Camada sobre a tela atual: ao sair, a tela do repertório continua lá sem ser reconstruída
+        self.page.overlay.append(self.camada)
+        self._teclado_anterior = self.page.on_keyboard_event
+        self.page.on_keyboard_event = self._ao_teclar
+        try:
+            self._tela_cheia_anterior = self.page.window.full_screen
+            self.page.window.full_screen = True
+        except AttributeError:
+            pass
+        self.page.update()
+
+        threading.Thread(target=self._construir_em_segundo_plano, args=(self._geracao,), daemon=True).start()
+
+    def fechar(self):
+        """Sai do modo palco e devolve a tela e o teclado como estavam"""
+        if not self._aberto:
+            return
+        self._aberto = False
+        self._geracao += 1
+
+        if self.camada in self.page.overlay:
+            self.page.overlay.remove(self.camada)
+        self.page.on_keyboard_event = self._teclado_anterior
+        try:
+            self.page.window.full_screen = self._tela_cheia_anterior
+        except AttributeError:
+            pass
+        self.camada = None
+        self._visoes = {}
+        self.page.update()
+
+    def ir_para(self, indice):
+        """Troca a música exibida apenas substituindo o conteúdo já montado"""
+        if not self._aberto or not 0 <= indice < len(self.repertorio) or indice == self.atual:
+            return
+        self.atual = indice
+        self.area_musica.content = self._obter_visao(indice)
+        self._atualizar_cabecalho()
+        self.camada.update()
+
+    def proxima_musica(self):
+        """Avança para a próxima música do repertório"""
+        self.ir_para(self.atual + 1)
+
+    def anterior(self):
+        """Volta para a música anterior do repertório"""
+        self.ir_para(self.atual - 1)
+
+    def _ao_teclar(self, e: ft.KeyboardEvent):
+        """Setas, pedal, números (1-9 vão direto para a música) e Esc para sair"""
+        if e.key in TECLAS_PROXIMA:
+            self.proxima_musica()
+        elif e.key in TECLAS_ANTERIOR:
+            self.anterior()
+        elif e.key in TECLAS_SAIR:
+            self.fechar()
+        elif e.key.isdigit() and e.key != "0":
+            self.ir_para(int(e.key) - 1)
+
+    def _atualizar_cabecalho(self):
+        """Posição no repertório e nome da próxima música"""
+        total = len(self.repertorio)
+        self.indicador.value = f"{self.atual + 1}/{total}"
+        if self.atual + 1 < total:
+            self.proxima.value = f"Próxima: {self.repertorio[self.atual + 1][1]}"
+        else:
+            self.proxima.value = "Fim do repertório"
+
+    def _obter_visao(self, indice):
+        """Retorna a visão pré-construída ou monta na hora se o construtor ainda não chegou nela"""
+        with self._lock:
+            visao = self._visoes.get(indice)
+        if visao is None:
+            visao = self._construir_visao(self.repertorio[indice])
+            with self._lock:
+                visao = self._visoes.setdefault(indice, visao)
+        return visao
+
+    def _proximo_indice_pendente(self):
+        """Primeiro as próximas músicas a partir da atual, depois o restante do repertório"""
+        total = len(self.repertorio)
+        prioridade = range(self.atual, min(total, self.atual + MUSICAS_PREFETCH + 1))
+        with self._lock:
+            for indice in list(prioridade) + list(range(total)):
+                if indice not in self._visoes:
+                    return indice
+        return None
+
+    def _construir_em_segundo_plano(self, geracao):
+        """Monta as visões de todas as músicas fora da thread da interface"""
+        repertorio = self.repertorio
+        while self._geracao == geracao:
+            indice = self._proximo_indice_pendente()
+            if indice is None:
+                return
+            visao = self._construir_visao(repertorio[indice])
+            with self._lock:
+                if self._geracao == geracao:
+                    self._visoes.setdefault(indice, visao)
+
+    def _construir_visao(self, musica):
+        """Monta os controles de uma música em letra grande para o palco"""
+        tom = musica[4] or ""
+        if tom.startswith('(') and tom.endswith(')'):
+            tom = tom[1:-1]
+
+        cifra = formatar_cifra_para_visualizacao(musica[5] or "", tamanho=TAMANHO_CIFRA_PALCO)
+
+        return ft.Column([
+            ft.Row([
+                ft.Text(musica[1], size=40, weight=ft.FontWeight.BOLD),
+                ft.Text(f"({tom})" if tom else "", size=32, weight=ft.FontWeight.BOLD, color=ft.colors.BROWN_700),
+            ], wrap=True),
+            ft.Text(musica[2] or "", size=18, color=ft.colors.GREY_700),
+            ft.Divider(height=10),
+            *cifra,
+        ], spacing=8, scroll=ft.ScrollMode.AUTO, expand=True)
@@ -4,9 +4,12 @@ from datetime import datetime
 import math
 import re
 import os
-from io import BytesIO
-from xhtml2pdf import pisa
 from utils.helpers import abrir_arquivo_multiplataforma
+from utils.pdf import nome_arquivo_pdf
+from utils.exportacao import ServicoExportacaoPDF
+from utils.cache_pdf import CachePDF, calcular_chave_pdf
+from tabs.palco import ModoPalco
+from utils.transposicao import transpor_tom, previa_transposicao, transpor_show, resolver_musica_show
 
 class ShowsTab:
     def __init__(self, app, page, db):
@@ -19,6 +22,13 @@ class ShowsTab:
         self.shows_data = []
         self.shows_table = None
         self.campo_pesquisa = None
+        self.shows_selecionados = set()
+        
+        # Pool de processos para renderizar PDFs sem travar a interface
+        self.exportador = ServicoExportacaoPDF()
+        self.exportador.aquecer()
+        self.cache_pdf = CachePDF()
+        self.modo_palco = ModoPalco(app, page, db)
 
     def build(self):
         """Constrói a interface da aba de shows"""
@@ -33,6 +43,7 @@ class ShowsTab:
                 ft.DataColumn(ft.Text("Ações"))
             ],
             rows=[],
+            show_checkbox_column=True
         )
         
         self.atualizar_tabela()
@@ -50,6 +61,12 @@ class ShowsTab:
             on_click=lambda e: self.abrir_dialog_show()
         )
         
+        btn_exportar_lote = ft.ElevatedButton(
+            "Exportar PDFs em Lote",
+            icon=ft.icons.PICTURE_AS_PDF,
+            on_click=lambda e: self.abrir_dialog_exportacao_lote()
+        )
+        
         table_container = ft.Container(
             content=ft.ListView(
                 controls=[self.shows_table],
@@ -65,7 +82,7 @@ class ShowsTab:
             content=ft.Column([
                 ft.Row([
                     self.campo_pesquisa,
-                    btn_novo_show
+                    ft.Row([btn_exportar_lote, btn_novo_show])
                 ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
                 table_container
             ], expand=True),
@@ -100,6 +117,8 @@ class ShowsTab:
         for show in shows_data:
             rows.append(
                 ft.DataRow(
+                    selected=show[0] in self.shows_selecionados,
+                    on_select_changed=lambda e, id=show[0]: self.alternar_selecao_show(id, e.data == "true"),
                     cells=[
                         ft.DataCell(ft.Text(str(show[0]))),
                         ft.DataCell(ft.Text(show[1])),
@@ -144,6 +163,18 @@ class ShowsTab:
         self.shows_table.rows = rows
         self.page.update()
 
+    def alternar_selecao_show(self, id_show, selecionado):
+        """Marca ou desmarca um show para a exportação em lote"""
+        if selecionado:
+            self.shows_selecionados.add(id_show)
+        else:
+            self.shows_selecionados.discard(id_show)
+        
+        for row in self.shows_table.rows:
+            if row.cells[0].content.value == str(id_show):
+                row.selected = selecionado
+        self.page.update()
+
     def filtrar_shows(self, e):
         """Filtra os shows na tabela"""
         termo = self.campo_pesquisa.value.lower()
@@ -316,7 +347,7 @@ class ShowsTab:
         
         def carregar_repertorio():
             self.cursor.execute('''
-                SELECT m.id, m.musica, m.tom, m.cifra, rs.sequencia, rs.id
+                SELECT m.id, m.musica, m.tom, m.cifra, rs.sequencia, rs.id, rs.transposicao, rs.arranjo_show
                 FROM repertorios_shows rs 
                 JOIN musicas m ON rs.id_musica = m.id 
                 WHERE rs.id_show = ? 
@@ -326,11 +357,21 @@ class ShowsTab:
             
             lista_musicas.controls.clear()
             for i, musica in enumerate(repertorio):
+                tom = f"Tom: {musica[2]}"
+                if musica[6]:
+                    tom = f"Tom: {transpor_tom(musica[2], musica[6])} (cadastro {musica[2]}, {musica[6]:+d})"
+                if musica[7]:
+                    tom += " • arranjo do show"
                 lista_musicas.controls.append(
                     ft.ListTile(
                         title=ft.Text(f"{i+1}. {musica[1]}"),
-                        subtitle=ft.Text(f"Tom: {musica[2]}"),
+                        subtitle=ft.Text(tom),
                         trailing=ft.Row([
+                            ft.IconButton(
+                                icon=ft.icons.TUNE,
+                                tooltip="Tom e arranjo neste show",
+                                on_click=lambda e, id=musica[5]: self.abrir_dialog_ajuste_show(id, carregar_repertorio)
+                            ),
                             ft.IconButton(
                                 icon=ft.icons.ARROW_UPWARD,
                                 on_click=lambda e, id=musica[5]: mover_musica(id, -1)
@@ -343,7 +384,7 @@ class ShowsTab:
                                 icon=ft.icons.DELETE,
                                 on_click=lambda e, id=musica[5]: remover_musica(id)
                             )
-                        ], width=150)
+                        ], width=200)
                     )
                 )
             self.page.update()
@@ -415,6 +456,8 @@ class ShowsTab:
                 expand=True
             ),
             ft.Row([
+                ft.ElevatedButton("Modo Palco", icon=ft.icons.FULLSCREEN, on_click=lambda e: self.modo_palco.abrir(id_show)),
+                ft.ElevatedButton("Transpor", icon=ft.icons.MUSIC_NOTE, on_click=lambda e: self.abrir_dialog_transposicao(id_show, carregar_repertorio)),
                 ft.ElevatedButton("Exportar PDF Cifrado", on_click=lambda e: self.exportar_pdf(id_show, tipo="cifrado")),
                 ft.ElevatedButton("Exportar PDF Simplificado", on_click=lambda e: self.exportar_pdf(id_show, tipo="simplificado")),
                 ft.ElevatedButton("Voltar", on_click=voltar)
@@ -424,107 +467,219 @@ class ShowsTab:
         self.page.clean()
         self.page.add(content)
 
-    def processar_cifra_para_pdf(self, cifra):
-        """Processa a cifra para destacar texto entre colchetes em azul e substituir -- por →"""
-        if not cifra:
-            return cifra
-            
-        cifra_com_setas = re.sub(r'--', '→', cifra)
-        
-        padrao_colchetes = r'(\[[^\]]+\])'
-        
-        def substituir_colchetes(match):
-            texto_entre_colchetes = match.group(1)
-            return f'<span class="colchetes">{texto_entre_colchetes}</span>'
+    def abrir_dialog_ajuste_show(self, id_item, ao_salvar):
+        """Define o tom e o arranjo de uma música só neste show, sem alterar o cadastro"""
+        self.cursor.execute('''
+            SELECT m.musica, m.tom, m.cifra, rs.transposicao, rs.arranjo_show
+            FROM repertorios_shows rs 
+            JOIN musicas m ON rs.id_musica = m.id 
+            WHERE rs.id = ?
+        ''', (id_item,))
+        nome, tom, cifra, transposicao, arranjo = self.cursor.fetchone()
+        
+        campo_tom = ft.Dropdown(
+            label="Tom neste show",
+            options=[
+                ft.dropdown.Option(
+                    str(semitons),
+                    f"{transpor_tom(tom, semitons) or '-'} ({semitons:+d})" if semitons else f"{tom or '-'} (cadastro)"
+                )
+                for semitons in range(-5, 7)
+            ],
+            value=str(transposicao or 0),
+            disabled=not tom
+        )
+        campo_arranjo = ft.TextField(
+            label="Arranjo neste show (no tom do cadastro)",
+            value=arranjo or cifra or "",
+            multiline=True,
+            min_lines=3,
+            max_lines=8
+        )
         
-        cifra_processada = re.sub(padrao_colchetes, substituir_colchetes, cifra_com_setas)
-        return cifra_processada
-
-    def exportar_pdf(self, id_show, tipo="cifrado"):
-        """Exporta o repertório para PDF usando xhtml2pdf"""
-        self.cursor.execute("SELECT * FROM shows WHERE id=?", (id_show,))
-        show = self.cursor.fetchone()
+        def salvar(e):
+            # Arranjo igual ao cadastro não é guardado: continua acompanhando as edições da música
+            novo_arranjo = campo_arranjo.value if campo_arranjo.value and campo_arranjo.value != (cifra or "") else None
+            self.cursor.execute(
+                "UPDATE repertorios_shows SET transposicao=?, arranjo_show=? WHERE id=?",
+                (int(campo_tom.value or 0), novo_arranjo, id_item)
+            )
+            self.conn.commit()
+            self.page.dialog.open = False
+            ao_salvar()
+            self.page.update()
         
-        data_show = show[1]
-        try:
-            data_obj = datetime.strptime(data_show, "%d/%m/%Y")
-            data_formatada = data_obj.strftime("%d-%m-%Y")
-        except:
-            data_formatada = "data-desconhecida"
+        def restaurar(e):
+            campo_tom.value = "0"
+            campo_arranjo.value = cifra or ""
+            self.page.update()
         
-        artista_limpo = re.sub(r'[^\w\s-]', '', show[3]).replace(' ', '-')
-        local_limpo = re.sub(r'[^\w\s-]', '', show[2]).replace(' ', '-')
+        def cancelar(e):
+            self.page.dialog.open = False
+            self.page.update()
         
-        if tipo == "simplificado":
-            nome_arquivo = f"{data_formatada} - {artista_limpo} - {local_limpo} - SIMPLIFICADO.pdf"
-        else:
-            nome_arquivo = f"{data_formatada} - {artista_limpo} - {local_limpo}.pdf"
+        dialog = ft.AlertDialog(
+            title=ft.Text(f"{nome}: tom e arranjo neste show"),
+            content=ft.Column([
+                campo_tom,
+                campo_arranjo
+            ], tight=True, width=500, scroll=ft.ScrollMode.AUTO),
+            actions=[
+                ft.TextButton("Usar o cadastro", on_click=restaurar),
+                ft.TextButton("Cancelar", on_click=cancelar),
+                ft.TextButton("Salvar", on_click=salvar)
+            ],
+            actions_alignment=ft.MainAxisAlignment.END
+        )
         
+        self.page.dialog = dialog
+        dialog.open = True
+        self.page.update()
+
+    def abrir_dialog_transposicao(self, id_show, ao_aplicar):
+        """Transpõe o repertório inteiro do show com prévia ao vivo dos tons"""
         self.cursor.execute('''
-            SELECT m.id, m.musica, m.tom, m.cifra, rs.sequencia 
+            SELECT m.id, m.musica, m.tom, COALESCE(rs.arranjo_show, m.cifra), rs.transposicao
             FROM repertorios_shows rs 
             JOIN musicas m ON rs.id_musica = m.id 
             WHERE rs.id_show = ? 
             ORDER BY rs.sequencia
         ''', (id_show,))
-        repertorio = self.cursor.fetchall()
+        musicas = self.cursor.fetchall()
+        semitons = 0
+        
+        texto_semitons = ft.Text("0 semitons", size=18, weight=ft.FontWeight.BOLD, width=130,
+                                 text_align=ft.TextAlign.CENTER)
+        lista_previa = ft.ListView([], height=300, width=500)
+        modo = ft.RadioGroup(
+            value="show",
+            content=ft.Column([
+                ft.Radio(value="show", label="Só neste show (as músicas cadastradas não mudam)"),
+                ft.Radio(value="versao", label="Criar novas versões das músicas no novo tom")
+            ])
+        )
         
-        if not repertorio:
-            self.page.snack_bar = ft.SnackBar(ft.Text("Nenhuma música no repertório para exportar!"))
+        def atualizar_previa():
+            texto_semitons.value = f"{semitons:+d} semitons" if semitons else "0 semitons"
+            lista_previa.controls = [
+                ft.Text(f"{i+1}. {nome}: {transpor_tom(tom, deslocamento)} → {tom_novo}")
+                for i, ((_, _, _, _, deslocamento), (_, nome, tom, tom_novo, _))
+                in enumerate(zip(musicas, previa_transposicao(musicas, semitons)))
+            ]
+            self.page.update()
+        
+        def ajustar(passo):
+            nonlocal semitons
+            semitons = max(-11, min(11, semitons + passo))
+            atualizar_previa()
+        
+        def aplicar(e):
+            try:
+                resultado = transpor_show(self.conn, id_show, semitons, modo.value)
+            except Exception as ex:
+                self.page.snack_bar = ft.SnackBar(ft.Text(f"Erro ao transpor: {str(ex)}"))
+                self.page.snack_bar.open = True
+                self.page.update()
+                return
+            
+            # Versões novas entram na lista de músicas
+            alteradas = resultado["alteradas"]
+            if alteradas and hasattr(self.app, 'tabs') and 'musicas' in self.app.tabs:
+                self.app.tabs['musicas'].musicas_data = self.app.tabs['musicas'].carregar_musicas()
+                self.app.tabs['musicas'].atualizar_tabela()
+            if alteradas and hasattr(self.app, 'tabs') and 'configuracoes' in self.app.tabs:
+                self.app.tabs['configuracoes'].atualizar_cards()
+            
+            mensagem = f"Repertório transposto {semitons:+d} semitons"
+            if resultado["repetidas"]:
+                mensagem += f". Já estavam no show e saíram do repertório: {', '.join(resultado['repetidas'])}"
+            if resultado["mantidas"]:
+                mensagem += f". Não transpostas: {', '.join(resultado['mantidas'])}"
+            
+            self.page.dialog.open = False
+            ao_aplicar()
+            self.page.snack_bar = ft.SnackBar(ft.Text(mensagem))
             self.page.snack_bar.open = True
             self.page.update()
-            return
         
-        # Gerar PDF
-        if tipo == "simplificado":
-            html_content = self._gerar_pdf_simplificado(repertorio)
-        else:
-            html_content = self._gerar_pdf_cifrado(repertorio)
+        def cancelar(e):
+            self.page.dialog.open = False
+            self.page.update()
+        
+        dialog = ft.AlertDialog(
+            title=ft.Text("Transpor Repertório"),
+            content=ft.Column([
+                ft.Row([
+                    ft.IconButton(icon=ft.icons.REMOVE, tooltip="Meio tom abaixo", on_click=lambda e: ajustar(-1)),
+                    texto_semitons,
+                    ft.IconButton(icon=ft.icons.ADD, tooltip="Meio tom acima", on_click=lambda e: ajustar(1)),
+                ], alignment=ft.MainAxisAlignment.CENTER),
+                modo,
+                ft.Text("Prévia:", weight=ft.FontWeight.BOLD),
+                lista_previa
+            ], tight=True),
+            actions=[
+                ft.TextButton("Cancelar", on_click=cancelar),
+                ft.TextButton("Aplicar", on_click=aplicar)
+            ],
+            actions_alignment=ft.MainAxisAlignment.END
+        )
         
-        pdf_buffer = BytesIO()
-        pisa_status = pisa.CreatePDF(html_content, dest=pdf_buffer)
+        self.page.dialog = dialog
+        dialog.open = True
+        atualizar_previa()
+
+    def _carregar_repertorio_exportacao(self, id_show):
+        """Carrega as músicas do show na ordem do repertório para exportação"""
+        self.cursor.execute('''
+            SELECT m.id, m.musica, m.tom, m.cifra, rs.sequencia, rs.transposicao, rs.arranjo_show
+            FROM repertorios_shows rs 
+            JOIN musicas m ON rs.id_musica = m.id 
+            WHERE rs.id_show = ? 
+            ORDER BY rs.sequencia
+        ''', (id_show,))
+        # Cada música sai no tom e no arranjo do show; a chave do cache de PDF já
+        # considera o tom e a cifra, então cada show tem o seu PDF
+        return [
+            (id_musica, nome, *resolver_musica_show(tom, cifra, transposicao, arranjo), sequencia)
+            for id_musica, nome, tom, cifra, sequencia, transposicao, arranjo in self.cursor.fetchall()
+        ]
+
+    def exportar_pdf(self, id_show, tipo="cifrado"):
+        """Pede o destino do PDF e renderiza o repertório direto nele"""
+        self.cursor.execute("SELECT * FROM shows WHERE id=?", (id_show,))
+        show = self.cursor.fetchone()
+        
+        nome_arquivo = nome_arquivo_pdf(show, tipo)
+        repertorio = self._carregar_repertorio_exportacao(id_show)
         
-        if pisa_status.err:
-            self.page.snack_bar = ft.SnackBar(ft.Text("Erro ao gerar PDF"))
+        if not repertorio:
+            self.page.snack_bar = ft.SnackBar(ft.Text("Nenhuma música no repertório para exportar!"))
             self.page.snack_bar.open = True
             self.page.update()
             return
         
-        def salvar_pdf(e: ft.FilePickerResultEvent):
+        # O destino é escolhido antes de renderizar: nada fica em memória enquanto o diálogo está aberto
+        def destino_escolhido(e: ft.FilePickerResultEvent):
             if e.path:
-                try:
-                    if hasattr(e, 'files') and e.files:
-                        caminho_completo = e.files[0].path
+                if hasattr(e, 'files') and e.files:
+                    caminho_completo = e.files[0].path
+                else:
+                    if os.path.isdir(e.path):
+                        caminho_completo = os.path.join(e.path, nome_arquivo)
                     else:
-                        if os.path.isdir(e.path):
-                            caminho_completo = os.path.join(e.path, nome_arquivo)
-                        else:
-                            caminho_completo = e.path
-                    
-                    if not caminho_completo.lower().endswith('.pdf'):
-                        caminho_completo += '.pdf'
-                    
-                    with open(caminho_completo, 'wb') as f:
-                        f.write(pdf_buffer.getvalue())
-                    
-                    abrir_arquivo_multiplataforma(caminho_completo)
-                    
-                    self.page.snack_bar = ft.SnackBar(
-                        ft.Text(f"PDF exportado com sucesso: {os.path.basename(caminho_completo)}")
-                    )
-                    self.page.snack_bar.open = True
-                    self.page.update()
-                    
-                except Exception as ex:
-                    self.page.snack_bar = ft.SnackBar(ft.Text(f"Erro ao salvar PDF: {str(ex)}"))
-                    self.page.snack_bar.open = True
-                    self.page.update()
+                        caminho_completo = e.path
+                
+                if not caminho_completo.lower().endswith('.pdf'):
+                    caminho_completo += '.pdf'
+                
+                self._gerar_pdf_no_destino(tipo, repertorio, caminho_completo)
             else:
                 self.page.snack_bar = ft.SnackBar(ft.Text("Exportação de PDF cancelada"))
                 self.page.snack_bar.open = True
                 self.page.update()
         
-        file_picker = ft.FilePicker(on_result=salvar_pdf)
+        file_picker = ft.FilePicker(on_result=destino_escolhido)
         self.page.overlay.append(file_picker)
         self.page.update()
         
@@ -534,181 +689,258 @@ class ShowsTab:
             allowed_extensions=["pdf"]
         )
 
-    def _gerar_pdf_simplificado(self, repertorio):
-        """Gera o HTML para PDF simplificado"""
-        html_content = """<!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <style>
-                    @page {
-                        size: A4 landscape;
-                        margin: 0.5cm;
-                    }
-                    body {
-                        font-family: Arial, sans-serif;
-                        font-size: 30px;
-                        font-weight: bold;
-                        background-color: #F0F0F0;
-                        margin: 0;
-                        padding: 0;
-                    }
-                    table {
-                        width: 100%;
-                        border-collapse: collapse;
-                        table-layout: fixed;
-                    }
-                    td {
-                        vertical-align: top;
-                        padding: 5px 15px;
-                        width: 50%;
-                    }
-                    .musica {
-                        margin-bottom: 10px;
-                        line-height: 1.3;
-                        display: block;
-                        page-break-inside: avoid;
-                        white-space: nowrap;
-                    }
-                    .numero {
-                        color: black;
-                        font-weight: bold;
-                        display: inline-block;
-                        min-width: 40px;
-                        text-align: right;
-                        margin-right: 10px;
-                    }
-                    .conteudo {
-                        display: inline-block;
-                    }
-                    .nome {
-                        color: black;
-                    }
-                    .tom {
-                        color: #8B4513;
-                    }
-                </style>
-            </head>
-            <body>
-                <table>
-                    <tr>
-                        <td>"""
-        
-        num_musicas = len(repertorio)
-        metade = (num_musicas + 1) // 2
-        
-        for i in range(metade):
-            musica = repertorio[i]
-            html_content += f"""
-            <div class="musica">
-                <span class="numero">{i+1}.</span>
-                <span class="conteudo">
-                    <span class="nome">{musica[1]}</span>
-                    <span class="tom"> {musica[2]}</span>
-                </span>
-            </div>"""
-        
-        html_content += """
-            </td>
-            <td>"""
-        
-        for i in range(metade, num_musicas):
-            musica = repertorio[i]
-            html_content += f"""
-            <div class="musica">
-                <span class="numero">{i+1}.</span>
-                <span class="conteudo">
-                    <span class="nome">{musica[1]}</span>
-                    <span class="tom"> {musica[2]}</span>
-                </span>
-            </div>"""
-        
-        html_content += """
-                        </td>
-                    </tr>
-                </table>
-            </body>
-            </html>"""
-        
-        return html_content
+    def _pdf_exportado(self, caminho_completo):
+        """Abre o PDF exportado e avisa o usuário"""
+        abrir_arquivo_multiplataforma(caminho_completo)
+        
+        self.page.snack_bar = ft.SnackBar(
+            ft.Text(f"PDF exportado com sucesso: {os.path.basename(caminho_completo)}")
+        )
+        self.page.snack_bar.open = True
+        self.page.update()
 
-    def _gerar_pdf_cifrado(self, repertorio):
-        """Gera o HTML para PDF cifrado"""
-        # Calcular tamanho da fonte baseado no número de caracteres
-        textos = []
-        for musica in repertorio:
-            texto = f"➔ {musica[1]} {musica[2]} {musica[3] or ''}"
-            textos.append(texto)
-        
-        max_caracteres = max(len(texto) for texto in textos) if textos else 0
-        tamanho_fonte = min(34, 26 + (max_caracteres // 3))
-        
-        html_parts = []
-        html_parts.append(f"""<!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <style>
-                    @page {{
-                        size: A4 landscape;
-                        margin: 0.5cm;
-                    }}
-                    body {{
-                        font-family: Arial, sans-serif;
-                        font-size: {tamanho_fonte}px;
-                        font-weight: bold;
-                        background-color: #F0F0F0;
-                        margin: 0;
-                        padding: 0.5cm;
-                        line-height: 1.0;
-                    }}
-                    .musica {{
-                        margin-bottom: 0.1cm;
-                        line-height: 1.0;
-                        page-break-inside: avoid;
-                    }}
-                    .seta {{
-                        color: red;
-                        font-weight: bold;
-                    }}
-                    .nome {{
-                        color: black;
-                        font-weight: bold;
-                    }}
-                    .tom {{
-                        color: #8B4513;
-                        font-weight: bold;
-                    }}
-                    .cifra {{
-                        color: black;
-                        background-color: yellow;
-                        font-weight: bold;
-                        padding: 0.02cm 0.05cm;
-                    }}
-                    .colchetes {{
-                        color: blue;
-                        background-color: #F0F0F0;
-                        font-weight: normal;
-                    }}
-                </style>
-            </head>
-            <body>""")
-        
-        for musica in repertorio:
-            cifra_processada = self.processar_cifra_para_pdf(musica[3] or "")
-            html_parts.append(f"""
-                <div class="musica">
-                    <span class="seta">➔</span>
-                    <span class="nome">{musica[1]}</span>
-                    <span class="tom">{musica[2]}</span>
-                    <span class="cifra">{cifra_processada}</span>
-                </div>""")
-        
-        html_parts.append("""
-            </body>
-            </html>""")
-        
-        return "\n".join(html_parts)
+    def _gerar_pdf_no_destino(self, tipo, repertorio, caminho_completo):
+        """Copia o PDF do cache ou renderiza em um processo separado gravando direto no destino"""
+        chave = calcular_chave_pdf(tipo, repertorio)
+        
+        # Reexportar um repertório sem alterações é só uma cópia do PDF em cache
+        try:
+            if self.cache_pdf.copiar_para(chave, caminho_completo):
+                self._pdf_exportado(caminho_completo)
+                return
+        except Exception as ex:
+            self.page.snack_bar = ft.SnackBar(ft.Text(f"Erro ao salvar PDF: {str(ex)}"))
+            self.page.snack_bar.open = True
+            self.page.update()
+            return
+        
+        texto_progresso = ft.Text("Preparando exportação...")
+        barra_progresso = ft.ProgressBar(width=400, value=0)
+        
+        def atualizar_progresso(mensagem, fracao):
+            texto_progresso.value = mensagem
+            barra_progresso.value = fracao
+            self.page.update()
+        
+        def concluir(caminho, erro):
+            dialog_progresso.open = False
+            self.page.update()
+            
+            if erro:
+                self.page.snack_bar = ft.SnackBar(ft.Text(f"Erro ao gerar PDF: {str(erro)}"))
+                self.page.snack_bar.open = True
+                self.page.update()
+                return
+            
+            self.cache_pdf.armazenar(chave, caminho, [musica[0] for musica in repertorio])
+            self._pdf_exportado(caminho)
+        
+        def cancelar(e):
+            tarefa.cancelar()
+            dialog_progresso.open = False
+            self.page.snack_bar = ft.SnackBar(ft.Text("Exportação de PDF cancelada"))
+            self.page.snack_bar.open = True
+            self.page.update()
+        
+        dialog_progresso = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Exportando PDF"),
+            content=ft.Column([texto_progresso, barra_progresso], tight=True),
+            actions=[ft.TextButton("Cancelar", on_click=cancelar)],
+            actions_alignment=ft.MainAxisAlignment.END
+        )
+        
+        self.page.dialog = dialog_progresso
+        dialog_progresso.open = True
+        self.page.update()
+        
+        tarefa = self.exportador.exportar(tipo, repertorio, caminho_completo, concluir, atualizar_progresso)
+
+    def abrir_dialog_exportacao_lote(self):
+        """Abre o diálogo de exportação em lote por período ou pelos shows selecionados"""
+        campo_inicio = ft.TextField(label="De (DD/MM/AAAA)", width=180)
+        campo_fim = ft.TextField(label="Até (DD/MM/AAAA)", width=180)
+        check_cifrado = ft.Checkbox(label="Repertório Cifrado", value=True)
+        check_simplificado = ft.Checkbox(label="Repertório Simplificado", value=True)
+        mensagem_erro = ft.Text("", color=ft.colors.RED, size=12)
+        
+        if self.shows_selecionados:
+            texto_origem = f"{len(self.shows_selecionados)} show(s) selecionado(s) na tabela serão exportados."
+        else:
+            texto_origem = "Nenhum show selecionado: informe o período a exportar."
+        
+        def escolher_pasta(e):
+            tipos = []
+            if check_cifrado.value:
+                tipos.append("cifrado")
+            if check_simplificado.value:
+                tipos.append("simplificado")
+            
+            if not tipos:
+                mensagem_erro.value = "Escolha ao menos um tipo de PDF!"
+                self.page.update()
+                return
+            
+            if self.shows_selecionados:
+                ids_shows = [s[0] for s in self.shows_data if s[0] in self.shows_selecionados]
+            else:
+                try:
+                    inicio = datetime.strptime(campo_inicio.value, "%d/%m/%Y")
+                    fim = datetime.strptime(campo_fim.value, "%d/%m/%Y")
+                except (TypeError, ValueError):
+                    mensagem_erro.value = "Data inválida! Use DD/MM/AAAA"
+                    self.page.update()
+                    return
+                ids_shows = [s[0] for s in self.shows_data if self._show_no_periodo(s, inicio, fim)]
+            
+            if not ids_shows:
+                mensagem_erro.value = "Nenhum show encontrado para exportar!"
+                self.page.update()
+                return
+            
+            def pasta_escolhida(ev: ft.FilePickerResultEvent):
+                if ev.path:
+                    self.exportar_lote(ids_shows, tipos, ev.path)
+                else:
+                    self.page.snack_bar = ft.SnackBar(ft.Text("Exportação em lote cancelada"))
+                    self.page.snack_bar.open = True
+                    self.page.update()
+            
+            self.page.dialog.open = False
+            self.page.update()
+            
+            file_picker = ft.FilePicker(on_result=pasta_escolhida)
+            self.page.overlay.append(file_picker)
+            self.page.update()
+            file_picker.get_directory_path(dialog_title="Pasta de destino dos PDFs")
+        
+        def cancelar(e):
+            self.page.dialog.open = False
+            self.page.update()
+        
+        dialog = ft.AlertDialog(
+            title=ft.Text("Exportar PDFs em Lote"),
+            content=ft.Column([
+                ft.Text(texto_origem),
+                ft.Row([campo_inicio, campo_fim], visible=not self.shows_selecionados),
+                check_cifrado,
+                check_simplificado,
+                mensagem_erro
+            ], tight=True),
+            actions=[
+                ft.TextButton("Cancelar", on_click=cancelar),
+                ft.TextButton("Escolher pasta e exportar", on_click=escolher_pasta)
+            ],
+            actions_alignment=ft.MainAxisAlignment.END
+        )
+        
+        self.page.dialog = dialog
+        dialog.open = True
+        self.page.update()
+
+    def _show_no_periodo(self, show, inicio, fim):
+        """Verifica se a data do show (DD/MM/AAAA) está dentro do período"""
+        try:
+            data_show = datetime.strptime(show[1], "%d/%m/%Y")
+        except ValueError:
+            return False
+        return inicio <= data_show <= fim
+
+    def exportar_lote(self, ids_shows, tipos, pasta):
+        """Exporta os PDFs de vários shows em paralelo para a pasta escolhida"""
+        trabalhos = []
+        pendentes = {}
+        prontos = 0
+        total_musicas = 0
+        
+        for id_show in ids_shows:
+            self.cursor.execute("SELECT * FROM shows WHERE id=?", (id_show,))
+            show = self.cursor.fetchone()
+            repertorio = self._carregar_repertorio_exportacao(id_show)
+            if not show or not repertorio:
+                continue
+            
+            for tipo in tipos:
+                destino = os.path.join(pasta, nome_arquivo_pdf(show, tipo))
+                chave = calcular_chave_pdf(tipo, repertorio)
+                
+                # PDFs já em cache são copiados na hora, sem ocupar os workers
+                if self.cache_pdf.copiar_para(chave, destino):
+                    prontos += 1
+                    continue
+                
+                # Repertórios idênticos (mesma chave) são renderizados uma única vez
+                if chave in pendentes:
+                    pendentes[chave][1].append(destino)
+                    continue
+                
+                total_musicas += len(repertorio)
+                trabalhos.append((tipo, repertorio, destino))
+                pendentes[chave] = ([musica[0] for musica in repertorio], [destino])
+        
+        total = prontos + sum(len(destinos) for _, destinos in pendentes.values())
+        if total == 0:
+            self.page.snack_bar = ft.SnackBar(ft.Text("Nenhum show com repertório para exportar!"))
+            self.page.snack_bar.open = True
+            self.page.update()
+            return
+        
+        texto_progresso = ft.Text(f"{prontos}/{total} PDFs")
+        barra_progresso = ft.ProgressBar(width=400, value=prontos / total)
+        
+        def atualizar_progresso(concluidos, total_trabalhos):
+            fracao = (prontos + (total - prontos) * concluidos / total_trabalhos) / total
+            texto_progresso.value = f"{round(fracao * total)}/{total} PDFs"
+            barra_progresso.value = fracao
+            self.page.update()
+        
+        def concluir(resultados, segundos):
+            gerados = 0
+            erros = 0
+            for (chave, (ids_musicas, destinos)), (_, erro) in zip(pendentes.items(), resultados):
+                if erro:
+                    erros += len(destinos)
+                    continue
+                # O primeiro destino foi renderizado direto; o cache e as cópias partem dele
+                self.cache_pdf.armazenar(chave, destinos[0], ids_musicas)
+                for destino in destinos[1:]:
+                    self.cache_pdf.copiar_para(chave, destino)
+                gerados += len(destinos)
+            
+            dialog_progresso.open = False
+            
+            if lote is not None and lote.cancelada:
+                resumo = f"Exportação em lote cancelada: {prontos + gerados} de {total} PDFs salvos"
+            else:
+                resumo = f"{prontos + gerados} PDFs exportados ({prontos} do cache) em {segundos:.1f}s"
+                if gerados and segundos > 0:
+                    resumo += f" — {gerados / segundos:.1f} PDFs/s, {total_musicas / segundos:.0f} músicas/s"
+                if erros:
+                    resumo += f" — {erros} com erro"
+            
+            self.page.snack_bar = ft.SnackBar(ft.Text(resumo))
+            self.page.snack_bar.open = True
+            self.page.update()
+        
+        def cancelar(e):
+            lote.cancelar()
+            texto_progresso.value = "Cancelando..."
+            self.page.update()
+        
+        lote = None
+        dialog_progresso = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("Exportando PDFs em Lote"),
+            content=ft.Column([texto_progresso, barra_progresso], tight=True),
+            actions=[ft.TextButton("Cancelar", on_click=cancelar)],
+            actions_alignment=ft.MainAxisAlignment.END
+        )
+        
+        self.page.dialog = dialog_progresso
+        dialog_progresso.open = True
+        self.page.update()
+        
+        lote = self.exportador.exportar_lote(trabalhos, concluir, atualizar_progresso)
 
     def excluir_show(self, id_show):
         """Exclui um show do banco de dados"""
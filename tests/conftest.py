@@ -0,0 +1,47 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from database import Database
+
+@pytest.fixture
+def abrir_banco(tmp_path, monkeypatch):
+    """Abre um Database novo em tmp_path/nome (o app grava o repertorio.db na pasta atual)"""
+    abertos = []
+
+    def abrir(nome="banco"):
+        pasta = tmp_path / nome
+        pasta.mkdir(exist_ok=True)
+        monkeypatch.chdir(pasta)
+        db = Database()
+        abertos.append(db)
+        return db
+
+    yield abrir
+    for db in abertos:
+        db.conn.close()
+
+def popular(db):
+    """Duas músicas, um show com as duas no repertório e um checklist com dois itens"""
+    cursor = db.cursor
+    cursor.executemany(
+        "INSERT INTO musicas (musica, autor, estilo, tom, cifra) VALUES (?, ?, ?, ?, ?)",
+        [("Asa Branca", "Luiz Gonzaga", "Baião", "(G)", "G D [solo] -- C"),
+         ("Sem Autor", None, None, "(Am)", "E eu vou pra casa")]
+    )
+    cursor.execute("INSERT INTO shows (data_show, local_show, artista) VALUES ('01/05/2026', 'Praça', 'Banda')")
+    id_show = cursor.lastrowid
+    cursor.executemany(
+        "INSERT INTO repertorios_shows (id_show, id_musica, sequencia, transposicao, arranjo_show) "
+        "SELECT ?, id, id, ?, ? FROM musicas WHERE musica = ?",
+        [(id_show, 2, "A E", "Asa Branca"), (id_show, 0, None, "Sem Autor")]
+    )
+    cursor.execute("INSERT INTO checklist (data, titulo) VALUES ('01/05/2026', 'Equipamento')")
+    id_checklist = cursor.lastrowid
+    cursor.executemany(
+        "INSERT INTO checklist_detail (id_checklist, descricao, status) VALUES (?, ?, ?)",
+        [(id_checklist, "Cabos", 1), (id_checklist, "Afinador", 0)]
+    )
+    db.conn.commit()
@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cifra import extrair_acordes, so_acordes, tokenizar_cifra, TEXTO, ACORDE, SETA, QUEBRA
+from utils.templates_pdf import processar_cifra_para_pdf
+
+def test_letra_que_comeca_com_nome_de_acorde_nao_e_indexada():
+    assert extrair_acordes("E eu vou pra casa\nA noite chegou\nEm breve") == frozenset()
+
+def test_linha_de_acordes_com_separadores_e_colchetes():
+    cifra = "Intro: G D Em (2x)\nAm7 - D [inicio pizzicato] F#m7(b5) -- C/E\nE eu vou [G]la"
+    assert extrair_acordes(cifra) == {"G", "D", "Em", "Am7", "F#m7(b5)", "C/E"}
+
+def test_colchetes_com_anotacao_nao_viram_acorde():
+    assert not so_acordes("A capella")
+    assert extrair_acordes("[A capella]\n[Am7 D]") == {"Am7", "D"}
+
+def test_tokens_da_marcacao():
+    assert tokenizar_cifra("G [solo -- 2x]--\nA [sem fim\n]") == (
+        (TEXTO, "G "), (ACORDE, "solo -- 2x"), (SETA, "→"), (QUEBRA, "\n"),
+        (TEXTO, "A [sem fim"), (QUEBRA, "\n"), (TEXTO, "]"),
+    )
+
+def test_pdf_segue_os_tokens_do_visualizador():
+    # A seta dentro dos colchetes fica como está, igual na tela
+    assert processar_cifra_para_pdf("G <b> & [solo -- 2x] -- D") == (
+        'G &lt;b&gt; &amp; <span class="colchetes">[solo -- 2x]</span> → D'
+    )
@@ -0,0 +1,133 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from conftest import popular
+from utils.backup import SECOES_BACKUP, caminho_banco, escrever_backup, escrever_diferencial, iterar_backup, iterar_diferencial
+from utils.diferencial import aplicar_alteracao, INSERIR, ALTERAR, REMOVER
+from utils.importacao import importar_backup, importar_diferencial
+from utils.verificacao import verificar_backup
+
+def _conteudo(db):
+    return {secao: sorted(map(repr, db.conn.execute(consulta).fetchall())) for secao, consulta in SECOES_BACKUP}
+
+@pytest.fixture
+def bancos(abrir_banco, tmp_path):
+    """Origem populada e destino restaurado do backup completo dela"""
+    origem = abrir_banco("origem")
+    popular(origem)
+    completo = str(tmp_path / "completo.ndjson")
+    escrever_backup(caminho_banco(origem.conn), completo)
+    destino = abrir_banco("destino")
+    importar_backup(destino.conn, iterar_backup(completo))
+    return origem, destino
+
+def _alterar(origem):
+    """Inclusão, renomeação de um pai com filhos, alteração e remoções"""
+    cursor = origem.cursor
+    cursor.execute("INSERT INTO musicas (musica, autor, tom, cifra) VALUES ('Nova', 'Autor', '(D)', 'D A')")
+    cursor.execute(
+        "INSERT INTO repertorios_shows (id_show, id_musica, sequencia) "
+        "SELECT s.id, m.id, 3 FROM shows s, musicas m WHERE m.musica = 'Nova'"
+    )
+    cursor.execute("UPDATE musicas SET musica = 'Asa Branca (ao vivo)', tom = '(A)' WHERE musica = 'Asa Branca'")
+    cursor.execute("UPDATE shows SET local_show = 'Teatro'")
+    cursor.execute("UPDATE checklist_detail SET status = 1 WHERE descricao = 'Afinador'")
+    cursor.execute("DELETE FROM checklist_detail WHERE descricao = 'Cabos'")
+    cursor.execute("DELETE FROM musicas WHERE musica = 'Sem Autor'")
+    origem.conn.commit()
+
+def test_diferencial_reaplica_inclusoes_alteracoes_e_remocoes(bancos, tmp_path):
+    origem, destino = bancos
+    _alterar(origem)
+    caminho = str(tmp_path / "diferencial.ndjson")
+    escrever_diferencial(caminho_banco(origem.conn), caminho)
+
+    aplicadas, sem_efeito, _ = importar_diferencial(destino.conn, iterar_diferencial(caminho))
+    assert aplicadas[INSERIR] and aplicadas[ALTERAR] and aplicadas[REMOVER]
+    assert sem_efeito == 0
+    assert _conteudo(destino) == _conteudo(origem)
+
+    # Reaplicar o mesmo arquivo não duplica nada
+    importar_diferencial(destino.conn, iterar_diferencial(caminho))
+    assert _conteudo(destino) == _conteudo(origem)
+
+def test_alteracao_sem_efeito(bancos):
+    _, destino = bancos
+    alteracoes = [
+        (REMOVER, "musicas", ["Não existe", None], None),
+        (INSERIR, "repertorios", None, ["02/02/2026", "Sem show", "Banda", "Asa Branca", "Luiz Gonzaga", 1, 0, None]),
+    ]
+    antes = _conteudo(destino)
+    aplicadas, sem_efeito, _ = importar_diferencial(destino.conn, alteracoes)
+    assert sem_efeito == 2
+    assert set(aplicadas.values()) == {0}
+    assert _conteudo(destino) == antes
+
+def test_erro_no_meio_desfaz_o_diferencial(bancos):
+    _, destino = bancos
+    antes = _conteudo(destino)
+    alteracoes = [
+        (INSERIR, "musicas", None, ["Nova", "Autor", None, "(D)", "D A"]),
+        (REMOVER, "checklists", ["01/05/2026", "Equipamento"], None),
+        (INSERIR, "secao_desconhecida", None, []),
+    ]
+    with pytest.raises(KeyError):
+        importar_diferencial(destino.conn, alteracoes)
+    assert not destino.conn.in_transaction
+    assert _conteudo(destino) == antes
+
+def test_aplicar_alteracao_grava_pela_chave_antiga(bancos):
+    _, destino = bancos
+    cursor = destino.conn.cursor()
+    linha = ["Asa Branca", "Luiz Gonzaga", "Baião", "(A)", "A E"]
+    assert aplicar_alteracao(cursor, ALTERAR, "musicas", ["Asa Branca", "Luiz Gonzaga"], linha)
+    # A música com o repertório continua a mesma, só com o tom novo
+    assert cursor.execute(
+        "SELECT m.tom, COUNT(rs.id) FROM musicas m JOIN repertorios_shows rs ON rs.id_musica = m.id "
+        "WHERE m.musica = 'Asa Branca'"
+    ).fetchall() == [("(A)", 1)]
+    assert cursor.execute("SELECT COUNT(*) FROM musicas").fetchone()[0] == 2
+
+def test_diferencial_alterado_falha_na_verificacao_e_nao_importa(bancos, tmp_path):
+    origem, destino = bancos
+    _alterar(origem)
+    caminho = str(tmp_path / "diferencial.ndjson")
+    escrever_diferencial(caminho_banco(origem.conn), caminho)
+
+    relatorio = verificar_backup(caminho)
+    assert relatorio["valido"], relatorio["problemas"]
+    assert relatorio["tipo"] == "diferencial"
+
+    with open(caminho, encoding="utf-8") as arquivo:
+        texto = arquivo.read()
+    alterado = str(tmp_path / "alterado.ndjson")
+    with open(alterado, "w", encoding="utf-8") as arquivo:
+        arquivo.write(texto.replace("Teatro", "Ginásio", 1))
+
+    assert not verificar_backup(alterado)["valido"]
+    antes = _conteudo(destino)
+    with pytest.raises(ValueError):
+        importar_diferencial(destino.conn, iterar_diferencial(alterado))
+    assert _conteudo(destino) == antes
+
+def test_exclusao_do_pai_registra_a_chave_dos_filhos(abrir_banco):
+    db = abrir_banco()
+    popular(db)
+    # Como as telas fazem: só o pai, os filhos saem pelo gatilho antes dele
+    db.cursor.execute("DELETE FROM musicas WHERE musica = 'Asa Branca'")
+    db.cursor.execute("DELETE FROM checklist")
+    db.conn.commit()
+
+    chaves = db.conn.execute(
+        "SELECT tabela, chave_antiga FROM alteracoes WHERE operacao = 'D' ORDER BY id"
+    ).fetchall()
+    assert chaves == [
+        ("repertorios_shows", '["01/05/2026","Praça","Banda","Asa Branca","Luiz Gonzaga"]'),
+        ("musicas", '["Asa Branca","Luiz Gonzaga"]'),
+        ("checklist_detail", '["01/05/2026","Equipamento","Cabos"]'),
+        ("checklist_detail", '["01/05/2026","Equipamento","Afinador"]'),
+        ("checklist", '["01/05/2026","Equipamento"]'),
+    ]
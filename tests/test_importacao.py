@@ -0,0 +1,93 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from conftest import popular
+from utils.backup import SECOES_BACKUP, caminho_banco, escrever_backup, iterar_backup
+from utils.importacao import importar_backup, ImportacaoCancelada
+from utils.verificacao import verificar_backup
+
+def _conteudo(db):
+    """Linhas de cada seção do backup, sem depender dos ids"""
+    return {secao: sorted(map(repr, db.conn.execute(consulta).fetchall())) for secao, consulta in SECOES_BACKUP}
+
+def _contagens(db):
+    return {secao: len(linhas) for secao, linhas in _conteudo(db).items()}
+
+@pytest.fixture
+def backup(abrir_banco, tmp_path):
+    """Banco de origem populado e o backup completo dele (NDJSON sem compactar)"""
+    origem = abrir_banco("origem")
+    popular(origem)
+    caminho = str(tmp_path / "backup.ndjson")
+    escrever_backup(caminho_banco(origem.conn), caminho)
+    return origem, caminho
+
+def test_backup_verificado_e_importado_em_banco_vazio(abrir_banco, backup):
+    origem, caminho = backup
+    destino = abrir_banco("destino")
+
+    relatorio = verificar_backup(caminho, destino.conn)
+    assert relatorio["valido"], relatorio["problemas"]
+    assert relatorio["novas"] == _contagens(origem)
+
+    carregadas, adicionadas, _ = importar_backup(destino.conn, iterar_backup(caminho))
+    assert carregadas == adicionadas == _contagens(origem)
+    assert _conteudo(destino) == _conteudo(origem)
+
+def test_reimportacao_nao_duplica(abrir_banco, backup):
+    origem, caminho = backup
+    destino = abrir_banco("destino")
+    importar_backup(destino.conn, iterar_backup(caminho))
+
+    assert verificar_backup(caminho, destino.conn)["novas"] == {secao: 0 for secao, _ in SECOES_BACKUP}
+    _, adicionadas, _ = importar_backup(destino.conn, iterar_backup(caminho))
+    assert set(adicionadas.values()) == {0}
+    assert _conteudo(destino) == _conteudo(origem)
+
+def test_repertorio_antigo_sem_tom_e_arranjo(abrir_banco):
+    db = abrir_banco()
+    linhas = [
+        ("musicas", ["Asa Branca", "Luiz Gonzaga", "Baião", "(G)", "G D"]),
+        ("shows", ["01/05/2026", "Praça", "Banda"]),
+        ("repertorios", ["01/05/2026", "Praça", "Banda", "Asa Branca", "Luiz Gonzaga", 1]),
+    ]
+    importar_backup(db.conn, linhas)
+    assert db.conn.execute(
+        "SELECT sequencia, transposicao, arranjo_show FROM repertorios_shows"
+    ).fetchall() == [(1, 0, None)]
+
+def test_cancelamento_desfaz_tudo(abrir_banco, backup):
+    _, caminho = backup
+    destino = abrir_banco("destino")
+    cancelar = threading.Event()
+    cancelar.set()
+
+    with pytest.raises(ImportacaoCancelada):
+        importar_backup(destino.conn, iterar_backup(caminho), cancelar=cancelar)
+    assert set(_contagens(destino).values()) == {0}
+    assert not destino.conn.in_transaction
+    assert destino.conn.execute("SELECT name FROM sqlite_temp_master WHERE type = 'table'").fetchall() == []
+
+def test_arquivo_alterado_falha_na_verificacao_e_nao_importa(abrir_banco, backup, tmp_path):
+    _, caminho = backup
+    with open(caminho, encoding="utf-8") as arquivo:
+        texto = arquivo.read()
+    alterado = str(tmp_path / "alterado.ndjson")
+    with open(alterado, "w", encoding="utf-8") as arquivo:
+        arquivo.write(texto.replace("Asa Branca", "Asa Preta", 1))
+    truncado = str(tmp_path / "truncado.ndjson")
+    with open(truncado, "w", encoding="utf-8") as arquivo:
+        arquivo.write(texto[:texto.rindex('{"conferencia"')])
+
+    destino = abrir_banco("destino")
+    for corrompido in (alterado, truncado):
+        relatorio = verificar_backup(corrompido, destino.conn)
+        assert not relatorio["valido"]
+
+        with pytest.raises(ValueError):
+            importar_backup(destino.conn, iterar_backup(corrompido))
+        assert set(_contagens(destino).values()) == {0}
@@ -0,0 +1,46 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from utils.indice_acordes import reindexar_pendentes, buscar_musicas_por_acordes, VERSAO_INDICE
+
+@pytest.fixture
+def db(abrir_banco):
+    return abrir_banco()
+
+def _inserir(db, nome, cifra):
+    db.cursor.execute("INSERT INTO musicas (musica, cifra) VALUES (?, ?)", (nome, cifra))
+    return db.cursor.lastrowid
+
+def test_musica_sem_acordes_e_processada_uma_vez(db):
+    _inserir(db, "Só letra", "E eu vou pra casa")
+    _inserir(db, "Sem cifra", None)
+    _inserir(db, "Com acordes", "G D Em")
+    assert reindexar_pendentes(db.cursor) == 3
+    assert reindexar_pendentes(db.cursor) == 0
+
+def test_cifra_alterada_volta_para_o_indice(db):
+    id_musica = _inserir(db, "Música", "E eu vou pra casa")
+    reindexar_pendentes(db.cursor)
+
+    db.cursor.execute("UPDATE musicas SET cifra = 'Am7 D' WHERE id = ?", (id_musica,))
+    assert reindexar_pendentes(db.cursor) == 1
+    assert buscar_musicas_por_acordes(db.cursor, ["Am7"]) == {id_musica}
+
+    db.cursor.execute("UPDATE musicas SET cifra = 'C G' WHERE id = ?", (id_musica,))
+    assert reindexar_pendentes(db.cursor) == 1
+    assert buscar_musicas_por_acordes(db.cursor, ["Am7"]) == set()
+
+def test_banco_da_versao_anterior_e_reindexado_e_marcado(db):
+    id_musica = _inserir(db, "Música", "G D")
+    db.cursor.execute("DELETE FROM musicas_indexadas")
+    db.cursor.execute("PRAGMA user_version = 1")
+    db.conn.commit()
+    db.conn.close()
+
+    db.conectar()
+    assert db.conn.execute("PRAGMA user_version").fetchone()[0] == VERSAO_INDICE
+    assert db.conn.execute("SELECT id_musica FROM musicas_indexadas").fetchall() == [(id_musica,)]
+    assert reindexar_pendentes(db.cursor) == 0
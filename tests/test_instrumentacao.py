@@ -0,0 +1,68 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.instrumentacao import RegistroConsultas, conectar_instrumentado
+
+def _conectar(tmp_path, registro):
+    conn = conectar_instrumentado(str(tmp_path / "teste.db"), registro, check_same_thread=False)
+    conn.cursor().execute("CREATE TABLE t (id INTEGER PRIMARY KEY, valor TEXT)")
+    conn.cursor().executemany("INSERT INTO t (valor) VALUES (?)", [(str(i),) for i in range(50)])
+    conn.commit()
+    return conn
+
+def test_leitura_interrompida_entra_no_resumo(tmp_path):
+    registro = RegistroConsultas()
+    conn = _conectar(tmp_path, registro)
+    cursor = conn.cursor()
+    cursor.execute("SELECT valor FROM t WHERE id > 3")
+    cursor.fetchone()
+    consultas = {consulta["sql"]: consulta for consulta in registro.resumo()["consultas"]}
+    assert consultas["SELECT valor FROM t WHERE id > ?"]["execucoes"] == 1
+    assert not registro.pendentes
+    # Já registrada: pedir o resumo de novo não conta outra vez
+    registro.resumo()
+    assert registro.consultas["SELECT valor FROM t WHERE id > ?"]["execucoes"] == 1
+    conn.close()
+
+def test_explain_fica_fora_dos_agregados(tmp_path):
+    registro = RegistroConsultas(limite_lenta_ms=0)
+    conn = _conectar(tmp_path, registro)
+    conn.cursor().execute("SELECT valor FROM t WHERE id = ?", (3,)).fetchall()
+    resumo = registro.resumo()
+    assert not any("EXPLAIN" in consulta["sql"] for consulta in resumo["consultas"])
+    lenta = next(lenta for lenta in resumo["lentas"] if lenta["sql"].startswith("SELECT valor"))
+    assert lenta["plano"] and lenta["plano_ms"] >= 0
+    conn.close()
+
+def test_resumo_com_cursores_de_varias_threads(tmp_path):
+    registro = RegistroConsultas()
+    conn = _conectar(tmp_path, registro)
+    parar = threading.Event()
+    erros = []
+
+    def consultar():
+        try:
+            while not parar.is_set():
+                cursor = conn.cursor()
+                cursor.execute("SELECT valor FROM t")
+                cursor.fetchone()
+        except Exception as ex:
+            erros.append(ex)
+
+    threads = [threading.Thread(target=consultar) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(200):
+            registro.resumo()
+    finally:
+        parar.set()
+        for thread in threads:
+            thread.join()
+    assert not erros
+    registro.resumo()
+    assert not registro.pendentes
+    conn.close()
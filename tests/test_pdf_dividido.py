@@ -0,0 +1,59 @@
+import os
+import sys
+import random
+import logging
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from pypdf import PdfReader
+from utils.exportacao import ServicoExportacaoPDF
+from utils.pdf import renderizar_pdf
+
+CIFRA_EXEMPLO = "Am7 - D [inicio pizzicato] G - C [fim pizzicato] Am7 - D -- G - C - D "
+
+@pytest.fixture(scope="module")
+def servico():
+    logging.disable(logging.WARNING)
+    servico = ServicoExportacaoPDF(max_workers=4)
+    yield servico
+    servico.encerrar()
+    logging.disable(logging.NOTSET)
+
+def _repertorio(semente, num_musicas=40):
+    """Cifras de tamanhos irregulares, em que a paginação estimada erra as quebras"""
+    aleatorio = random.Random(semente)
+    return [
+        (i, f"Música {i}", "(G)", (CIFRA_EXEMPLO * aleatorio.randint(1, 9))[:aleatorio.randint(40, 600)], i)
+        for i in range(1, num_musicas + 1)
+    ]
+
+def _exportar(servico, repertorio, destino):
+    terminou = threading.Event()
+    erros = []
+
+    def concluir(caminho, erro):
+        if erro:
+            erros.append(erro)
+        terminou.set()
+
+    servico.exportar("cifrado", repertorio, destino, concluir)
+    assert terminou.wait(120)
+    if erros:
+        raise erros[0]
+
+def _paginas(caminho):
+    return [pagina.extract_text() for pagina in PdfReader(caminho).pages]
+
+@pytest.mark.parametrize("semente", range(6))
+def test_dividido_igual_ao_inteiro(tmp_path, servico, semente):
+    repertorio = _repertorio(semente)
+    assert len(servico._dividir("cifrado", repertorio)) > 1
+
+    inteiro = renderizar_pdf("cifrado", repertorio, str(tmp_path / "inteiro.pdf"))
+    dividido = str(tmp_path / "dividido.pdf")
+    _exportar(servico, repertorio, dividido)
+
+    assert _paginas(dividido) == _paginas(inteiro)
+    assert not [nome for nome in os.listdir(tmp_path) if nome.startswith("dividido.pdf.")]
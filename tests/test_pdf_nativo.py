@@ -0,0 +1,42 @@
+import os
+import sys
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from pypdf import PdfReader
+from utils.pdf import renderizar_pdf
+
+def _linhas(caminho):
+    """Por página: (texto, x, y) de cada trecho desenhado, na ordem do arquivo"""
+    paginas = []
+    for pagina in PdfReader(caminho).pages:
+        trechos = []
+
+        def visitar(texto, cm, tm, fonte, tamanho):
+            if texto.strip():
+                trechos.append((texto.strip(), cm[4] + tm[4] * cm[0], cm[5] + tm[5] * cm[3]))
+
+        pagina.extract_text(visitor_text=visitar)
+        paginas.append(trechos)
+    return paginas
+
+def _numeros(pagina):
+    return [(texto, x, y) for texto, x, y in pagina if texto.endswith(".") and texto[:-1].isdigit()]
+
+@pytest.mark.parametrize("num_musicas", [1, 10, 40, 41, 121])
+def test_nativo_igual_ao_html(tmp_path, num_musicas):
+    logging.disable(logging.WARNING)
+    repertorio = [(i, f"Música número {i}", "(F#m)") for i in range(1, num_musicas + 1)]
+    html = _linhas(renderizar_pdf("simplificado", repertorio, str(tmp_path / "html.pdf"), backend="html"))
+    nativo = _linhas(renderizar_pdf("simplificado", repertorio, str(tmp_path / "nativo.pdf"), backend="nativo"))
+
+    assert len(nativo) == len(html) == 1
+    numeros_html, numeros_nativo = _numeros(html[0]), _numeros(nativo[0])
+    # Mesma ordem (coluna por coluna) e mesma posição de cada número
+    assert [texto for texto, _, _ in numeros_nativo] == [f"{i}." for i in range(1, num_musicas + 1)]
+    assert [texto for texto, _, _ in numeros_html] == [texto for texto, _, _ in numeros_nativo]
+    for (_, x_html, y_html), (_, x_nativo, y_nativo) in zip(numeros_html, numeros_nativo):
+        assert x_nativo == pytest.approx(x_html, abs=0.5)
+        assert y_nativo == pytest.approx(y_html, abs=0.5)
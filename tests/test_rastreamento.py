@@ -0,0 +1,151 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flet as ft
+from utils import rastreamento
+from utils.rastreamento import Rastreador, trecho, somar_banco
+
+class PaginaFalsa:
+    """O que o Rastreador usa de uma página do Flet: entrega de eventos, run_thread e update"""
+
+    def __init__(self):
+        self._index = {}
+        self.updates = []
+
+    async def on_event_async(self, e):
+        controle = self._index[e.target]
+        handler = controle.event_handlers.get(e.name)
+        if asyncio.iscoroutinefunction(handler):
+            await handler(e)
+        else:
+            self.run_thread(handler, e)
+
+    def run_thread(self, handler, *argumentos):
+        handler(*argumentos)
+
+    def update(self, *controles):
+        self.updates.append(controles)
+
+    def add(self, *controles):
+        self.update(*controles)
+
+class Evento:
+    def __init__(self, target, name, control):
+        self.target = target
+        self.name = name
+        self.control = control
+
+def _linhas(rastreador):
+    with open(rastreador.caminho, encoding="utf-8") as arquivo:
+        return [json.loads(linha) for linha in arquivo]
+
+def _disparar(pagina, controle, nome):
+    pagina._index["c1"] = controle
+    asyncio.run(pagina.on_event_async(Evento("c1", nome, controle)))
+
+def test_handlers_sincronos_e_async_com_trechos(tmp_path):
+    rastreador = Rastreador(str(tmp_path))
+    pagina = PaginaFalsa()
+    assert rastreador.instalar(pagina)
+
+    def marcar(e):
+        with trecho("gravar"):
+            somar_banco(0.002, consulta=True)
+        pagina.update()
+
+    async def carregar(e):
+        await asyncio.sleep(0)
+        pagina.update()
+
+    _disparar(pagina, ft.Checkbox(on_change=marcar), "change")
+    _disparar(pagina, ft.TextButton(on_click=carregar), "click")
+    sincrona, assincrona = _linhas(rastreador)
+    assert sincrona["acao"].startswith("Checkbox.change → ") and sincrona["acao"].endswith("marcar")
+    assert sincrona["consultas"] == 1 and sincrona["updates"] == 1
+    assert sincrona["trechos"]["gravar"]["banco_ms"] == 2.0
+    assert assincrona["acao"].startswith("TextButton.click → ") and assincrona["acao"].endswith("carregar")
+    assert assincrona["updates"] == 1
+
+def test_control_update_conta_como_update(tmp_path):
+    rastreador = Rastreador(str(tmp_path))
+    pagina = PaginaFalsa()
+    rastreador.instalar(pagina)
+    texto = ft.Text("a")
+    # Control.update() do Flet chama page.update(controle) na página em que o controle está
+    texto._Control__page = pagina
+
+    def mudar(e):
+        texto.value = "b"
+        texto.update()
+
+    _disparar(pagina, ft.TextButton(on_click=mudar), "click")
+    linha, = _linhas(rastreador)
+    assert linha["updates"] == 1
+    assert pagina.updates == [(texto,)]
+
+def test_evento_async_que_repassa_para_sincrono_grava_uma_linha(tmp_path):
+    rastreador = Rastreador(str(tmp_path))
+    pagina = PaginaFalsa()
+    rastreador.instalar(pagina)
+
+    def escolhido(e):
+        pass
+
+    # Como o EventHandler dos controles com conversão do resultado (FilePicker, ...)
+    async def repassar(e):
+        pagina.run_thread(escolhido, e)
+
+    _disparar(pagina, ft.TextButton(on_click=repassar), "click")
+    linha, = _linhas(rastreador)
+    assert linha["acao"].endswith("escolhido")
+
+def test_acao_com_erro_e_ociosidade(tmp_path):
+    rastreador = Rastreador(str(tmp_path))
+    try:
+        with rastreador.acao("falha"):
+            assert rastreador.segundos_ocioso() == 0
+            raise ValueError("x")
+    except ValueError:
+        pass
+    linha, = _linhas(rastreador)
+    assert linha["erro"] == "ValueError: x"
+    assert rastreador.segundos_ocioso() >= 0
+
+def test_arquivo_gira_e_guarda_os_antigos(tmp_path, monkeypatch):
+    monkeypatch.setattr(rastreamento, "TAMANHO_MAXIMO", 300)
+    rastreador = Rastreador(str(tmp_path))
+    for numero in range(40):
+        with rastreador.acao(f"acao {numero % 2}"):
+            pass
+    arquivos = rastreador.arquivos()
+    assert len(arquivos) == rastreamento.ARQUIVOS_GUARDADOS + 1
+    assert arquivos[-1] == rastreador.caminho
+    assert all(os.path.getsize(caminho) <= 300 for caminho in arquivos)
+    # O mais novo fica no atual e o mais antigo guardado no .3
+    assert _linhas(rastreador)[-1]["acao"] == "acao 1"
+    assert not os.path.exists(f"{rastreador.caminho}.{rastreamento.ARQUIVOS_GUARDADOS + 1}")
+
+def test_resumo_por_acao(tmp_path):
+    rastreador = Rastreador(str(tmp_path))
+    for total in (10, 20, 30, 40):
+        rastreador.gravar({
+            "acao": "lenta", "total_ms": total, "banco_ms": 5, "consultas": 2, "update_ms": 1,
+            "updates": 1, "controles_ms": total - 6, "trechos": {"cards": {"ms": 4}} if total > 20 else {},
+            "erro": "ValueError: x" if total == 40 else None,
+        })
+    rastreador.gravar({
+        "acao": "rapida", "total_ms": 1, "banco_ms": 0, "consultas": 0, "update_ms": 0,
+        "updates": 0, "controles_ms": 1, "erro": None,
+    })
+    with open(rastreador.caminho, "a", encoding="utf-8") as arquivo:
+        arquivo.write('{"acao": "cortad')  # fechamento abrupto no meio da linha
+    lenta, rapida = rastreador.resumir()
+    assert lenta["acao"] == "lenta" and lenta["vezes"] == 4
+    assert lenta["total_ms"] == 25 and lenta["banco_ms"] == 5
+    assert lenta["trechos"] == {"cards": 2.0}
+    assert lenta["erros"] == 1
+    assert rapida["acao"] == "rapida" and rapida["trechos"] == {}
@@ -0,0 +1,89 @@
+import os
+import sys
+import itertools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from conftest import popular
+from utils.backup import caminho_banco, escrever_pacote_sincronizacao, iterar_backup, ler_cabecalho
+from utils.sincronizacao import sincronizar
+
+@pytest.fixture
+def sincronizar_bancos(tmp_path):
+    """Exporta o pacote de um banco e o mescla em outro; retorna o resultado de sincronizar"""
+    numeros = itertools.count()
+
+    def executar(origem, destino):
+        caminho = str(tmp_path / f"pacote-{next(numeros)}.ndjson")
+        escrever_pacote_sincronizacao(caminho_banco(origem.conn), caminho)
+        return sincronizar(destino.conn, iterar_backup(caminho), ler_cabecalho(caminho))
+
+    return executar
+
+def _musicas(db):
+    return db.conn.execute(
+        "SELECT m.musica, m.tom, COUNT(rs.id) FROM musicas m "
+        "LEFT JOIN repertorios_shows rs ON rs.id_musica = m.id GROUP BY m.id ORDER BY m.musica"
+    ).fetchall()
+
+@pytest.fixture
+def aparelhos(abrir_banco, sincronizar_bancos):
+    """Dois aparelhos já sincronizados: o segundo recebeu tudo do primeiro"""
+    a = abrir_banco("a")
+    popular(a)
+    b = abrir_banco("b")
+    sincronizar_bancos(a, b)
+    assert _musicas(b) == _musicas(a)
+    return a, b
+
+def test_renomeacao_segue_pelo_uuid(aparelhos, sincronizar_bancos):
+    a, b = aparelhos
+    a.cursor.execute("UPDATE musicas SET musica = 'Asa Branca (ao vivo)' WHERE musica = 'Asa Branca'")
+    a.conn.commit()
+
+    resumo, conflitos, _ = sincronizar_bancos(a, b)
+    assert resumo["musicas"]["atualizadas"] == 1
+    assert resumo["musicas"]["incluidas"] == 0
+    assert conflitos == []
+    # Renomeada no lugar: o repertório continua apontando para ela
+    assert _musicas(b) == _musicas(a)
+
+def test_remocao_segue_pela_lapide_e_nao_volta(aparelhos, sincronizar_bancos):
+    a, b = aparelhos
+    a.cursor.execute("DELETE FROM musicas WHERE musica = 'Asa Branca'")
+    a.conn.commit()
+
+    resumo, _, _ = sincronizar_bancos(a, b)
+    assert resumo["musicas"]["removidas"] == 1
+    assert resumo["repertorios"]["removidas"] == 1
+    assert _musicas(b) == _musicas(a) == [("Sem Autor", "(Am)", 1)]
+    assert b.conn.execute("SELECT COUNT(*) FROM remocoes WHERE tabela = 'musicas'").fetchone()[0] == 1
+
+    # O pacote de volta não recria a música no aparelho que a apagou
+    sincronizar_bancos(b, a)
+    assert _musicas(a) == [("Sem Autor", "(Am)", 1)]
+
+def test_primeira_sincronizacao_marca_conflitos_e_fica_o_mais_novo(abrir_banco, sincronizar_bancos):
+    a = abrir_banco("a")
+    b = abrir_banco("b")
+    for db, tom, carimbo in ((a, "(G)", "2026-01-01T10:00:00.000Z"), (b, "(A)", "2026-01-02T10:00:00.000Z")):
+        db.cursor.execute(
+            "INSERT INTO musicas (musica, autor, tom, atualizado_em) VALUES ('Asa Branca', 'Luiz Gonzaga', ?, ?)",
+            (tom, carimbo)
+        )
+        db.cursor.execute("INSERT INTO musicas (musica, autor, tom) VALUES ('Igual', NULL, '(C)')")
+        db.conn.commit()
+
+    _, conflitos, _ = sincronizar_bancos(a, b)
+    # Criadas nos dois aparelhos antes da primeira sincronização: só a que difere é conflito
+    assert conflitos == [
+        ("musicas", "Asa Branca", "2026-01-02T10:00:00.000Z", "2026-01-01T10:00:00.000Z", "local")
+    ]
+    assert _musicas(b) == [("Asa Branca", "(A)", 0), ("Igual", "(C)", 0)]
+
+    _, conflitos, _ = sincronizar_bancos(b, a)
+    assert [conflito[-1] for conflito in conflitos] == ["remoto"]
+    assert _musicas(a) == _musicas(b)
+    # Depois disso os dois usam o mesmo uuid para cada música
+    assert sorted(a.conn.execute("SELECT uuid FROM musicas")) == sorted(b.conn.execute("SELECT uuid FROM musicas"))
@@ -0,0 +1,45 @@
+import os
+import sys
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.transposicao import transpor_cifra, transpor_show
+
+def test_letra_nao_e_transposta():
+    assert transpor_cifra("E eu vou pra casa\n[G]la", 2) == "E eu vou pra casa\n[A]la"
+    cifra = "A noite chegou\nEm breve\nEm [C]tudo passa"
+    assert transpor_cifra(cifra, 2) == "A noite chegou\nEm breve\nEm [D]tudo passa"
+
+def test_linha_de_acordes_e_transposta():
+    cifra = "Intro: G D Em (2x)\nE eu vou pra casa\nAm7 - D [inicio pizzicato] -- F#m7(b5) C/E"
+    assert transpor_cifra(cifra, 2) == (
+        "Intro: A E F#m (2x)\nE eu vou pra casa\nBm7 - E [inicio pizzicato] -- G#m7(b5) D/F#"
+    )
+
+def _banco():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript('''
+        CREATE TABLE musicas (id INTEGER PRIMARY KEY, musica TEXT, autor TEXT, estilo TEXT, tom TEXT, cifra TEXT);
+        CREATE TABLE musica_acordes (id_musica INTEGER, acorde TEXT, PRIMARY KEY (id_musica, acorde));
+        CREATE TABLE musicas_indexadas (id_musica INTEGER PRIMARY KEY);
+        CREATE TABLE repertorios_shows (
+            id INTEGER PRIMARY KEY, id_show INTEGER, id_musica INTEGER, sequencia INTEGER,
+            transposicao INTEGER DEFAULT 0, arranjo_show TEXT, UNIQUE(id_show, id_musica)
+        );
+        INSERT INTO musicas VALUES (1, 'X', NULL, NULL, '(C)', 'C G'), (2, 'X (versão em D)', NULL, NULL, '(D)', 'D A');
+        INSERT INTO repertorios_shows VALUES (1, 1, 2, 1, 0, NULL), (2, 1, 1, 2, 2, NULL);
+    ''')
+    return conn
+
+def test_versao_que_ja_esta_no_show_nao_duplica():
+    conn = _banco()
+    resultado = transpor_show(conn, 1, 0, modo="versao")
+    assert resultado["repetidas"] == ["X"]
+    assert conn.execute("SELECT id, id_musica FROM repertorios_shows").fetchall() == [(1, 2)]
+
+    conn = _banco()
+    resultado = transpor_show(conn, 1, 2, modo="versao")
+    itens = conn.execute("SELECT id_musica FROM repertorios_shows").fetchall()
+    assert len(itens) == 1 and resultado["repetidas"] == ["X"]
+    assert conn.execute("SELECT musica FROM musicas WHERE id=?", itens[0]).fetchone() == ("X (versão em E)",)
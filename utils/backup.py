@@ -0,0 +1,414 @@
+import os
+import gzip
+import json
+import hashlib
+import sqlite3
+from datetime import datetime
+from utils.diferencial import ultimo_backup, ultima_alteracao, registrar_backup, coletar_alteracoes
+from utils.sincronizacao import SECOES_SINCRONIZACAO, TIPO_PACOTE, dispositivo_local, agora, inicio_pacote, recebidos
+
+FORMATO_NDJSON = "repertorio-ndjson"
+VERSAO_FORMATO = 1
+LINHAS_POR_LOTE = 500
+TAMANHO_BLOCO = 64 * 1024
+ESPACOS = " \t\r\n"
+# Cabeçalhos com "conferencia" terminam com {"conferencia": {seção: {"linhas", "sha256"}}}:
+# o sha256 é do texto das linhas da seção exatamente como gravadas
+CONFERENCIA = "sha256"
+
+# Seções do backup na ordem de restauração; as colunas são as mesmas do backup JSON antigo
+# (mais o tom e o arranjo do show nos repertórios), para a importação tratar os dois formatos igual
+SECOES_BACKUP = (
+    ("musicas", "SELECT musica, autor, estilo, tom, cifra FROM musicas"),
+    ("shows", "SELECT data_show, local_show, artista FROM shows"),
+    ("repertorios", '''
+        SELECT s.data_show, s.local_show, s.artista, m.musica, m.autor, rs.sequencia,
+               rs.transposicao, rs.arranjo_show
+        FROM repertorios_shows rs
+        JOIN shows s ON rs.id_show = s.id
+        JOIN musicas m ON rs.id_musica = m.id
+    '''),
+    ("checklists", "SELECT data, titulo FROM checklist"),
+    ("checklist_detalhes", '''
+        SELECT c.data, c.titulo, cd.descricao, cd.status
+        FROM checklist_detail cd
+        JOIN checklist c ON cd.id_checklist = c.id
+    '''),
+)
+
+def caminho_banco(conn):
+    """Arquivo do banco aberto na conexão"""
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+def nome_arquivo_backup(compactar=True, tipo="completo"):
+    """Nome padrão do arquivo de backup (ou pacote de sincronização) com a data de hoje"""
+    data_atual = datetime.now().strftime("%d-%m-%Y")
+    sufixo = "" if tipo == "completo" else f"-{tipo}"
+    return f"backup-app-repertorio-{data_atual}{sufixo}.ndjson" + (".gz" if compactar else "")
+
+def _abrir_para_escrita(caminho, compactar):
+    """Abre o arquivo de saída em texto, com gzip se pedido"""
+    if compactar:
+        return gzip.open(caminho, 'wt', encoding='utf-8', compresslevel=6)
+    return open(caminho, 'w', encoding='utf-8')
+
+def _gravar_conferencia(arquivo, conferencia):
+    """Última linha do arquivo: linhas e sha256 de cada seção (sem ela, o arquivo está truncado)"""
+    arquivo.write(json.dumps({"conferencia": conferencia}, ensure_ascii=False) + "\n")
+
+def _gravar_secoes(conn, arquivo, secoes, cabecalho, ao_progresso=None, parametros=()):
+    """Grava o cabeçalho, com os totais por seção, as seções lote a lote e a conferência
+
+    Retorna as linhas gravadas.
+    """
+    totais = {
+        secao: conn.execute(f"SELECT COUNT(*) FROM ({consulta})", parametros).fetchone()[0]
+        for secao, consulta in secoes
+    }
+    total = sum(totais.values())
+    gravadas = 0
+    arquivo.write(json.dumps(dict(cabecalho, totais=totais, conferencia=CONFERENCIA), ensure_ascii=False) + "\n")
+
+    conferencia = {}
+    for secao, consulta in secoes:
+        arquivo.write(json.dumps({"secao": secao}, ensure_ascii=False) + "\n")
+        soma = hashlib.sha256()
+        linhas_secao = 0
+        cursor = conn.execute(consulta, parametros)
+        while True:
+            linhas = cursor.fetchmany(LINHAS_POR_LOTE)
+            if not linhas:
+                break
+            texto = "".join(json.dumps(linha, ensure_ascii=False) + "\n" for linha in linhas)
+            arquivo.write(texto)
+            soma.update(texto.encode("utf-8"))
+            linhas_secao += len(linhas)
+            gravadas += len(linhas)
+            if ao_progresso:
+                ao_progresso(gravadas, total)
+        conferencia[secao] = {"linhas": linhas_secao, "sha256": soma.hexdigest()}
+    _gravar_conferencia(arquivo, conferencia)
+    return gravadas
+
+def escrever_backup(caminho_db, destino, compactar=None, ao_progresso=None):
+    """Grava o backup seção por seção e linha por linha (NDJSON), com memória limitada
+
+    Usa uma conexão própria dentro de uma transação de leitura, para que o backup seja
+    um retrato consistente mesmo com a interface gravando ao mesmo tempo.
+    ao_progresso(linhas_gravadas, total_linhas) é chamado a cada lote.
+    Retorna o total de linhas gravadas.
+    """
+    if compactar is None:
+        compactar = destino.endswith(".gz")
+
+    conn = sqlite3.connect(caminho_db)
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    try:
+        conn.execute("BEGIN")
+        # Lido na mesma transação: o próximo backup diferencial começa exatamente aqui
+        ate_alteracao = ultima_alteracao(conn.cursor())
+        criado_em = datetime.now().isoformat(timespec="seconds")
+        cabecalho = {
+            "formato": FORMATO_NDJSON,
+            "versao": VERSAO_FORMATO,
+            "tipo": "completo",
+            "criado_em": criado_em
+        }
+        with _abrir_para_escrita(temporario, compactar) as arquivo:
+            gravadas = _gravar_secoes(conn, arquivo, SECOES_BACKUP, cabecalho, ao_progresso)
+
+        os.replace(temporario, destino)
+        conn.commit()
+        registrar_backup(conn, "completo", ate_alteracao, criado_em)
+        return gravadas
+    finally:
+        conn.close()
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+def escrever_diferencial(caminho_db, destino, compactar=None):
+    """Grava só o que mudou desde o último backup (completo ou diferencial)
+
+    Cada linha depois do cabeçalho é [operação, seção, chave antiga, linha atual], na ordem
+    em que deve ser reaplicada. Levanta ValueError se ainda não houve um backup completo.
+    Retorna a quantidade de alterações gravadas.
+    """
+    if compactar is None:
+        compactar = destino.endswith(".gz")
+
+    conn = sqlite3.connect(caminho_db)
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    try:
+        conn.execute("BEGIN")
+        cursor = conn.cursor()
+        anterior = ultimo_backup(cursor)
+        if anterior is None:
+            raise ValueError("Faça um backup completo antes do primeiro diferencial")
+        desde, base = anterior
+        ate_alteracao = ultima_alteracao(cursor)
+        alteracoes = coletar_alteracoes(cursor, desde, ate_alteracao)
+
+        criado_em = datetime.now().isoformat(timespec="seconds")
+        with _abrir_para_escrita(temporario, compactar) as arquivo:
+            cabecalho = {
+                "formato": FORMATO_NDJSON,
+                "versao": VERSAO_FORMATO,
+                "tipo": "diferencial",
+                "criado_em": criado_em,
+                "desde": base,
+                "alteracoes": len(alteracoes),
+                "conferencia": CONFERENCIA
+            }
+            arquivo.write(json.dumps(cabecalho, ensure_ascii=False) + "\n")
+            texto = "".join(json.dumps(alteracao, ensure_ascii=False) + "\n" for alteracao in alteracoes)
+            arquivo.write(texto)
+            _gravar_conferencia(arquivo, {"alteracoes": {
+                "linhas": len(alteracoes), "sha256": hashlib.sha256(texto.encode("utf-8")).hexdigest()
+            }})
+
+        os.replace(temporario, destino)
+        conn.commit()
+        registrar_backup(conn, "diferencial", ate_alteracao, criado_em)
+        return len(alteracoes)
+    finally:
+        conn.close()
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+def escrever_pacote_sincronizacao(caminho_db, destino, compactar=None, ao_progresso=None, completo=False):
+    """Grava o pacote de sincronização: registros com uuid e carimbo, mais as remoções
+
+    Vai só o que mudou desde o ponto que todos os aparelhos conhecidos já confirmaram
+    (ou tudo, com completo=True). O cabeçalho identifica o aparelho, a hora do retrato
+    (gerado_em) e até onde já aplicamos os pacotes de cada aparelho (recebidos).
+    Retorna o total de linhas gravadas.
+    """
+    if compactar is None:
+        compactar = destino.endswith(".gz")
+
+    conn = sqlite3.connect(caminho_db)
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    try:
+        cursor = conn.cursor()
+        # Antes de abrir a transação: o que for gravado entre um e outro só vai repetido
+        gerado_em = agora(cursor)
+        conn.execute("BEGIN")
+        desde = "" if completo else inicio_pacote(cursor)
+        cabecalho = {
+            "formato": FORMATO_NDJSON,
+            "versao": VERSAO_FORMATO,
+            "tipo": TIPO_PACOTE,
+            "criado_em": datetime.now().isoformat(timespec="seconds"),
+            "dispositivo": dispositivo_local(cursor),
+            "gerado_em": gerado_em,
+            "desde": desde,
+            "recebidos": recebidos(cursor)
+        }
+        with _abrir_para_escrita(temporario, compactar) as arquivo:
+            gravadas = _gravar_secoes(
+                conn, arquivo, SECOES_SINCRONIZACAO, cabecalho, ao_progresso, parametros={"desde": desde}
+            )
+        os.replace(temporario, destino)
+        return gravadas
+    finally:
+        conn.close()
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+class Conferencia:
+    """Conta e soma (sha256) as linhas lidas de cada seção para comparar com o fim do arquivo"""
+
+    def __init__(self):
+        self.ativa = False
+        self.linhas = {}
+        self.somas = {}
+        self.esperada = None
+
+    def registrar(self, secao, texto):
+        if self.ativa:
+            if secao not in self.somas:
+                self.somas[secao] = hashlib.sha256()
+                self.linhas[secao] = 0
+            self.somas[secao].update(texto.encode("utf-8"))
+            self.linhas[secao] += 1
+
+    def problemas(self):
+        """Divergências entre o que foi lido e a conferência gravada (lista vazia se confere)"""
+        if not self.ativa:
+            return []
+        if self.esperada is None:
+            return ["O arquivo termina antes da conferência final (backup truncado)"]
+        problemas = []
+        for secao in sorted(set(self.esperada) | set(self.linhas), key=str):
+            esperada = self.esperada.get(secao, {"linhas": 0, "sha256": hashlib.sha256().hexdigest()})
+            lidas = self.linhas.get(secao, 0)
+            soma = self.somas[secao].hexdigest() if secao in self.somas else hashlib.sha256().hexdigest()
+            if lidas != esperada.get("linhas"):
+                problemas.append(f"Seção {secao}: {lidas} linhas lidas, {esperada.get('linhas')} gravadas")
+            elif soma != esperada.get("sha256"):
+                problemas.append(f"Seção {secao}: o conteúdo não confere com o sha256 gravado")
+        return problemas
+
+    def conferir(self):
+        problemas = self.problemas()
+        if problemas:
+            raise ValueError("Backup corrompido: " + "; ".join(problemas))
+
+def _abrir_para_leitura(caminho):
+    """Abre o backup em texto, descompactando se for gzip (detectado pelo conteúdo)"""
+    with open(caminho, 'rb') as arquivo:
+        compactado = arquivo.read(2) == b"\x1f\x8b"
+    if compactado:
+        return gzip.open(caminho, 'rt', encoding='utf-8')
+    return open(caminho, 'r', encoding='utf-8')
+
+def _iterar_json_antigo(arquivo, inicio=""):
+    """Gera (seção, linha) do JSON antigo {"secao": [[...], ...], ...} lendo em blocos
+
+    Cada linha é decodificada assim que chega inteira no buffer, então a memória fica
+    limitada ao bloco atual mesmo em backups antigos grandes.
+    """
+    decodificador = json.JSONDecoder()
+    buffer = inicio
+    pos = 0
+    fim_arquivo = False
+
+    def ler_bloco():
+        nonlocal buffer, pos, fim_arquivo
+        bloco = arquivo.read(TAMANHO_BLOCO)
+        fim_arquivo = not bloco
+        buffer = buffer[pos:] + bloco
+        pos = 0
+
+    def proximo():
+        """Próximo caractere significativo (sem consumir); vazio no fim do arquivo"""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ESPACOS:
+                pos += 1
+            if pos < len(buffer) or fim_arquivo:
+                return buffer[pos:pos + 1]
+            ler_bloco()
+
+    def consumir(esperado):
+        nonlocal pos
+        if proximo() != esperado:
+            raise ValueError(f"Backup inválido: esperado '{esperado}' na posição {pos}")
+        pos += 1
+
+    def ler_valor():
+        nonlocal pos
+        proximo()
+        while True:
+            try:
+                valor, fim = decodificador.raw_decode(buffer, pos)
+                # Um valor que termina junto com o buffer pode estar cortado (ex.: número)
+                if fim < len(buffer) or fim_arquivo:
+                    pos = fim
+                    return valor
+            except ValueError:
+                if fim_arquivo:
+                    raise
+            ler_bloco()
+
+    consumir("{")
+    if proximo() == "}":
+        return
+    while True:
+        secao = ler_valor()
+        consumir(":")
+        if proximo() == "[":
+            consumir("[")
+            if proximo() != "]":
+                while True:
+                    yield secao, ler_valor()
+                    if proximo() != ",":
+                        break
+                    consumir(",")
+            consumir("]")
+        else:
+            ler_valor()
+        if proximo() != ",":
+            break
+        consumir(",")
+    consumir("}")
+
+def ler_cabecalho(caminho):
+    """Cabeçalho do backup NDJSON (com os totais por seção); None no formato antigo"""
+    with _abrir_para_leitura(caminho) as arquivo:
+        try:
+            cabecalho = json.loads(arquivo.readline(TAMANHO_BLOCO))
+        except ValueError:
+            return None
+    if isinstance(cabecalho, dict) and cabecalho.get("formato") == FORMATO_NDJSON:
+        return cabecalho
+    return None
+
+def iterar_backup(caminho, conferencia=None):
+    """Gera (seção, linha) de um backup NDJSON ou do JSON antigo, sem carregá-lo inteiro
+
+    Se o arquivo tiver conferência, ela é verificada no fim e um arquivo truncado ou alterado
+    levanta ValueError (quem importa desfaz a transação). Passe uma Conferencia para
+    recolher as divergências em vez de levantar.
+    """
+    with _abrir_para_leitura(caminho) as arquivo:
+        # Leitura limitada: no JSON antigo sem quebras de linha a "primeira linha" é o arquivo todo
+        primeira = arquivo.readline(TAMANHO_BLOCO)
+        try:
+            cabecalho = json.loads(primeira)
+        except ValueError:
+            cabecalho = None
+
+        if not (isinstance(cabecalho, dict) and cabecalho.get("formato") == FORMATO_NDJSON):
+            yield from _iterar_json_antigo(arquivo, primeira)
+            return
+
+        levantar = conferencia is None
+        if levantar:
+            conferencia = Conferencia()
+        conferencia.ativa = cabecalho.get("conferencia") == CONFERENCIA
+        secao = None
+        for texto in arquivo:
+            if not texto.strip():
+                continue
+            item = json.loads(texto)
+            if isinstance(item, dict):
+                if "conferencia" in item:
+                    conferencia.esperada = item["conferencia"]
+                else:
+                    secao = item.get("secao")
+            else:
+                conferencia.registrar(secao, texto)
+                yield secao, item
+        if levantar:
+            conferencia.conferir()
+
+def iterar_diferencial(caminho, conferencia=None):
+    """Gera (operação, seção, chave, linha) de um backup diferencial, na ordem de aplicação
+
+    A conferência é tratada como em iterar_backup (a seção é "alteracoes").
+    """
+    with _abrir_para_leitura(caminho) as arquivo:
+        cabecalho = json.loads(arquivo.readline())
+        levantar = conferencia is None
+        if levantar:
+            conferencia = Conferencia()
+        conferencia.ativa = cabecalho.get("conferencia") == CONFERENCIA
+        for texto in arquivo:
+            if not texto.strip():
+                continue
+            item = json.loads(texto)
+            if isinstance(item, dict):
+                conferencia.esperada = item.get("conferencia")
+            else:
+                conferencia.registrar("alteracoes", texto)
+                yield tuple(item)
+        if levantar:
+            conferencia.conferir()
+
+def carregar_backup(caminho):
+    """Lê o backup (qualquer formato) em um dicionário seção -> lista de linhas"""
+    dados = {secao: [] for secao, _ in SECOES_BACKUP}
+    for secao, linha in iterar_backup(caminho):
+        dados.setdefault(secao, []).append(linha)
+    return dados
@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import hashlib
+import shutil
+import threading
+from collections import OrderedDict
+from utils.pdf import VERSAO_TEMPLATE, backend_pdf
+
+DIRETORIO_CACHE_PADRAO = "cache_pdf"
+LIMITE_CACHE_PADRAO = 200 * 1024 * 1024  # 200 MB
+
+def calcular_chave_pdf(tipo, repertorio):
+    """Gera o hash do conteúdo que determina o PDF (tipo, motor, ordem, nomes, tons e cifras)"""
+    h = hashlib.sha256()
+    h.update(f"v{VERSAO_TEMPLATE}|{tipo}|{backend_pdf(tipo)}".encode("utf-8"))
+    for musica in repertorio:
+        # Separadores de controle evitam colisão entre campos concatenados
+        campos = (str(musica[0]), musica[1] or "", musica[2] or "", musica[3] or "")
+        h.update(b"\x1e" + "\x1f".join(campos).encode("utf-8"))
+    return h.hexdigest()
+
+def _copiar_atomico(origem, destino):
+    """Copia em blocos para um temporário ao lado do destino e troca de uma vez"""
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    try:
+        shutil.copyfile(origem, temporario)
+        os.replace(temporario, destino)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+class CachePDF:
+    """Cache em disco dos PDFs gerados, com despejo LRU limitado por tamanho"""
+
+    def __init__(self, diretorio=DIRETORIO_CACHE_PADRAO, limite_bytes=LIMITE_CACHE_PADRAO):
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        self.caminho_indice = os.path.join(diretorio, "indice.json")
+        self._lock = threading.Lock()
+        # chave -> {"tamanho": int, "musicas": [ids], "acesso": float}; ordem = menos recente primeiro
+        self._entradas = OrderedDict()
+        os.makedirs(diretorio, exist_ok=True)
+        self._carregar_indice()
+
+    def _carregar_indice(self):
+        """Lê o índice do disco descartando entradas cujo arquivo sumiu"""
+        try:
+            with open(self.caminho_indice, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            dados = []
+
+        for chave, entrada in sorted(dados, key=lambda item: item[1].get("acesso", 0)):
+            if os.path.exists(self.caminho_arquivo(chave)):
+                self._entradas[chave] = entrada
+
+    def _salvar_indice(self):
+        """Grava o índice de forma atômica"""
+        temporario = self.caminho_indice + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(list(self._entradas.items()), f)
+        os.replace(temporario, self.caminho_indice)
+
+    def caminho_arquivo(self, chave):
+        """Caminho do PDF em cache para uma chave"""
+        return os.path.join(self.diretorio, f"{chave}.pdf")
+
+    def obter(self, chave):
+        """Retorna o caminho do PDF em cache ou None, marcando a entrada como recente"""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+            caminho = self.caminho_arquivo(chave)
+            if not os.path.exists(caminho):
+                del self._entradas[chave]
+                self._salvar_indice()
+                return None
+            entrada["acesso"] = time.time()
+            self._entradas.move_to_end(chave)
+            self._salvar_indice()
+            return caminho
+
+    def registrar(self, chave, ids_musicas):
+        """Registra um PDF recém-gravado em caminho_arquivo(chave) e aplica o limite de tamanho"""
+        with self._lock:
+            tamanho = os.path.getsize(self.caminho_arquivo(chave))
+            self._entradas[chave] = {
+                "tamanho": tamanho,
+                "musicas": list(ids_musicas),
+                "acesso": time.time()
+            }
+            self._entradas.move_to_end(chave)
+            self._despejar()
+            self._salvar_indice()
+
+    def armazenar(self, chave, origem, ids_musicas):
+        """Guarda no cache uma cópia de um PDF já gravado em outro lugar"""
+        _copiar_atomico(origem, self.caminho_arquivo(chave))
+        self.registrar(chave, ids_musicas)
+
+    def copiar_para(self, chave, destino):
+        """Copia o PDF em cache para o destino; retorna False se não estiver em cache"""
+        caminho = self.obter(chave)
+        if caminho is None:
+            return False
+        _copiar_atomico(caminho, destino)
+        return True
+
+    def invalidar_musica(self, id_musica):
+        """Remove apenas os PDFs que incluem a música editada ou excluída"""
+        with self._lock:
+            chaves = [chave for chave, entrada in self._entradas.items() if id_musica in entrada["musicas"]]
+            for chave in chaves:
+                self._remover(chave)
+            if chaves:
+                self._salvar_indice()
+            return len(chaves)
+
+    def limpar(self):
+        """Remove todos os PDFs do cache"""
+        with self._lock:
+            for chave in list(self._entradas):
+                self._remover(chave)
+            self._salvar_indice()
+
+    def tamanho_total(self):
+        """Soma dos tamanhos dos PDFs em cache"""
+        return sum(entrada["tamanho"] for entrada in self._entradas.values())
+
+    def _despejar(self):
+        """Remove os PDFs menos usados até caber no limite"""
+        total = self.tamanho_total()
+        while total > self.limite_bytes and len(self._entradas) > 1:
+            chave = next(iter(self._entradas))
+            total -= self._entradas[chave]["tamanho"]
+            self._remover(chave)
+
+    def _remover(self, chave):
+        """Apaga o arquivo e a entrada do índice"""
+        self._entradas.pop(chave, None)
+        try:
+            os.remove(self.caminho_arquivo(chave))
+        except OSError:
+            pass
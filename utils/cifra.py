@@ -0,0 +1,89 @@
+import re
+from functools import lru_cache
+
+# Tipos de token da marcação de cifra
+TEXTO = "texto"
+ACORDE = "acorde"  # texto entre colchetes; o valor vem sem os colchetes
+SETA = "seta"      # "--", exibido como →
+QUEBRA = "quebra"  # fim de linha
+
+# Uma única expressão com um só grupo para toda a marcação: o que não casar é texto comum.
+# Com um grupo o split fica bem mais barato que com um grupo por tipo, e o tipo do
+# delimitador sai do próprio texto dele.
+PADRAO_TOKENS = re.compile(r'(\[[^\]\n]+\]|--|\n)')
+# Setas e quebras são sempre iguais: o mesmo token é reaproveitado
+TOKENS_FIXOS = {"--": (SETA, "→"), "\n": (QUEBRA, "\n")}
+
+@lru_cache(maxsize=1024)
+def tokenizar_cifra(cifra):
+    """Converte a cifra em uma tupla de tokens (tipo, valor), com cache LRU por conteúdo"""
+    # O split devolve [texto, delimitador, texto, delimitador, ..., texto]
+    partes = PADRAO_TOKENS.split(cifra)
+    tokens = []
+    adicionar = tokens.append
+    fixo = TOKENS_FIXOS.get
+    for texto, delimitador in zip(partes[::2], partes[1::2]):
+        if texto:
+            adicionar((TEXTO, texto))
+        adicionar(fixo(delimitador) or (ACORDE, delimitador[1:-1]))
+    if partes[-1]:
+        adicionar((TEXTO, partes[-1]))
+    return tuple(tokens)
+
+# Acorde cifrado: tônica, acidente, qualidade/extensões e baixo opcional (ex.: F#m7(b5), Bb7M, C/E)
+PADRAO_ACORDE = re.compile(
+    r'[A-G][#b]?(?:maj|min|dim|aug|sus|add|m|M|º|°|\+|\d|\((?:[#b+-]?\d+,?)+\)|[#b]\d+)*(?:/[A-G][#b]?)?'
+)
+PADRAO_SEPARADORES = re.compile(r'[\s|;]+')
+# Palavras que podem estar numa linha de acordes sem ser acorde: pontuação (-, /, &),
+# marcas de repetição (2x, x2, (2x)) e rótulos de parte (Intro:, Refrão:)
+PADRAO_NEUTRO = re.compile(r'[^\w]+|\(?(?:\d+x|x\d+)\)?|\w+:', re.IGNORECASE)
+
+def so_acordes(texto):
+    """Indica se o texto tem acordes e, fora eles, só palavras neutras (PADRAO_NEUTRO)
+
+    Evita tomar por acorde o "E", o "A" ou o "Em" do começo de uma linha de letra.
+    """
+    tem_acorde = False
+    for palavra in PADRAO_SEPARADORES.split(texto):
+        if not palavra:
+            continue
+        if PADRAO_ACORDE.fullmatch(palavra):
+            tem_acorde = True
+        elif not PADRAO_NEUTRO.fullmatch(palavra):
+            return False
+    return tem_acorde
+
+def _fechar_linha(tokens):
+    texto = "".join(valor for tipo, valor in tokens if tipo == TEXTO)
+    return (so_acordes(texto), tuple(tokens))
+
+@lru_cache(maxsize=1024)
+def linhas_cifra(cifra):
+    """Tokens da cifra por linha: tupla de (linha_de_acordes, tokens), com a quebra no fim da linha
+
+    Uma linha é de acordes quando o texto fora dos colchetes passa em so_acordes; nas outras
+    (letra), só o que está entre colchetes pode ser acorde.
+    """
+    linhas = []
+    atual = []
+    for token in tokenizar_cifra(cifra):
+        atual.append(token)
+        if token[0] == QUEBRA:
+            linhas.append(_fechar_linha(atual))
+            atual = []
+    if atual:
+        linhas.append(_fechar_linha(atual))
+    return tuple(linhas)
+
+@lru_cache(maxsize=1024)
+def extrair_acordes(cifra):
+    """Conjunto dos acordes da cifra: entre colchetes e no texto comum das linhas de acordes"""
+    acordes = set()
+    for linha_de_acordes, tokens in linhas_cifra(cifra or ""):
+        for tipo, valor in tokens:
+            if (tipo == TEXTO and linha_de_acordes) or (tipo == ACORDE and so_acordes(valor)):
+                for palavra in PADRAO_SEPARADORES.split(valor):
+                    if palavra and PADRAO_ACORDE.fullmatch(palavra):
+                        acordes.add(palavra)
+    return frozenset(acordes)
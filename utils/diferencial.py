@@ -0,0 +1,294 @@
+import json
+from utils.indice_acordes import indexar_musica, remover_musica
+
+INSERIR = "inserir"
+ALTERAR = "alterar"
+REMOVER = "remover"
+
+# Tabela -> (seção do backup, colunas comparadas no UPDATE, chave natural antiga em JSON)
+# A chave é gravada pelo gatilho no momento da alteração, para achar o registro no banco de
+# destino mesmo depois de renomeado ou apagado aqui
+TABELAS_REGISTRADAS = {
+    "musicas": ("musicas", ("musica", "autor", "estilo", "tom", "cifra"), "json_array(OLD.musica, OLD.autor)"),
+    "shows": ("shows", ("data_show", "local_show", "artista"), "json_array(OLD.data_show, OLD.local_show, OLD.artista)"),
+    "repertorios_shows": ("repertorios", ("id_show", "id_musica", "sequencia", "transposicao", "arranjo_show"), '''(
+        SELECT json_array(s.data_show, s.local_show, s.artista, m.musica, m.autor)
+        FROM shows s, musicas m WHERE s.id = OLD.id_show AND m.id = OLD.id_musica
+    )'''),
+    "checklist": ("checklists", ("data", "titulo"), "json_array(OLD.data, OLD.titulo)"),
+    "checklist_detail": ("checklist_detalhes", ("id_checklist", "descricao", "status"), '''(
+        SELECT json_array(c.data, c.titulo, OLD.descricao) FROM checklist c WHERE c.id = OLD.id_checklist
+    )'''),
+}
+
+# Estado atual dos registros alterados, nas mesmas colunas das seções do backup completo
+# (o primeiro campo é o id, para casar com o registro de alterações)
+CONSULTAS_ESTADO = {
+    "musicas": "SELECT id, musica, autor, estilo, tom, cifra FROM musicas WHERE id IN ({ids})",
+    "shows": "SELECT id, data_show, local_show, artista FROM shows WHERE id IN ({ids})",
+    "repertorios_shows": '''
+        SELECT rs.id, s.data_show, s.local_show, s.artista, m.musica, m.autor, rs.sequencia,
+               rs.transposicao, rs.arranjo_show
+        FROM repertorios_shows rs
+        JOIN shows s ON rs.id_show = s.id
+        JOIN musicas m ON rs.id_musica = m.id
+        WHERE rs.id IN ({ids})
+    ''',
+    "checklist": "SELECT id, data, titulo FROM checklist WHERE id IN ({ids})",
+    "checklist_detail": '''
+        SELECT cd.id, c.data, c.titulo, cd.descricao, cd.status
+        FROM checklist_detail cd
+        JOIN checklist c ON cd.id_checklist = c.id
+        WHERE cd.id IN ({ids})
+    ''',
+}
+
+# Seção -> (tabela, colunas gravadas), para aplicar as alterações no banco de destino
+DESTINOS = {secao: (tabela, colunas) for tabela, (secao, colunas, _) in TABELAS_REGISTRADAS.items()}
+
+# Id do registro com a chave natural no banco de destino (NULL se não existir)
+CONSULTAS_CHAVE = {
+    "musicas": "SELECT MIN(id) FROM musicas WHERE musica = ? AND autor IS ?",
+    "shows": "SELECT MIN(id) FROM shows WHERE data_show = ? AND local_show = ? AND artista = ?",
+    "repertorios": '''
+        SELECT MIN(rs.id) FROM repertorios_shows rs
+        WHERE rs.id_show = (SELECT MIN(id) FROM shows WHERE data_show = ? AND local_show = ? AND artista = ?)
+          AND rs.id_musica = (SELECT MIN(id) FROM musicas WHERE musica = ? AND autor IS ?)
+    ''',
+    "checklists": "SELECT MIN(id) FROM checklist WHERE data = ? AND titulo = ?",
+    "checklist_detalhes": '''
+        SELECT MIN(cd.id) FROM checklist_detail cd
+        WHERE cd.id_checklist = (SELECT MIN(id) FROM checklist WHERE data = ? AND titulo = ?)
+          AND cd.descricao = ?
+    ''',
+}
+
+# Tabela pai -> (tabela filha, coluna) apagadas por gatilho antes do pai. Na cascata o filho
+# sai depois do pai, e o gatilho do filho não acharia mais a chave natural dele no pai
+FILHOS_ANTES_DO_PAI = {
+    "musicas": (("repertorios_shows", "id_musica"),),
+    "shows": (("repertorios_shows", "id_show"),),
+    "checklist": (("checklist_detail", "id_checklist"),),
+}
+
+# Ordem de aplicação: inclusões e alterações dos pais para os filhos, remoções ao contrário
+ORDEM_SECOES = ("musicas", "shows", "repertorios", "checklists", "checklist_detalhes")
+TAMANHO_CHAVE = {"musicas": 2, "shows": 3, "repertorios": 5, "checklists": 2, "checklist_detalhes": 3}
+
+# Partes da chave de um filho que são a chave de um pai: (seção do pai, início, fim)
+PAIS = {
+    "repertorios": (("shows", 0, 3), ("musicas", 3, 5)),
+    "checklist_detalhes": (("checklists", 0, 2),),
+}
+SECOES_PAI = {"musicas", "shows", "checklists"}
+
+def criar_registro_alteracoes(cursor):
+    """Cria a tabela de alterações, a de backups feitos e os gatilhos que preenchem o registro"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS alteracoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tabela TEXT NOT NULL,
+            id_registro INTEGER NOT NULL,
+            operacao TEXT NOT NULL,
+            chave_antiga TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS backups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            ate_alteracao INTEGER NOT NULL,
+            criado_em TEXT NOT NULL
+        )
+    ''')
+    for tabela, (_, colunas, chave) in TABELAS_REGISTRADAS.items():
+        mudou = " OR ".join(f"OLD.{coluna} IS NOT NEW.{coluna}" for coluna in colunas)
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS alteracoes_{tabela}_inclusao AFTER INSERT ON {tabela}
+            BEGIN
+                INSERT INTO alteracoes (tabela, id_registro, operacao) VALUES ('{tabela}', NEW.id, 'I');
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS alteracoes_{tabela}_alteracao AFTER UPDATE ON {tabela}
+            WHEN {mudou}
+            BEGIN
+                INSERT INTO alteracoes (tabela, id_registro, operacao, chave_antiga)
+                VALUES ('{tabela}', NEW.id, 'U', {chave});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS alteracoes_{tabela}_exclusao AFTER DELETE ON {tabela}
+            BEGIN
+                INSERT INTO alteracoes (tabela, id_registro, operacao, chave_antiga)
+                VALUES ('{tabela}', OLD.id, 'D', {chave});
+            END
+        ''')
+
+    # Vale para qualquer exclusão (telas, sincronização, diferencial), com ou sem chaves estrangeiras
+    for pai, filhos in FILHOS_ANTES_DO_PAI.items():
+        apagar = "".join(f"DELETE FROM {filho} WHERE {coluna} = OLD.id;\n" for filho, coluna in filhos)
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS alteracoes_{pai}_filhos BEFORE DELETE ON {pai}
+            BEGIN
+                {apagar}
+            END
+        ''')
+
+def ultimo_backup(cursor):
+    """(id da última alteração coberta, data) do último backup feito; None se nunca houve"""
+    cursor.execute("SELECT ate_alteracao, criado_em FROM backups ORDER BY id DESC LIMIT 1")
+    return cursor.fetchone()
+
+def ultima_alteracao(cursor):
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM alteracoes")
+    return cursor.fetchone()[0]
+
+def registrar_backup(conn, tipo, ate_alteracao, criado_em):
+    """Marca até onde o registro de alterações já está em um backup
+
+    Guarda uma geração de folga: apaga só o que já estava coberto pelo backup anterior.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        '''DELETE FROM alteracoes WHERE id <= (
+               SELECT ate_alteracao FROM backups ORDER BY id DESC LIMIT 1
+           )''',
+    )
+    cursor.execute(
+        "INSERT INTO backups (tipo, ate_alteracao, criado_em) VALUES (?, ?, ?)",
+        (tipo, ate_alteracao, criado_em)
+    )
+    conn.commit()
+
+def _traduzir_chave(secao, chave, historico, posicao):
+    """Troca, na chave de um filho, as partes dos pais renomeados no intervalo
+
+    posicao 0 devolve a chave do pai no último backup (para remoções, aplicadas antes de
+    tudo); posicao 1 devolve a chave final (para alterações, aplicadas depois dos pais).
+    """
+    chave = list(chave)
+    for secao_pai, inicio, fim in PAIS.get(secao, ()):
+        chaves_pai = historico[secao_pai].get(tuple(chave[inicio:fim]))
+        if chaves_pai and chaves_pai[posicao] is not None:
+            chave[inicio:fim] = chaves_pai[posicao]
+    return chave
+
+def coletar_alteracoes(cursor, desde, ate):
+    """Resume o registro entre duas marcas em uma lista de (operação, seção, chave, linha)
+
+    Várias alterações do mesmo registro viram uma só: vale o estado atual, procurado no
+    destino pela chave que ele tinha no último backup. Um registro criado e apagado no
+    intervalo não aparece. Remoções vêm primeiro (dos filhos para os pais), depois inclusões
+    e alterações (dos pais para os filhos), cada grupo na ordem em que aconteceu.
+    """
+    cursor.execute(
+        "SELECT id, tabela, id_registro, operacao, chave_antiga FROM alteracoes WHERE id > ? AND id <= ? ORDER BY id",
+        (desde, ate)
+    )
+    primeiras = {}
+    chaves_antigas = {}
+    for id_alteracao, tabela, id_registro, operacao, chave in cursor.fetchall():
+        primeiras.setdefault((tabela, id_registro), (id_alteracao, operacao))
+        chaves_antigas.setdefault((tabela, id_registro), []).append(json.loads(chave) if chave else None)
+
+    # Estado atual de cada registro alterado (ausente se foi apagado)
+    estado = {}
+    for tabela, consulta in CONSULTAS_ESTADO.items():
+        ids = [id_registro for (tabela_registro, id_registro) in primeiras if tabela_registro == tabela]
+        for inicio in range(0, len(ids), 500):
+            lote = ids[inicio:inicio + 500]
+            cursor.execute(consulta.format(ids=", ".join("?" for _ in lote)), lote)
+            estado.update(((tabela, linha[0]), list(linha[1:])) for linha in cursor.fetchall())
+
+    # Toda chave que um pai teve no intervalo -> (chave no último backup, chave final)
+    historico = {secao: {} for secao in SECOES_PAI}
+    for (tabela, id_registro), chaves in chaves_antigas.items():
+        secao = TABELAS_REGISTRADAS[tabela][0]
+        if secao not in SECOES_PAI:
+            continue
+        linha = estado.get((tabela, id_registro))
+        final = linha[:TAMANHO_CHAVE[secao]] if linha is not None else None
+        base = chaves[0] if primeiras[(tabela, id_registro)][1] != "I" else None
+        for chave in chaves + [final]:
+            if chave is not None:
+                historico[secao].setdefault(tuple(chave), (base, final))
+
+    remocoes = []
+    gravacoes = []
+    for (tabela, id_registro), (ordem, operacao) in primeiras.items():
+        secao = TABELAS_REGISTRADAS[tabela][0]
+        posicao_secao = ORDEM_SECOES.index(secao)
+        chave = chaves_antigas[(tabela, id_registro)][0]
+        linha = estado.get((tabela, id_registro))
+        if linha is not None:
+            if operacao == "I" or chave is None:
+                gravacoes.append((posicao_secao, ordem, (INSERIR, secao, None, linha)))
+            else:
+                chave = _traduzir_chave(secao, chave, historico, 1)
+                gravacoes.append((posicao_secao, ordem, (ALTERAR, secao, chave, linha)))
+        elif operacao != "I" and chave is not None:
+            chave = _traduzir_chave(secao, chave, historico, 0)
+            remocoes.append((-posicao_secao, ordem, (REMOVER, secao, chave, None)))
+
+    remocoes.sort()
+    gravacoes.sort()
+    return [item for _, _, item in remocoes] + [item for _, _, item in gravacoes]
+
+def localizar(cursor, secao, chave):
+    """Id do registro com a chave natural no banco; None se não existir"""
+    cursor.execute(CONSULTAS_CHAVE[secao], list(chave)[:TAMANHO_CHAVE[secao]])
+    return cursor.fetchone()[0]
+
+def _valores(cursor, secao, linha):
+    """Valores das colunas da tabela a partir da linha do backup; None se faltar o pai"""
+    if secao == "repertorios":
+        id_show = localizar(cursor, "shows", linha[:3])
+        id_musica = localizar(cursor, "musicas", linha[3:5])
+        if id_show is None or id_musica is None:
+            return None
+        return (id_show, id_musica, linha[5], linha[6] or 0, linha[7])
+    if secao == "checklist_detalhes":
+        id_checklist = localizar(cursor, "checklists", linha[:2])
+        if id_checklist is None:
+            return None
+        return (id_checklist, linha[2], linha[3])
+    return tuple(linha[:len(DESTINOS[secao][1])])
+
+def aplicar_alteracao(cursor, operacao, secao, chave, linha):
+    """Aplica uma alteração do backup diferencial; retorna False se não havia o que aplicar
+
+    Inclusões e alterações funcionam como "grava": se o registro já existe (pela chave
+    antiga ou pela nova), é atualizado; senão, é incluído. Assim reaplicar o mesmo arquivo
+    não duplica nada.
+    """
+    tabela, colunas = DESTINOS[secao]
+    if operacao == REMOVER:
+        id_registro = localizar(cursor, secao, chave)
+        if id_registro is None:
+            return False
+        cursor.execute(f"DELETE FROM {tabela} WHERE id = ?", (id_registro,))
+        if secao == "musicas":
+            remover_musica(cursor, id_registro)
+        return True
+
+    valores = _valores(cursor, secao, linha)
+    if valores is None:
+        return False
+    id_registro = localizar(cursor, secao, chave) if chave else None
+    if id_registro is None:
+        id_registro = localizar(cursor, secao, linha)
+    if id_registro is None:
+        cursor.execute(
+            f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' for _ in colunas)})",
+            valores
+        )
+        id_registro = cursor.lastrowid
+    else:
+        cursor.execute(
+            f"UPDATE {tabela} SET {', '.join(f'{coluna} = ?' for coluna in colunas)} WHERE id = ?",
+            (*valores, id_registro)
+        )
+    if secao == "musicas":
+        indexar_musica(cursor, id_registro, linha[4])
+    return True
@@ -0,0 +1,215 @@
+import os
+import time
+import threading
+from concurrent.futures import ProcessPoolExecutor, Future, as_completed
+from utils.pdf import renderizar_pdf, renderizar_parte, juntar_pdfs
+from utils.layout_pdf import dividir_em_blocos
+
+# Abaixo disso o custo de subir partes e juntar os PDFs não compensa
+MIN_MUSICAS_DIVISAO = 12
+
+def _aquecer_worker():
+    """Importa o xhtml2pdf no processo worker para que a primeira exportação não pague o custo"""
+    from xhtml2pdf import pisa  # noqa: F401
+
+def _ping():
+    """Tarefa vazia usada para subir os workers antecipadamente"""
+    return os.getpid()
+
+class TarefaExportacao:
+    """Representa uma exportação em andamento no pool de processos"""
+
+    def __init__(self, future):
+        self.future = future
+        self.partes = []
+        self.cancelada = False
+
+    def cancelar(self):
+        """Cancela a exportação; se já estiver renderizando, o resultado é descartado"""
+        self.cancelada = True
+        self.future.cancel()
+        for parte in self.partes:
+            parte.cancel()
+
+    def em_andamento(self):
+        """Indica se a exportação ainda não terminou"""
+        return not self.future.done() and not self.cancelada
+
+class TarefaLote:
+    """Representa uma exportação em lote; cancelar descarta o que ainda não rodou"""
+
+    def __init__(self, futures):
+        self.futures = futures
+        self.cancelada = False
+
+    def cancelar(self):
+        """Cancela os PDFs do lote que ainda não começaram a ser renderizados"""
+        self.cancelada = True
+        for future in self.futures:
+            future.cancel()
+
+class ServicoExportacaoPDF:
+    """Renderiza PDFs em um pool de processos para não travar a interface"""
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _obter_executor(self):
+        """Cria o pool sob demanda, já com os workers aquecidos"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_aquecer_worker
+                )
+            return self._executor
+
+    def aquecer(self, quantidade=1):
+        """Sobe workers em segundo plano antes da primeira exportação"""
+        # Os demais workers sobem sob demanda, quando uma exportação em lote precisar deles
+        executor = self._obter_executor()
+        for _ in range(min(quantidade, self.max_workers)):
+            executor.submit(_ping)
+
+    def exportar(self, tipo, repertorio, destino, ao_concluir, ao_progresso=None):
+        """Agenda a renderização em destino e chama ao_concluir(destino, erro) quando terminar"""
+        # Os callbacks rodam fora da thread da interface; fracao None = progresso indeterminado
+        if ao_progresso:
+            ao_progresso("Aguardando processo de renderização...", 0.0)
+
+        # O worker grava em um arquivo parcial ao lado do destino; a troca atômica só
+        # acontece aqui se a exportação não tiver sido cancelada
+        parcial = f"{destino}.parcial"
+        blocos = self._dividir(tipo, repertorio)
+        if len(blocos) == 1:
+            future = self._obter_executor().submit(renderizar_pdf, tipo, list(repertorio), parcial)
+            tarefa = TarefaExportacao(future)
+            if ao_progresso:
+                ao_progresso(f"Renderizando {len(repertorio)} música(s)...", None)
+        else:
+            future = Future()
+            tarefa = TarefaExportacao(future)
+            threading.Thread(
+                target=self._renderizar_dividido,
+                args=(tipo, blocos, parcial, tarefa, ao_progresso),
+                daemon=True
+            ).start()
+
+        def finalizar(f):
+            try:
+                if tarefa.cancelada or f.cancelled():
+                    return
+                try:
+                    f.result()
+                    os.replace(parcial, destino)
+                except Exception as ex:
+                    ao_concluir(None, ex)
+                    return
+            finally:
+                if os.path.exists(parcial):
+                    os.remove(parcial)
+
+            if ao_progresso:
+                ao_progresso("PDF gerado", 1.0)
+            ao_concluir(destino, None)
+
+        future.add_done_callback(finalizar)
+        return tarefa
+
+    def _dividir(self, tipo, repertorio):
+        """Partes alinhadas por página para renderizar o cifrado em paralelo"""
+        if tipo != "cifrado" or self.max_workers < 2 or len(repertorio) < MIN_MUSICAS_DIVISAO:
+            return [list(repertorio)]
+        return dividir_em_blocos(list(repertorio), self.max_workers)
+
+    def _renderizar_dividido(self, tipo, blocos, destino, tarefa, ao_progresso):
+        """Renderiza as partes em workers diferentes e junta os PDFs na ordem
+
+        A divisão vem da paginação estimada; se alguma parte não terminar em fim de
+        página como no documento inteiro, o repertório é renderizado de uma vez só.
+        """
+        if not tarefa.future.set_running_or_notify_cancel():
+            return
+
+        caminhos = [f"{destino}.{i}" for i in range(len(blocos))]
+        proximas = [bloco[0] for bloco in blocos[1:]] + [None]
+        total = len(blocos)
+        try:
+            executor = self._obter_executor()
+            tarefa.partes = [
+                executor.submit(renderizar_parte, tipo, bloco, proxima, caminho)
+                for bloco, proxima, caminho in zip(blocos, proximas, caminhos)
+            ]
+            for concluidas, parte in enumerate(as_completed(tarefa.partes), 1):
+                parte.result()
+                if ao_progresso and not tarefa.cancelada:
+                    ao_progresso(f"Renderizadas {concluidas} de {total} partes...", concluidas / (total + 1))
+
+            if all(parte.result() for parte in tarefa.partes):
+                if ao_progresso and not tarefa.cancelada:
+                    ao_progresso("Juntando as partes...", total / (total + 1))
+                executor.submit(juntar_pdfs, caminhos, destino, True).result()
+            else:
+                if ao_progresso and not tarefa.cancelada:
+                    ao_progresso("Ajustando as quebras de página...", None)
+                repertorio = [musica for bloco in blocos for musica in bloco]
+                tarefa.partes = [executor.submit(renderizar_pdf, tipo, repertorio, destino)]
+                tarefa.partes[0].result()
+            tarefa.future.set_result(destino)
+        except Exception as ex:
+            tarefa.future.set_exception(ex)
+        finally:
+            for caminho in caminhos:
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+
+    def exportar_lote(self, trabalhos, ao_concluir, ao_progresso=None):
+        """Renderiza vários (tipo, repertorio, destino) em paralelo em todos os workers"""
+        # ao_progresso(concluidos, total) a cada PDF; ao_concluir([(destino, erro)], segundos) no fim
+        inicio = time.perf_counter()
+        executor = self._obter_executor()
+        total = len(trabalhos)
+        resultados = [None] * total
+        concluidos = 0
+        lock = threading.Lock()
+
+        futures = [
+            executor.submit(renderizar_pdf, tipo, list(repertorio), destino)
+            for tipo, repertorio, destino in trabalhos
+        ]
+        lote = TarefaLote(futures)
+
+        def finalizar(indice, f):
+            nonlocal concluidos
+            destino = trabalhos[indice][2]
+            try:
+                f.result()
+                resultados[indice] = (destino, None)
+            except Exception as ex:
+                resultados[indice] = (destino, ex)
+
+            with lock:
+                concluidos += 1
+                terminou = concluidos == total
+                atual = concluidos
+
+            if ao_progresso and not lote.cancelada:
+                ao_progresso(atual, total)
+            if terminou:
+                ao_concluir(resultados, time.perf_counter() - inicio)
+
+        for indice, future in enumerate(futures):
+            future.add_done_callback(lambda f, indice=indice: finalizar(indice, f))
+
+        if not futures:
+            ao_concluir(resultados, 0.0)
+        return lote
+
+    def encerrar(self):
+        """Encerra o pool, cancelando o que ainda não começou"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
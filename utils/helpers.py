@@ -60,4 +60,9 @@ def verificar_musica_existente(cursor, nome_musica, autor=None, id_excluir=None)
                 (nome_musica,)
             )
     
-    return cursor.fetchone() is not None
\ No newline at end of file
+    return cursor.fetchone() is not None
+
+def percentil(valores, fracao):
+    """Valor abaixo do qual fica a fração pedida dos valores (0.95 para o p95)"""
+    ordenados = sorted(valores)
+    return ordenados[min(int(len(ordenados) * fracao), len(ordenados) - 1)]
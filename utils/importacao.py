@@ -0,0 +1,184 @@
+import time
+from utils.indice_acordes import reindexar_pendentes
+from utils.diferencial import aplicar_alteracao, INSERIR, ALTERAR, REMOVER
+from utils.staging import (
+    ImportacaoCancelada, criar_staging, remover_staging, carregar_staging, verificar_cancelamento
+)
+
+ALTERACOES_POR_AVISO = 200
+
+# Seção do backup -> (tabela temporária, colunas); linhas com menos colunas (backups
+# antigos) são completadas com NULL
+TABELAS_STAGING = {
+    "musicas": ("importacao_musicas", ("musica", "autor", "estilo", "tom", "cifra")),
+    "shows": ("importacao_shows", ("data_show", "local_show", "artista")),
+    "repertorios": ("importacao_repertorios", (
+        "data_show", "local_show", "artista", "musica", "autor", "sequencia", "transposicao", "arranjo_show"
+    )),
+    "checklists": ("importacao_checklists", ("data", "titulo")),
+    "checklist_detalhes": ("importacao_checklist_detalhes", ("data", "titulo", "descricao", "status")),
+}
+
+# Mesclagem em conjunto: cada seção entra com um único INSERT ... SELECT que resolve as
+# chaves naturais por JOIN, ignora o que já existe e, dentro do próprio backup, fica com a
+# primeira ocorrência de cada chave (como fazia a sincronização linha a linha)
+MESCLAGEM = (
+    ("musicas", '''
+        INSERT INTO musicas (musica, autor, estilo, tom, cifra)
+        SELECT s.musica, s.autor, s.estilo, s.tom, s.cifra
+        FROM importacao_musicas s
+        WHERE s.rowid IN (SELECT MIN(rowid) FROM importacao_musicas GROUP BY musica, autor)
+          AND NOT EXISTS (SELECT 1 FROM musicas m WHERE m.musica = s.musica AND m.autor IS s.autor)
+        ORDER BY s.rowid
+    '''),
+    ("shows", '''
+        INSERT INTO shows (data_show, local_show, artista)
+        SELECT s.data_show, s.local_show, s.artista
+        FROM importacao_shows s
+        WHERE s.rowid IN (SELECT MIN(rowid) FROM importacao_shows GROUP BY data_show, local_show, artista)
+          AND NOT EXISTS (
+              SELECT 1 FROM shows sh
+              WHERE sh.data_show = s.data_show AND sh.local_show = s.local_show AND sh.artista = s.artista
+          )
+        ORDER BY s.rowid
+    '''),
+    ("repertorios", '''
+        INSERT INTO repertorios_shows (id_show, id_musica, sequencia, transposicao, arranjo_show)
+        SELECT u.id_show, u.id_musica, u.sequencia, u.transposicao, u.arranjo_show
+        FROM (
+            SELECT r.*, ROW_NUMBER() OVER (PARTITION BY r.id_show, r.id_musica ORDER BY r.ordem) AS ocorrencia
+            FROM (
+                SELECT (SELECT MIN(sh.id) FROM shows sh
+                        WHERE sh.data_show = s.data_show AND sh.local_show = s.local_show AND sh.artista = s.artista) AS id_show,
+                       (SELECT MIN(m.id) FROM musicas m WHERE m.musica = s.musica AND m.autor IS s.autor) AS id_musica,
+                       s.sequencia, COALESCE(s.transposicao, 0) AS transposicao, s.arranjo_show, s.rowid AS ordem
+                FROM importacao_repertorios s
+            ) r
+            WHERE r.id_show IS NOT NULL AND r.id_musica IS NOT NULL
+              AND NOT EXISTS (
+                  SELECT 1 FROM repertorios_shows rs WHERE rs.id_show = r.id_show AND rs.id_musica = r.id_musica
+              )
+        ) u
+        WHERE u.ocorrencia = 1
+        ORDER BY u.ordem
+    '''),
+    ("checklists", '''
+        INSERT INTO checklist (data, titulo)
+        SELECT s.data, s.titulo
+        FROM importacao_checklists s
+        WHERE s.rowid IN (SELECT MIN(rowid) FROM importacao_checklists GROUP BY data, titulo)
+          AND NOT EXISTS (SELECT 1 FROM checklist c WHERE c.data = s.data AND c.titulo = s.titulo)
+        ORDER BY s.rowid
+    '''),
+    ("checklist_detalhes", '''
+        INSERT INTO checklist_detail (id_checklist, descricao, status)
+        SELECT r.id_checklist, r.descricao, r.status
+        FROM (
+            SELECT (SELECT MIN(c.id) FROM checklist c WHERE c.data = s.data AND c.titulo = s.titulo) AS id_checklist,
+                   s.descricao, s.status, s.rowid AS ordem
+            FROM importacao_checklist_detalhes s
+            WHERE s.rowid IN (SELECT MIN(rowid) FROM importacao_checklist_detalhes GROUP BY data, titulo, descricao)
+        ) r
+        WHERE r.id_checklist IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM checklist_detail d WHERE d.id_checklist = r.id_checklist AND d.descricao = r.descricao
+          )
+        ORDER BY r.ordem
+    '''),
+)
+
+def mesclar_staging(cursor, ao_progresso=None, cancelar=None):
+    """Insere o que falta em cada tabela com um INSERT ... SELECT por seção
+
+    ao_progresso(seção) é chamado antes de mesclar cada seção.
+    Retorna (linhas inseridas por seção, segundos por seção).
+    """
+    for tabela, colunas in TABELAS_STAGING.values():
+        # Índices nas chaves naturais deixam os agrupamentos e buscas da mesclagem em O(n log n)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS temp.idx_{tabela} ON {tabela} ({', '.join(colunas[:3])})")
+    adicionadas = {}
+    tempos = {}
+    for secao, comando in MESCLAGEM:
+        verificar_cancelamento(cancelar)
+        if ao_progresso:
+            ao_progresso(secao)
+        inicio = time.perf_counter()
+        cursor.execute(comando)
+        adicionadas[secao] = cursor.rowcount
+        tempos[secao] = time.perf_counter() - inicio
+    return adicionadas, tempos
+
+def importar_backup(conn, linhas, ao_progresso=None, cancelar=None):
+    """Importa (seção, linha) de um backup em uma única transação, sem duplicar o que já existe
+
+    ao_progresso(etapa, seção, linhas) informa a leitura ("leitura", com as linhas lidas da
+    seção), a mesclagem ("mesclagem") e o índice de acordes ("indice"). Se o evento cancelar
+    for acionado, ou qualquer linha falhar, nada é gravado (rollback) e a exceção sobe.
+    Retorna (linhas lidas por seção, linhas inseridas por seção, tempos em segundos por etapa).
+    """
+    def avisar(etapa, secao, linhas=0):
+        if ao_progresso:
+            ao_progresso(etapa, secao, linhas)
+
+    inicio = time.perf_counter()
+    tempos = {}
+    cursor = conn.cursor()
+    if not conn.in_transaction:
+        cursor.execute("BEGIN")
+    try:
+        criar_staging(cursor, TABELAS_STAGING)
+        carregadas = carregar_staging(
+            cursor, linhas, TABELAS_STAGING,
+            ao_progresso=lambda secao, lidas: avisar("leitura", secao, lidas), cancelar=cancelar
+        )
+        tempos["leitura"] = time.perf_counter() - inicio
+
+        adicionadas, tempos["mesclagem"] = mesclar_staging(
+            cursor, ao_progresso=lambda secao: avisar("mesclagem", secao, carregadas[secao]), cancelar=cancelar
+        )
+
+        verificar_cancelamento(cancelar)
+        avisar("indice", None)
+        inicio_indice = time.perf_counter()
+        reindexar_pendentes(cursor)
+        tempos["indice"] = time.perf_counter() - inicio_indice
+
+        verificar_cancelamento(cancelar)
+        remover_staging(cursor, TABELAS_STAGING)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        remover_staging(cursor, TABELAS_STAGING)
+        raise
+    tempos["total"] = time.perf_counter() - inicio
+    return carregadas, adicionadas, tempos
+
+def importar_diferencial(conn, alteracoes, ao_progresso=None, cancelar=None):
+    """Reaplica em ordem, em uma única transação, as alterações de um backup diferencial
+
+    ao_progresso("diferencial", seção, alterações lidas) é chamado a cada ALTERACOES_POR_AVISO.
+    Cancelamento e erros desfazem tudo, como na importação completa.
+    Retorna (alterações aplicadas por operação, alterações sem efeito, segundos).
+    """
+    inicio = time.perf_counter()
+    aplicadas = {INSERIR: 0, ALTERAR: 0, REMOVER: 0}
+    sem_efeito = 0
+    cursor = conn.cursor()
+    if not conn.in_transaction:
+        cursor.execute("BEGIN")
+    try:
+        for lidas, (operacao, secao, chave, linha) in enumerate(alteracoes, 1):
+            if aplicar_alteracao(cursor, operacao, secao, chave, linha):
+                aplicadas[operacao] += 1
+            else:
+                sem_efeito += 1
+            if lidas % ALTERACOES_POR_AVISO == 0:
+                if ao_progresso:
+                    ao_progresso("diferencial", secao, lidas)
+                verificar_cancelamento(cancelar)
+        verificar_cancelamento(cancelar)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return aplicadas, sem_efeito, time.perf_counter() - inicio
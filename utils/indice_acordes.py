@@ -0,0 +1,76 @@
+from utils.cifra import extrair_acordes
+
+# Sobe quando a extração de acordes (ou o índice) muda; o banco guarda a versão indexada em
+# PRAGMA user_version. A versão 2 passou a marcar as músicas processadas em musicas_indexadas.
+VERSAO_INDICE = 2
+
+def indexar_musica(cursor, id_musica, cifra):
+    """Atualiza os acordes indexados de uma música (o commit fica com quem chamou)"""
+    cursor.execute("DELETE FROM musica_acordes WHERE id_musica=?", (id_musica,))
+    cursor.executemany(
+        "INSERT INTO musica_acordes (id_musica, acorde) VALUES (?, ?)",
+        [(id_musica, acorde) for acorde in extrair_acordes(cifra or "")]
+    )
+    cursor.execute("INSERT OR IGNORE INTO musicas_indexadas (id_musica) VALUES (?)", (id_musica,))
+
+def remover_musica(cursor, id_musica):
+    """Tira uma música excluída do índice"""
+    cursor.execute("DELETE FROM musica_acordes WHERE id_musica=?", (id_musica,))
+    cursor.execute("DELETE FROM musicas_indexadas WHERE id_musica=?", (id_musica,))
+
+def reindexar_pendentes(cursor):
+    """Indexa em lote as músicas ainda não processadas; retorna quantas
+
+    Toda música indexada fica marcada em musicas_indexadas, com ou sem acordes, e sai da
+    marcação quando a cifra muda (gatilho criado em database.py). Assim as músicas sem
+    acordes não são relidas a cada abertura do app ou importação.
+    """
+    cursor.execute('''
+        SELECT m.id, m.cifra FROM musicas m
+        WHERE NOT EXISTS (SELECT 1 FROM musicas_indexadas i WHERE i.id_musica = m.id)
+    ''')
+    pendentes = cursor.fetchall()
+    ids = [(id_musica,) for id_musica, _ in pendentes]
+    # Acordes de uma cifra anterior, se a música já esteve no índice
+    cursor.executemany("DELETE FROM musica_acordes WHERE id_musica=?", ids)
+    cursor.executemany(
+        "INSERT OR IGNORE INTO musica_acordes (id_musica, acorde) VALUES (?, ?)",
+        [(id_musica, acorde) for id_musica, cifra in pendentes for acorde in extrair_acordes(cifra or "")]
+    )
+    cursor.executemany("INSERT INTO musicas_indexadas (id_musica) VALUES (?)", ids)
+    return len(pendentes)
+
+def reindexar_tudo(cursor):
+    """Reconstrói o índice inteiro a partir das cifras"""
+    cursor.execute("DELETE FROM musica_acordes")
+    cursor.execute("DELETE FROM musicas_indexadas")
+    return reindexar_pendentes(cursor)
+
+def atualizar_indice(cursor):
+    """Reconstrói o índice feito por uma versão anterior da extração; senão, indexa só as pendentes"""
+    cursor.execute("PRAGMA user_version")
+    if cursor.fetchone()[0] < VERSAO_INDICE:
+        reindexar_tudo(cursor)
+        cursor.execute(f"PRAGMA user_version = {VERSAO_INDICE}")
+    else:
+        reindexar_pendentes(cursor)
+
+def buscar_musicas_por_acordes(cursor, acordes):
+    """IDs das músicas que usam todos os acordes informados"""
+    acordes = sorted(set(acordes))
+    if not acordes:
+        return set()
+    marcadores = ", ".join("?" for _ in acordes)
+    cursor.execute(
+        f"SELECT id_musica FROM musica_acordes WHERE acorde IN ({marcadores}) "
+        "GROUP BY id_musica HAVING COUNT(*) = ?",
+        (*acordes, len(acordes))
+    )
+    return {linha[0] for linha in cursor.fetchall()}
+
+def listar_acordes(cursor):
+    """Acordes indexados com a quantidade de músicas em que aparecem, dos mais usados aos menos"""
+    cursor.execute(
+        "SELECT acorde, COUNT(*) FROM musica_acordes GROUP BY acorde ORDER BY COUNT(*) DESC, acorde"
+    )
+    return cursor.fetchall()
@@ -0,0 +1,245 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from utils.helpers import percentil
+from utils.rastreamento import somar_banco
+
+LIMITE_LENTA_MS = 50  # execuções acima disso vão para o registro de consultas lentas
+MAX_AMOSTRAS = 500  # tempos guardados por consulta para o p95 (os mais recentes)
+MAX_LENTAS = 200
+COMANDOS_COM_PLANO = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTA = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ESPACOS = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def normalizar_sql(sql):
+    """Forma da consulta sem os valores: literais viram ?, listas (?, ?, ...) viram (?...)"""
+    sql = _ESPACOS.sub(" ", sql).strip()
+    sql = _LITERAL.sub("?", sql)
+    return _LISTA.sub("(?...)", sql)
+
+class RegistroConsultas:
+    """Contagem, tempo total, p95 e máximo por consulta normalizada, e as execuções lentas
+
+    Compartilhado pelas conexões instrumentadas (e pelas threads delas): o lock guarda os
+    agregados, as lentas, os planos e os cursores pendentes.
+    O plano (EXPLAIN QUERY PLAN) de cada consulta lenta é tirado uma vez e reaproveitado. Ele
+    não entra nos agregados, porque é custo do próprio diagnóstico e não uma consulta do app
+    (e registrá-lo poderia torná-lo lento e pedir o plano do plano); o tempo dele fica em
+    "plano_ms" na consulta lenta que o pediu e conta como banco na ação rastreada.
+    """
+
+    def __init__(self, limite_lenta_ms=LIMITE_LENTA_MS):
+        self.limite_lenta = limite_lenta_ms / 1000
+        self.consultas = {}
+        self.lentas = deque(maxlen=MAX_LENTAS)
+        self.planos = {}
+        self.desde = datetime.now()
+        # Reentrante: o __del__ de um cursor pode registrar no meio de um trecho que já tem o lock
+        self._lock = threading.RLock()
+        # Cursores com uma leitura ainda aberta: o resumo registra o que eles já mediram
+        self.pendentes = weakref.WeakSet()
+
+    def registrar(self, conn, sql, parametros, segundos):
+        chave = normalizar_sql(sql)
+        with self._lock:
+            dados = self.consultas.get(chave)
+            if dados is None:
+                dados = self.consultas[chave] = {"execucoes": 0, "total": 0.0, "maximo": 0.0, "amostras": deque(maxlen=MAX_AMOSTRAS)}
+            dados["execucoes"] += 1
+            dados["total"] += segundos
+            dados["maximo"] = max(dados["maximo"], segundos)
+            dados["amostras"].append(segundos)
+        if segundos >= self.limite_lenta:
+            plano, segundos_plano = self._plano(conn, chave, sql, parametros)
+            with self._lock:
+                self.lentas.append({
+                    "quando": datetime.now().isoformat(timespec="seconds"),
+                    "sql": chave,
+                    "ms": round(segundos * 1000, 2),
+                    "plano": plano,
+                    "plano_ms": round(segundos_plano * 1000, 2),
+                })
+
+    def _plano(self, conn, chave, sql, parametros):
+        """(linhas do EXPLAIN QUERY PLAN, segundos gastos nele)
+
+        O plano é None se a consulta não tem plano ou os parâmetros não vieram; o já guardado custa zero.
+        """
+        with self._lock:
+            if chave in self.planos:
+                return self.planos[chave], 0.0
+        plano = None
+        inicio = time.perf_counter()
+        if sql.lstrip().upper().startswith(COMANDOS_COM_PLANO) and parametros is not None:
+            try:
+                # Cursor comum de propósito: o EXPLAIN fica fora dos agregados (veja a classe)
+                plano = [linha[3] for linha in sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", parametros)]
+            except sqlite3.Error:
+                plano = None
+        segundos = time.perf_counter() - inicio
+        somar_banco(segundos)
+        with self._lock:
+            self.planos[chave] = plano
+        return plano, segundos
+
+    def adicionar_pendente(self, cursor):
+        with self._lock:
+            self.pendentes.add(cursor)
+
+    def remover_pendente(self, cursor):
+        with self._lock:
+            self.pendentes.discard(cursor)
+
+    def resumo(self):
+        """Agregados por consulta, do maior tempo total para o menor, e as lentas mais recentes"""
+        # A lista é copiada sob o lock; _concluir registra (e pega o lock) fora dele
+        with self._lock:
+            pendentes = list(self.pendentes)
+        for cursor in pendentes:
+            cursor._concluir()
+        with self._lock:
+            consultas = [
+                {
+                    "sql": chave,
+                    "execucoes": dados["execucoes"],
+                    "total_ms": round(dados["total"] * 1000, 2),
+                    "media_ms": round(dados["total"] * 1000 / dados["execucoes"], 3),
+                    "p95_ms": round(percentil(dados["amostras"], 0.95) * 1000, 3),
+                    "maximo_ms": round(dados["maximo"] * 1000, 2),
+                }
+                for chave, dados in self.consultas.items()
+            ]
+            lentas = list(reversed(self.lentas))
+            desde = self.desde
+        consultas.sort(key=lambda consulta: consulta["total_ms"], reverse=True)
+        return {
+            "desde": desde.isoformat(timespec="seconds"),
+            "limite_lenta_ms": self.limite_lenta * 1000,
+            "consultas": consultas,
+            "lentas": lentas,
+        }
+
+    def zerar(self):
+        with self._lock:
+            self.consultas.clear()
+            self.lentas.clear()
+            self.planos.clear()
+            self.desde = datetime.now()
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """Cursor que mede cada execução, do execute até a última leitura dos resultados
+
+    Comandos sem resultado (INSERT, UPDATE, ...) são registrados logo depois do execute. Nos
+    SELECT, o tempo dos fetch* é somado ao da execução, registrada quando a leitura chega ao
+    fim; se o cursor parar antes (um fetchone só), ela é registrada no próximo execute, no
+    close, quando o cursor é descartado ou quando o resumo é pedido.
+    """
+
+    _em_andamento = None
+
+    def _iniciar(self, sql, parametros, funcao, *argumentos):
+        self._concluir()
+        inicio = time.perf_counter()
+        try:
+            return funcao(self, sql, *argumentos)
+        finally:
+            segundos = time.perf_counter() - inicio
+            self._em_andamento = [sql, parametros, segundos]
+            somar_banco(segundos, consulta=True)
+            if self.description is None:
+                self._concluir()
+            else:
+                self.connection.registro.adicionar_pendente(self)
+
+    def _concluir(self):
+        andamento = self._em_andamento
+        if andamento is not None:
+            self._em_andamento = None
+            sql, parametros, segundos = andamento
+            self.connection.registro.remover_pendente(self)
+            self.connection.registro.registrar(self.connection, sql, parametros, segundos)
+
+    def _medir_leitura(self, funcao, *argumentos):
+        inicio = time.perf_counter()
+        resultado = None
+        try:
+            resultado = funcao(self, *argumentos)
+            return resultado
+        finally:
+            segundos = time.perf_counter() - inicio
+            andamento = self._em_andamento
+            if andamento is not None:
+                andamento[2] += segundos
+            somar_banco(segundos)
+            # Leitura até o fim: fetchall, fetchone sem linha ou fetchmany com menos linhas que o pedido
+            if funcao is sqlite3.Cursor.fetchall or not resultado or (
+                    funcao is sqlite3.Cursor.fetchmany and len(resultado) < (argumentos[0] if argumentos else self.arraysize)):
+                self._concluir()
+
+    def execute(self, sql, parametros=()):
+        return self._iniciar(sql, parametros, sqlite3.Cursor.execute, parametros)
+
+    def executemany(self, sql, sequencia):
+        # Os parâmetros de um executemany podem ser um gerador já consumido: sem plano
+        return self._iniciar(sql, None, sqlite3.Cursor.executemany, sequencia)
+
+    def fetchone(self):
+        return self._medir_leitura(sqlite3.Cursor.fetchone)
+
+    def fetchmany(self, *argumentos):
+        return self._medir_leitura(sqlite3.Cursor.fetchmany, *argumentos)
+
+    def fetchall(self):
+        return self._medir_leitura(sqlite3.Cursor.fetchall)
+
+    def close(self):
+        self._concluir()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._concluir()
+        except Exception:
+            pass  # conexão já fechada ou o interpretador saindo
+
+class ConexaoInstrumentada(sqlite3.Connection):
+    """Conexão cujos cursores são instrumentados; registro é o RegistroConsultas que recebe os tempos"""
+
+    registro = None
+
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    def commit(self):
+        # A gravação em disco acontece aqui, fora dos cursores: entra como a consulta COMMIT
+        inicio = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            segundos = time.perf_counter() - inicio
+            self.registro.registrar(self, "COMMIT", None, segundos)
+            somar_banco(segundos)
+
+def salvar_diagnostico(registro, caminho, extras=None):
+    """Grava o resumo do registro (e os extras, como o estado do arquivo do banco) em JSON"""
+    dados = registro.resumo()
+    dados["gerado_em"] = datetime.now().isoformat(timespec="seconds")
+    dados.update(extras or {})
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(dados, arquivo, ensure_ascii=False, indent=2)
+    return caminho
+
+def conectar_instrumentado(caminho, registro, **opcoes):
+    """sqlite3.connect com cursores instrumentados que registram em `registro`"""
+    conn = sqlite3.connect(caminho, factory=ConexaoInstrumentada, **opcoes)
+    conn.registro = registro
+    return conn
@@ -0,0 +1,84 @@
+import re
+import sqlite3
+
+# Tabela filha -> chaves estrangeiras (coluna, tabela do pai), todas com ON DELETE CASCADE
+CHAVES_ESTRANGEIRAS = {
+    "repertorios_shows": (("id_show", "shows"), ("id_musica", "musicas")),
+    "checklist_detail": (("id_checklist", "checklist"),),
+    "musica_acordes": (("id_musica", "musicas"),),
+    "musicas_indexadas": (("id_musica", "musicas"),),
+}
+
+# Bancos criados antes das cascatas: tabelas reconstruídas com o esquema atual
+TABELAS_SEM_CASCATA = ("repertorios_shows", "musica_acordes")
+
+def ligar_chaves_estrangeiras(conn):
+    """Faz o SQLite conferir as chaves estrangeiras nesta conexão (vale só para ela)"""
+    conn.execute("PRAGMA foreign_keys = ON")
+
+def criar_cascatas(cursor):
+    """Reconstrói as tabelas de bancos antigos cujas chaves estrangeiras não têm ON DELETE CASCADE
+
+    O SQLite não altera uma chave estrangeira existente: a tabela é recriada a partir do
+    próprio esquema gravado (com as colunas acrescentadas depois), os dados são copiados com
+    os mesmos ids e ela volta ao nome original. Índices e gatilhos somem com a tabela antiga
+    e são recriados em seguida por quem monta o esquema. Precisa rodar com as chaves
+    estrangeiras desligadas. Retorna as tabelas reconstruídas.
+    """
+    reconstruidas = []
+    for tabela in TABELAS_SEM_CASCATA:
+        cursor.execute(f"PRAGMA foreign_key_list({tabela})")
+        if all(chave[6] == "CASCADE" for chave in cursor.fetchall()):
+            continue
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (tabela,))
+        esquema = cursor.fetchone()[0]
+        esquema = re.sub(r"(REFERENCES \w+ \(id\))(?! ON DELETE)", r"\1 ON DELETE CASCADE", esquema)
+        esquema = esquema.replace(f"CREATE TABLE {tabela}", f"CREATE TABLE {tabela}_nova", 1)
+        cursor.execute(f"DROP TABLE IF EXISTS {tabela}_nova")
+        cursor.execute(esquema)
+        cursor.execute(f"INSERT INTO {tabela}_nova SELECT * FROM {tabela}")
+        cursor.execute(f"DROP TABLE {tabela}")
+        cursor.execute(f"ALTER TABLE {tabela}_nova RENAME TO {tabela}")
+        reconstruidas.append(tabela)
+    return reconstruidas
+
+def _paginas(cursor, tabelas):
+    """Páginas ocupadas pelas tabelas e seus índices (dbstat); sem dbstat, as livres do arquivo com sinal trocado"""
+    marcadores = ", ".join("?" for _ in tabelas)
+    try:
+        cursor.execute(
+            f"SELECT COUNT(*) FROM dbstat WHERE name IN (SELECT name FROM sqlite_master WHERE tbl_name IN ({marcadores}))",
+            tabelas
+        )
+    except sqlite3.OperationalError:
+        cursor.execute("PRAGMA freelist_count")
+        return -cursor.fetchone()[0]
+    return cursor.fetchone()[0]
+
+def varrer_orfaos(conn):
+    """Apaga os registros cujo pai não existe mais (deixados antes das chaves estrangeiras)
+
+    Cada filho é procurado pela chave primária do pai, sem varrer a tabela do pai. Os
+    gatilhos registram as remoções como qualquer outra. Retorna {"linhas": {tabela: apagadas},
+    "paginas": páginas que as tabelas e índices deixaram de ocupar, "bytes": tamanho delas};
+    as páginas ficam livres para o banco reaproveitar (o arquivo só diminui com VACUUM).
+    """
+    cursor = conn.cursor()
+    tabelas = list(CHAVES_ESTRANGEIRAS)
+    cursor.execute("PRAGMA page_size")
+    tamanho_pagina = cursor.fetchone()[0]
+    paginas_antes = _paginas(cursor, tabelas)
+    linhas = {}
+    try:
+        for tabela, chaves in CHAVES_ESTRANGEIRAS.items():
+            orfao = " OR ".join(
+                f"NOT EXISTS (SELECT 1 FROM {pai} WHERE {pai}.id = {tabela}.{coluna})" for coluna, pai in chaves
+            )
+            cursor.execute(f"DELETE FROM {tabela} WHERE {orfao}")
+            linhas[tabela] = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    paginas = max(paginas_antes - _paginas(cursor, tabelas), 0)
+    return {"linhas": linhas, "paginas": paginas, "bytes": paginas * tamanho_pagina}
@@ -0,0 +1,94 @@
+import math
+from functools import lru_cache
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import cm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+# Medidas do PDF cifrado (1px do CSS = 0,75pt no xhtml2pdf)
+PX = 0.75
+FONTE = "Helvetica-Bold"
+# line-height 1.0 do CSS; o xhtml2pdf usa entrelinha de ~1,04x o tamanho da fonte
+ALTURA_LINHA = 1.04
+TAMANHO_MINIMO_PX = 12
+TAMANHO_MAXIMO_PX = 34
+# Folga para o espaço perdido na quebra de linha e no padding do destaque da cifra
+APROVEITAMENTO_LINHA = 0.95
+
+_largura_pagina, _altura_pagina = landscape(A4)
+# @page margin 0.5cm + padding do body 0.5cm, dos dois lados
+LARGURA_UTIL = _largura_pagina - 4 * 0.5 * cm
+ALTURA_PAGINA = _altura_pagina - 4 * 0.5 * cm
+MARGEM_MUSICA = 0.1 * cm  # margin-bottom de cada música
+ALTURA_UTIL = ALTURA_PAGINA - MARGEM_MUSICA
+
+@lru_cache(maxsize=None)
+def largura_caractere(caractere):
+    """Largura de um caractere na fonte do PDF em tamanho 1pt (métrica em cache)"""
+    return stringWidth(caractere, FONTE, 1)
+
+def largura_texto(texto):
+    """Largura de um texto em tamanho 1pt somando as métricas em cache"""
+    return sum(largura_caractere(c) for c in texto)
+
+def contar_linhas(larguras_palavras, largura_espaco, largura_linha):
+    """Quebra gulosa das palavras (larguras já na escala) e retorna o número de linhas"""
+    linhas = 1
+    ocupado = 0.0
+    for largura in larguras_palavras:
+        if ocupado and ocupado + largura_espaco + largura > largura_linha:
+            linhas += 1
+            ocupado = largura
+        else:
+            ocupado += (largura_espaco if ocupado else 0) + largura
+    return linhas
+
+@lru_cache(maxsize=4096)
+def medir_musica(nome, tom, cifra):
+    """Maior fonte (px) em que o bloco da música cabe inteiro em uma página e a altura (pt) do bloco"""
+    # No HTML as quebras de linha da cifra viram espaço, então o bloco é um parágrafo só
+    texto = f"➔ {nome or ''} {tom or ''} {cifra or ''}"
+    palavras = [largura_texto(p) for p in texto.split()]
+    espaco = largura_caractere(" ")
+    largura_linha = LARGURA_UTIL * APROVEITAMENTO_LINHA
+
+    # Estimativa por área: n linhas * altura <= página, com n ~ largura total * t / largura da linha
+    area = (sum(palavras) + espaco * len(palavras)) * ALTURA_LINHA
+    tamanho = min(TAMANHO_MAXIMO_PX * PX, math.sqrt(ALTURA_UTIL * largura_linha / area) if area else math.inf)
+
+    # Uma única correção pela quebra real de palavras: reduzir a fonte nunca aumenta as linhas
+    linhas = contar_linhas([p * tamanho for p in palavras], espaco * tamanho, largura_linha)
+    tamanho = min(tamanho, ALTURA_UTIL / (linhas * ALTURA_LINHA))
+
+    tamanho_px = max(TAMANHO_MINIMO_PX, math.floor(tamanho / PX))
+    tamanho = tamanho_px * PX
+    linhas = contar_linhas([p * tamanho for p in palavras], espaco * tamanho, largura_linha)
+    return tamanho_px, linhas * tamanho * ALTURA_LINHA
+
+def tamanho_fonte_musica(nome, tom, cifra):
+    """Maior fonte (px) em que o bloco da música cabe inteiro em uma página"""
+    return medir_musica(nome, tom, cifra)[0]
+
+def paginar_repertorio(repertorio):
+    """Distribui as músicas em páginas como o fluxo do PDF cifrado (música não se divide)"""
+    paginas = [[]]
+    ocupado = 0.0
+    for musica in repertorio:
+        tamanho_px, altura = medir_musica(musica[1], musica[2], musica[3])
+        if paginas[-1] and ocupado + altura > ALTURA_PAGINA:
+            paginas.append([])
+            ocupado = 0.0
+        paginas[-1].append(musica)
+        # Entre uma música e a seguinte o xhtml2pdf deixa uma linha em branco além da margem
+        ocupado += altura + tamanho_px * PX * ALTURA_LINHA + MARGEM_MUSICA
+    return paginas
+
+def dividir_em_blocos(repertorio, num_blocos):
+    """Divide o repertório em até num_blocos partes contíguas que começam sempre em página nova"""
+    paginas = paginar_repertorio(repertorio)
+    num_blocos = max(1, min(num_blocos, len(paginas)))
+    blocos = []
+    for i in range(num_blocos):
+        inicio = len(paginas) * i // num_blocos
+        fim = len(paginas) * (i + 1) // num_blocos
+        blocos.append([musica for pagina in paginas[inicio:fim] for musica in pagina])
+    return blocos
@@ -0,0 +1,159 @@
+import sqlite3
+import time
+
+INCREMENTAL = 2  # PRAGMA auto_vacuum: 0 = nenhum, 1 = completo, 2 = incremental
+LIMITE_ANALISE = 1000  # linhas lidas por índice pelo PRAGMA optimize (analysis_limit)
+PAGINAS_POR_VACUUM = 2000  # páginas devolvidas ao sistema na manutenção leve (fechar o app, ociosidade)
+INTERVALO_MANUTENCAO = 30 * 60  # segundos mínimos entre manutenções leves com o app aberto
+OCIOSIDADE_MANUTENCAO = 5 * 60  # segundos sem ação na interface para a manutenção leve rodar
+VERIFICACAO_OCIOSIDADE = 60  # segundos entre as verificações de ociosidade
+
+# Consultas do dia a dia, cronometradas antes e depois da manutenção
+CONSULTAS_SONDAGEM = {
+    "lista de músicas": "SELECT id, musica, autor, estilo, tom FROM musicas ORDER BY musica",
+    "músicas por tom": "SELECT COUNT(*) FROM musicas WHERE tom = '(Am)'",
+    "repertórios": '''
+        SELECT s.id, COUNT(rs.id) FROM shows s
+        LEFT JOIN repertorios_shows rs ON rs.id_show = s.id
+        GROUP BY s.id
+    ''',
+    "busca por acorde": '''
+        SELECT m.id FROM musicas m
+        JOIN musica_acordes a ON a.id_musica = m.id
+        WHERE a.acorde = 'Am7'
+    ''',
+    "itens pendentes": "SELECT COUNT(*) FROM checklist_detail WHERE status = 0",
+}
+
+def _valor(cursor, comando):
+    cursor.execute(comando)
+    return cursor.fetchone()[0]
+
+def resumo_arquivo(conn):
+    """Tamanho do banco, páginas livres e modo de auto_vacuum (leitura rápida, só PRAGMAs)"""
+    cursor = conn.cursor()
+    tamanho_pagina = _valor(cursor, "PRAGMA page_size")
+    paginas = _valor(cursor, "PRAGMA page_count")
+    livres = _valor(cursor, "PRAGMA freelist_count")
+    return {
+        "bytes": paginas * tamanho_pagina,
+        "paginas": paginas,
+        "livres": livres,
+        "bytes_livres": livres * tamanho_pagina,
+        "auto_vacuum": _valor(cursor, "PRAGMA auto_vacuum"),
+    }
+
+def estatisticas_banco(conn):
+    """Resumo do arquivo, registros por tabela e tamanho e seletividade de cada índice
+
+    As páginas de cada tabela e índice vêm do dbstat (None se o SQLite não o tiver). A
+    seletividade (registros por valor da chave) vem do sqlite_stat1, preenchido pelo ANALYZE;
+    None se o índice ainda não foi analisado.
+    """
+    cursor = conn.cursor()
+    estatisticas = resumo_arquivo(conn)
+    cursor.execute("SELECT name, tbl_name, type FROM sqlite_master WHERE type IN ('table', 'index') ORDER BY tbl_name, name")
+    objetos = [(nome, tabela, tipo) for nome, tabela, tipo in cursor.fetchall() if not nome.startswith("sqlite_stat")]
+
+    try:
+        cursor.execute("SELECT name, COUNT(*) FROM dbstat GROUP BY name")
+        paginas = dict(cursor.fetchall())
+    except sqlite3.OperationalError:
+        paginas = None
+    seletividade = {}
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+    if cursor.fetchone():
+        cursor.execute("SELECT idx, stat FROM sqlite_stat1 WHERE idx IS NOT NULL")
+        for indice, stat in cursor.fetchall():
+            numeros = stat.split()
+            if len(numeros) > 1:
+                seletividade[indice] = int(numeros[1])
+
+    estatisticas["tabelas"] = []
+    estatisticas["indices"] = []
+    for nome, tabela, tipo in objetos:
+        if tipo == "table":
+            if not nome.startswith("sqlite_"):
+                registros = _valor(cursor, f'SELECT COUNT(*) FROM "{nome}"')
+                estatisticas["tabelas"].append((nome, registros, paginas.get(nome) if paginas else None))
+        else:
+            estatisticas["indices"].append((nome, tabela, paginas.get(nome) if paginas else None, seletividade.get(nome)))
+    return estatisticas
+
+def sondar_consultas(conn):
+    """Tempo (ms) de cada consulta de CONSULTAS_SONDAGEM"""
+    cursor = conn.cursor()
+    tempos = {}
+    for nome, consulta in CONSULTAS_SONDAGEM.items():
+        inicio = time.perf_counter()
+        cursor.execute(consulta)
+        cursor.fetchall()
+        tempos[nome] = (time.perf_counter() - inicio) * 1000
+    return tempos
+
+def ativar_vacuum_incremental(conn):
+    """Passa o banco para auto_vacuum incremental; bancos com dados precisam de um VACUUM completo"""
+    conn.commit()
+    conn.execute(f"PRAGMA auto_vacuum = {INCREMENTAL}")
+    conn.execute("VACUUM")
+
+def vacuum_incremental(conn, paginas=None):
+    """Devolve ao sistema até `paginas` páginas livres (todas se None); retorna quantas"""
+    cursor = conn.cursor()
+    livres = _valor(cursor, "PRAGMA freelist_count")
+    # O PRAGMA devolve uma página por passo e o execute só dá o primeiro; o executescript vai
+    # até o fim (e antes faz commit do que estiver pendente)
+    conn.executescript(f"PRAGMA incremental_vacuum({paginas or 0});")
+    return livres - _valor(cursor, "PRAGMA freelist_count")
+
+def analisar(conn):
+    """ANALYZE completo: estatísticas de todas as tabelas e índices para o planejador"""
+    conn.execute("ANALYZE")
+    conn.commit()
+
+def otimizar(conn):
+    """PRAGMA optimize com limite de leitura: reanalisa só os índices que precisam"""
+    conn.execute(f"PRAGMA analysis_limit = {LIMITE_ANALISE}")
+    conn.execute("PRAGMA optimize")
+    conn.commit()
+
+def executar_manutencao(conn, ao_progresso=None):
+    """ANALYZE, PRAGMA optimize e vacuum (incremental; completo na primeira vez), com medições
+
+    ao_progresso(etapa) é chamado antes de cada etapa. Retorna {"antes", "depois"} com o
+    resumo do arquivo e o tempo das consultas de sondagem, {"etapas": {etapa: segundos}} e
+    "paginas_devolvidas".
+    """
+    resultado = {"antes": resumo_arquivo(conn), "etapas": {}}
+    resultado["antes"]["consultas"] = sondar_consultas(conn)
+
+    def etapa(nome, funcao):
+        if ao_progresso:
+            ao_progresso(nome)
+        inicio = time.perf_counter()
+        funcao()
+        resultado["etapas"][nome] = time.perf_counter() - inicio
+
+    conn.commit()
+    etapa("ANALYZE", lambda: analisar(conn))
+    etapa("PRAGMA optimize", lambda: otimizar(conn))
+    if resultado["antes"]["auto_vacuum"] != INCREMENTAL:
+        etapa("VACUUM", lambda: ativar_vacuum_incremental(conn))
+    else:
+        etapa("vacuum incremental", lambda: vacuum_incremental(conn))
+
+    resultado["depois"] = resumo_arquivo(conn)
+    resultado["depois"]["consultas"] = sondar_consultas(conn)
+    resultado["paginas_devolvidas"] = resultado["antes"]["paginas"] - resultado["depois"]["paginas"]
+    return resultado
+
+def manutencao_leve(conn):
+    """Manutenção rápida para fechar o app ou rodar ociosa: optimize e parte das páginas livres
+
+    Não faz VACUUM completo: um banco ainda sem auto_vacuum incremental só ganha o optimize.
+    Retorna as páginas devolvidas ao sistema.
+    """
+    otimizar(conn)
+    if _valor(conn.cursor(), "PRAGMA auto_vacuum") != INCREMENTAL:
+        return 0
+    return vacuum_incremental(conn, PAGINAS_POR_VACUUM)
@@ -0,0 +1,150 @@
+import re
+import os
+from datetime import datetime
+from xhtml2pdf import pisa
+from pypdf import PdfReader, PdfWriter
+from utils.pdf_nativo import renderizar_simplificado_nativo
+from utils.layout_pdf import tamanho_fonte_musica, TAMANHO_MAXIMO_PX
+from utils.templates_pdf import (
+    ConstrutorHTML, escapar, CABECALHO_SIMPLIFICADO, SEPARADOR_COLUNAS, RODAPE_SIMPLIFICADO, RODAPE,
+    cabecalho_cifrado, processar_cifra_para_pdf
+)
+
+# Incrementar sempre que o layout dos PDFs mudar, para invalidar o cache
+VERSAO_TEMPLATE = 5
+
+# Marca do início de cada música no PDF cifrado, usada para conferir onde as páginas quebram
+SETA_MUSICA = "➔"
+
+# Motor de cada tipo de exportação: "html" (xhtml2pdf) ou "nativo" (desenho direto com reportlab,
+# disponível só para o simplificado, que é uma lista de layout fixo)
+BACKENDS_PDF = {
+    "cifrado": "html",
+    "simplificado": "nativo",
+}
+
+def _linha_simplificado(numero, musica):
+    """Linha numerada de uma música no PDF simplificado"""
+    return (
+        f'<div class="musica"><span class="numero">{numero}.</span> <span class="conteudo">'
+        f'<span class="nome">{escapar(musica[1])}</span> <span class="tom"> {escapar(musica[2])}</span>'
+        f'</span></div>\n'
+    )
+
+def gerar_html_simplificado(repertorio):
+    """Gera o HTML para PDF simplificado"""
+    html = ConstrutorHTML(CABECALHO_SIMPLIFICADO)
+    
+    num_musicas = len(repertorio)
+    metade = (num_musicas + 1) // 2
+    
+    html.estender(_linha_simplificado(i + 1, repertorio[i]) for i in range(metade))
+    html.bruto(SEPARADOR_COLUNAS)
+    html.estender(_linha_simplificado(i + 1, repertorio[i]) for i in range(metade, num_musicas))
+    html.bruto(RODAPE_SIMPLIFICADO)
+    
+    return html.render()
+
+def gerar_html_cifrado(repertorio):
+    """Gera o HTML para PDF cifrado"""
+    # Cada música recebe a maior fonte em que cabe inteira na página (medida e memorizada)
+    html = ConstrutorHTML(cabecalho_cifrado(TAMANHO_MAXIMO_PX))
+    
+    html.estender(
+        f'<div class="musica" style="font-size: {tamanho_fonte_musica(musica[1], musica[2], musica[3])}px">'
+        f'<span class="seta">{SETA_MUSICA}</span> <span class="nome">{escapar(musica[1])}</span> '
+        f'<span class="tom">{escapar(musica[2])}</span> '
+        f'<span class="cifra">{processar_cifra_para_pdf(musica[3] or "")}</span></div>\n'
+        for musica in repertorio
+    )
+    
+    html.bruto(RODAPE)
+    return html.render()
+
+def nome_arquivo_pdf(show, tipo="cifrado"):
+    """Monta o nome do arquivo no padrão dd-mm-aaaa - artista - local.pdf"""
+    try:
+        data_obj = datetime.strptime(show[1], "%d/%m/%Y")
+        data_formatada = data_obj.strftime("%d-%m-%Y")
+    except:
+        data_formatada = "data-desconhecida"
+    
+    artista_limpo = re.sub(r'[^\w\s-]', '', show[3]).replace(' ', '-')
+    local_limpo = re.sub(r'[^\w\s-]', '', show[2]).replace(' ', '-')
+    
+    if tipo == "simplificado":
+        return f"{data_formatada} - {artista_limpo} - {local_limpo} - SIMPLIFICADO.pdf"
+    return f"{data_formatada} - {artista_limpo} - {local_limpo}.pdf"
+
+def gerar_html(tipo, repertorio):
+    """Gera o HTML do repertório conforme o tipo de exportação"""
+    if tipo == "simplificado":
+        return gerar_html_simplificado(repertorio)
+    return gerar_html_cifrado(repertorio)
+
+def backend_pdf(tipo):
+    """Motor de renderização configurado para o tipo de exportação"""
+    return BACKENDS_PDF.get(tipo, "html")
+
+def renderizar_pdf(tipo, repertorio, destino, backend=None):
+    """Renderiza o repertório em PDF direto no arquivo de destino (troca atômica)"""
+    if (backend or backend_pdf(tipo)) == "nativo" and tipo == "simplificado":
+        return renderizar_simplificado_nativo(repertorio, destino)
+    
+    html_content = gerar_html(tipo, repertorio)
+    
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    try:
+        with open(temporario, 'wb') as f:
+            pisa_status = pisa.CreatePDF(html_content, dest=f)
+        
+        if pisa_status.err:
+            raise RuntimeError("Erro ao gerar PDF")
+        
+        os.replace(temporario, destino)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    
+    return destino
+
+def renderizar_parte(tipo, bloco, proxima, destino):
+    """Renderiza uma parte do PDF dividido e confere se ela termina em fim de página
+
+    A parte é renderizada com a primeira música da parte seguinte no fim: se essa música
+    abriu uma página só dela, o documento inteiro também quebraria a página ali e a
+    última página pode ser descartada na junção. Retorna se a quebra confere.
+    """
+    if proxima is None:
+        renderizar_pdf(tipo, bloco, destino)
+        return True
+    
+    renderizar_pdf(tipo, list(bloco) + [proxima], destino)
+    ultima = PdfReader(destino).pages[-1].extract_text() or ""
+    return ultima.count(SETA_MUSICA) == 1
+
+def juntar_pdfs(partes, destino, descartar_ultima=False):
+    """Junta os PDFs parciais, na ordem, em um único arquivo (troca atômica)
+
+    Com descartar_ultima, a última página de cada parte menos a final fica de fora
+    (a página de conferência de renderizar_parte).
+    """
+    writer = PdfWriter()
+    for i, parte in enumerate(partes):
+        if descartar_ultima and i < len(partes) - 1:
+            paginas = len(PdfReader(parte).pages)
+            writer.append(parte, pages=(0, paginas - 1))
+        else:
+            writer.append(parte)
+    
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    try:
+        with open(temporario, 'wb') as f:
+            writer.write(f)
+        os.replace(temporario, destino)
+    finally:
+        writer.close()
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    
+    return destino
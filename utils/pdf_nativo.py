@@ -0,0 +1,87 @@
+import os
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import cm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+# Medidas do CSS_SIMPLIFICADO (templates_pdf.py) como o xhtml2pdf as aplica (1px do CSS = 0,75pt)
+PX = 0.75
+FONTE = "Helvetica-Bold"  # Arial, sans-serif no CSS
+TAMANHO_FONTE = 30 * PX
+MARGEM = 0.5 * cm  # @page
+PADDING_VERTICAL = 5 * PX  # td
+PADDING_HORIZONTAL = 15 * PX
+ALTURA_TEXTO = 1.3 * TAMANHO_FONTE  # line-height da .musica
+MARGEM_MUSICA = 10 * PX  # margin-bottom da .musica (a última da coluna não conta)
+# O xhtml2pdf soma 2,5px a cada bloco e põe a linha de base a 0,582 da fonte acima do fim da linha
+PASSO_LINHA = ALTURA_TEXTO + MARGEM_MUSICA + 2.5 * PX
+BASE_TEXTO = ALTURA_TEXTO - 0.582 * TAMANHO_FONTE
+# O xhtml2pdf ignora o min-width do número e o espaço entre os spans: o nome vem logo depois
+# do número e da margin-right, e o tom colado ao nome
+RECUO_NUMERO = 1
+ESPACO_NUMERO = 10 * PX
+COR_FUNDO = (0xF0 / 255, 0xF0 / 255, 0xF0 / 255)
+COR_TOM = (0x8B / 255, 0x45 / 255, 0x13 / 255)
+
+def escala_simplificado(linhas_por_coluna, altura_pagina=landscape(A4)[1]):
+    """Redução do texto para uma coluna caber em uma página, como o xhtml2pdf faz com cada célula
+
+    A tabela do HTML nunca se divide: cada coluna encolhe até caber na altura útil.
+    """
+    if not linhas_por_coluna:
+        return 1.0
+    disponivel = altura_pagina - 2 * MARGEM - 2 * PADDING_VERTICAL
+    altura = linhas_por_coluna * PASSO_LINHA - MARGEM_MUSICA
+    return min(1.0, disponivel / altura)
+
+def _desenhar_musica(pdf, x, y, escala, numero, musica):
+    """Desenha a linha numerada de uma música na escala do documento"""
+    tamanho = TAMANHO_FONTE * escala
+    numero = f"{numero}."
+    nome = musica[1] or ""
+    x_nome = x + (RECUO_NUMERO + stringWidth(numero, FONTE, TAMANHO_FONTE) + ESPACO_NUMERO) * escala
+
+    pdf.setFillColorRGB(0, 0, 0)
+    pdf.setFont(FONTE, tamanho)
+    pdf.drawString(x + RECUO_NUMERO * escala, y, numero)
+    pdf.drawString(x_nome, y, nome)
+    if musica[2]:
+        pdf.setFillColorRGB(*COR_TOM)
+        pdf.drawString(x_nome + stringWidth(nome, FONTE, tamanho), y, musica[2])
+
+def renderizar_simplificado_nativo(repertorio, destino):
+    """Desenha o repertório simplificado direto com o canvas do reportlab, sem HTML
+
+    Reproduz a página do xhtml2pdf: uma página A4 paisagem, a primeira metade das músicas na
+    coluna da esquerda e o resto na da direita, cada coluna na escala de escala_simplificado.
+    """
+    largura_pagina, altura_pagina = landscape(A4)
+    largura_coluna = (largura_pagina - 2 * MARGEM) / 2
+
+    num_musicas = len(repertorio)
+    metade = (num_musicas + 1) // 2
+    colunas = [
+        [(i + 1, repertorio[i]) for i in range(metade)],
+        [(i + 1, repertorio[i]) for i in range(metade, num_musicas)],
+    ]
+    topo = altura_pagina - MARGEM - PADDING_VERTICAL
+
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    try:
+        pdf = canvas.Canvas(temporario, pagesize=(largura_pagina, altura_pagina), pageCompression=1)
+        pdf.setFillColorRGB(*COR_FUNDO)
+        pdf.rect(0, 0, largura_pagina, altura_pagina, stroke=0, fill=1)
+        for indice_coluna, coluna in enumerate(colunas):
+            x = MARGEM + indice_coluna * largura_coluna + PADDING_HORIZONTAL
+            escala = escala_simplificado(len(coluna), altura_pagina)
+            for linha, (numero, musica) in enumerate(coluna):
+                y = topo - (linha * PASSO_LINHA + BASE_TEXTO) * escala
+                _desenhar_musica(pdf, x, y, escala, numero, musica)
+        pdf.showPage()
+        pdf.save()
+        os.replace(temporario, destino)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+    return destino
@@ -0,0 +1,266 @@
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from utils.helpers import percentil
+
+DIRETORIO_RASTROS = "rastros"
+ARQUIVO_RASTROS = "acoes.jsonl"
+TAMANHO_MAXIMO = 1024 * 1024  # bytes por arquivo antes de girar
+ARQUIVOS_GUARDADOS = 3  # acoes.jsonl.1 ... acoes.jsonl.3
+
+# Ação em andamento: por contexto, e não por thread, para os handlers async que dividem o loop
+_acao = contextvars.ContextVar("acao", default=None)
+
+def somar_banco(segundos, consulta=False):
+    """Soma tempo de banco à ação em andamento (chamado pelo cursor instrumentado)"""
+    acao = _acao.get()
+    if acao is not None:
+        acao["banco"] += segundos
+        if consulta:
+            acao["consultas"] += 1
+
+@contextmanager
+def trecho(nome):
+    """Mede uma parte nomeada da ação em andamento ("trechos" na linha dela); sem ação, não faz nada
+
+    O trecho guarda o tempo total e quanto dele foi banco e page.update; trechos com o mesmo
+    nome na mesma ação são somados.
+    """
+    acao = _acao.get()
+    if acao is None:
+        yield
+        return
+    banco, update = acao["banco"], acao["update"]
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medido = acao["trechos"].setdefault(nome, {"ms": 0.0, "banco_ms": 0.0, "update_ms": 0.0})
+        medido["ms"] += (time.perf_counter() - inicio) * 1000
+        medido["banco_ms"] += (acao["banco"] - banco) * 1000
+        medido["update_ms"] += (acao["update"] - update) * 1000
+
+def nome_handler(handler):
+    """Classe e método do handler (lambdas aparecem como Classe.metodo.<locals>.<lambda>)"""
+    return getattr(handler, "__qualname__", None) or type(handler).__name__
+
+def media_trechos(registros):
+    """Média por execução de cada trecho (ms), contando as execuções da ação que não passaram nele"""
+    somas = {}
+    for registro in registros:
+        for parte, medido in registro.get("trechos", {}).items():
+            somas[parte] = somas.get(parte, 0.0) + medido["ms"]
+    return {parte: round(soma / len(registros), 2) for parte, soma in somas.items()}
+
+def nome_evento(evento, handler):
+    """Nome da ação de um evento: controle, evento e handler (Checkbox.change → ...)"""
+    return f"{type(evento.control).__name__}.{evento.name} → {nome_handler(handler)}"
+
+class Rastreador:
+    """Rastros das ações da interface: uma linha JSON por ação em rastros/acoes.jsonl
+
+    Cada ação separa o tempo do banco (cursores instrumentados), o do page.update (montagem
+    e envio das mudanças para a interface) e o resto, que é o Python do handler montando os
+    controles; os trechos marcados com trecho() aparecem à parte. O arquivo gira ao passar de
+    TAMANHO_MAXIMO, guardando ARQUIVOS_GUARDADOS antigos.
+
+    Uso:
+        rastreador.instalar(page)          # todos os eventos da página, handlers síncronos e async
+        handler = rastreador.rastrear(f)   # um handler avulso (síncrono ou async)
+        with rastreador.acao("nome"):      # qualquer bloco como uma ação
+        with trecho("cards"):              # parte da ação em andamento, dentro de um handler
+    """
+
+    def __init__(self, diretorio=DIRETORIO_RASTROS):
+        self.diretorio = diretorio
+        self.caminho = os.path.join(diretorio, ARQUIVO_RASTROS)
+        self._lock = threading.Lock()
+        # Para saber se o app está ocioso: início ou fim da última ação e ações em andamento
+        self.ultima_atividade = time.monotonic()
+        self._acoes_abertas = 0
+
+    def segundos_ocioso(self):
+        """Segundos desde a última ação da interface (zero enquanto alguma está rodando)"""
+        with self._lock:
+            if self._acoes_abertas:
+                return 0.0
+            return time.monotonic() - self.ultima_atividade
+
+    def _marcar_atividade(self, abertas):
+        with self._lock:
+            self._acoes_abertas += abertas
+            self.ultima_atividade = time.monotonic()
+
+    @contextmanager
+    def acao(self, nome):
+        """Mede o bloco como uma ação e grava a linha dela ao sair, com o erro se houver
+
+        Uma ação aberta dentro de outra grava a própria linha e não soma na de fora.
+        """
+        acao = {"banco": 0.0, "consultas": 0, "update": 0.0, "updates": 0, "trechos": {}, "descartar": False}
+        token = _acao.set(acao)
+        self._marcar_atividade(1)
+        erro = None
+        inicio = time.perf_counter()
+        try:
+            yield acao
+        except Exception as ex:
+            erro = f"{type(ex).__name__}: {ex}"
+            raise
+        finally:
+            total = time.perf_counter() - inicio
+            _acao.reset(token)
+            self._marcar_atividade(-1)
+            if not acao["descartar"]:
+                self.gravar({
+                    "quando": datetime.now().isoformat(timespec="milliseconds"),
+                    "acao": nome,
+                    "total_ms": round(total * 1000, 2),
+                    "banco_ms": round(acao["banco"] * 1000, 2),
+                    "consultas": acao["consultas"],
+                    "update_ms": round(acao["update"] * 1000, 2),
+                    "updates": acao["updates"],
+                    "controles_ms": round(max(total - acao["banco"] - acao["update"], 0) * 1000, 2),
+                    "trechos": {
+                        parte: {campo: round(valor, 2) for campo, valor in medido.items()}
+                        for parte, medido in acao["trechos"].items()
+                    },
+                    "erro": erro,
+                })
+
+    def rastrear(self, handler, nome=None):
+        """Envolve o handler para que cada chamada seja uma ação (async continua async)"""
+        nome = nome or nome_handler(handler)
+        if asyncio.iscoroutinefunction(handler):
+            @functools.wraps(handler)
+            async def rastreado_async(*argumentos, **opcoes):
+                with self.acao(nome):
+                    return await handler(*argumentos, **opcoes)
+            return rastreado_async
+
+        @functools.wraps(handler)
+        def rastreado(*argumentos, **opcoes):
+            with self.acao(nome):
+                return handler(*argumentos, **opcoes)
+        return rastreado
+
+    def medir_update(self, funcao):
+        """Envolve page.update/page.add: o tempo entra como update da ação em andamento"""
+        @functools.wraps(funcao)
+        def medida(*argumentos, **opcoes):
+            acao = _acao.get()
+            if acao is None:
+                return funcao(*argumentos, **opcoes)
+            inicio = time.perf_counter()
+            try:
+                return funcao(*argumentos, **opcoes)
+            finally:
+                acao["update"] += time.perf_counter() - inicio
+                acao["updates"] += 1
+        return medida
+
+    def instalar(self, page):
+        """Aplica rastrear() a todos os eventos da página e medir_update() ao page.update/page.add
+
+        O Flet entrega cada evento em page.on_event_async: os handlers async são aguardados ali
+        e os síncronos seguem para page.run_thread(handler, evento). As duas entradas são
+        envolvidas, com o nome "Controle.evento → handler". Control.update() chama
+        page.update(controle), então entra no tempo de update como o page.update(). Um handler
+        async que só repassa o evento para um síncrono (o EventHandler dos controles com
+        conversão do resultado) não grava linha: a do síncrono já conta. Sem run_thread (outra
+        versão do Flet), não instala nada e retorna False.
+        """
+        if not hasattr(page, "run_thread"):
+            return False
+        run_thread = page.run_thread
+        on_event_async = getattr(page, "on_event_async", None)
+
+        def run_thread_rastreado(handler, *argumentos, **opcoes):
+            evento = argumentos[0] if argumentos else None
+            if hasattr(evento, "control") and hasattr(evento, "name"):
+                repassando = _acao.get()
+                if repassando is not None and repassando.get("evento_async"):
+                    repassando["descartar"] = True
+                handler = self.rastrear(handler, nome_evento(evento, handler))
+            return run_thread(handler, *argumentos, **opcoes)
+
+        async def on_event_async_rastreado(e):
+            controle = getattr(page, "_index", {}).get(e.target)
+            handler = controle.event_handlers.get(e.name) if controle is not None else None
+            if not asyncio.iscoroutinefunction(handler):
+                return await on_event_async(e)
+            with self.acao(f"{type(controle).__name__}.{e.name} → {nome_handler(handler)}") as acao:
+                acao["evento_async"] = True
+                return await on_event_async(e)
+
+        page.run_thread = run_thread_rastreado
+        if on_event_async is not None:
+            page.on_event_async = on_event_async_rastreado
+        page.update = self.medir_update(page.update)
+        page.add = self.medir_update(page.add)
+        return True
+
+    def gravar(self, registro):
+        """Acrescenta uma linha ao arquivo de rastros, girando os arquivos se ele passou do limite"""
+        linha = json.dumps(registro, ensure_ascii=False) + "\n"
+        with self._lock:
+            os.makedirs(self.diretorio, exist_ok=True)
+            if os.path.exists(self.caminho) and os.path.getsize(self.caminho) + len(linha) > TAMANHO_MAXIMO:
+                self._girar()
+            with open(self.caminho, "a", encoding="utf-8") as arquivo:
+                arquivo.write(linha)
+
+    def _girar(self):
+        for numero in range(ARQUIVOS_GUARDADOS - 1, 0, -1):
+            origem = f"{self.caminho}.{numero}"
+            if os.path.exists(origem):
+                os.replace(origem, f"{self.caminho}.{numero + 1}")
+        os.replace(self.caminho, f"{self.caminho}.1")
+
+    def arquivos(self):
+        """Arquivos de rastros existentes, do mais antigo para o atual"""
+        candidatos = [f"{self.caminho}.{numero}" for numero in range(ARQUIVOS_GUARDADOS, 0, -1)] + [self.caminho]
+        return [caminho for caminho in candidatos if os.path.exists(caminho)]
+
+    def resumir(self):
+        """Por ação: vezes, média e p95 do total, e a média de banco, update, controles e trechos
+
+        Lê todos os arquivos guardados (sessões anteriores também). Ordenado pelo p95.
+        """
+        acoes = {}
+        for caminho in self.arquivos():
+            with open(caminho, encoding="utf-8") as arquivo:
+                for linha in arquivo:
+                    try:
+                        registro = json.loads(linha)
+                    except ValueError:
+                        continue  # última linha cortada por um fechamento abrupto
+                    acoes.setdefault(registro["acao"], []).append(registro)
+        resumo = []
+        for nome, registros in acoes.items():
+            vezes = len(registros)
+
+            def media(campo):
+                return round(sum(registro[campo] for registro in registros) / vezes, 2)
+
+            resumo.append({
+                "acao": nome,
+                "vezes": vezes,
+                "total_ms": media("total_ms"),
+                "p95_ms": percentil([registro["total_ms"] for registro in registros], 0.95),
+                "banco_ms": media("banco_ms"),
+                "consultas": media("consultas"),
+                "update_ms": media("update_ms"),
+                "updates": media("updates"),
+                "controles_ms": media("controles_ms"),
+                "trechos": media_trechos(registros),
+                "erros": sum(1 for registro in registros if registro.get("erro")),
+            })
+        resumo.sort(key=lambda acao: acao["p95_ms"], reverse=True)
+        return resumo
@@ -0,0 +1,404 @@
+import time
+import uuid
+from utils.indice_acordes import indexar_musica, remover_musica, reindexar_pendentes
+from utils.diferencial import TABELAS_REGISTRADAS
+from utils.staging import criar_staging, remover_staging, carregar_staging, verificar_cancelamento
+
+TIPO_PACOTE = "sincronizacao"
+
+# Carimbo de hora em UTC com milissegundos; o mesmo texto gerado no SQLite e no Python,
+# para que a comparação como texto siga a ordem do tempo
+AGORA = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+NOVO_UUID = '''(
+    lower(hex(randomblob(4))) || '-' || lower(hex(randomblob(2))) || '-4' ||
+    substr(lower(hex(randomblob(2))), 2) || '-' || substr('89ab', 1 + abs(random()) % 4, 1) ||
+    substr(lower(hex(randomblob(2))), 2) || '-' || lower(hex(randomblob(6)))
+)'''
+
+# Seções do pacote de sincronização na ordem de aplicação. Cada registro vai com o uuid e o
+# carimbo de alteração; os filhos apontam para os pais pelo uuid, não pelo id local. Só vai o
+# que foi alterado ou recebido aqui depois de :desde (vazio no pacote completo)
+SECOES_SINCRONIZACAO = (
+    ("musicas", '''
+        SELECT uuid, atualizado_em, musica, autor, estilo, tom, cifra FROM musicas
+        WHERE atualizado_em > :desde OR recebido_em > :desde
+    '''),
+    ("shows", '''
+        SELECT uuid, atualizado_em, data_show, local_show, artista FROM shows
+        WHERE atualizado_em > :desde OR recebido_em > :desde
+    '''),
+    ("repertorios", '''
+        SELECT rs.uuid, rs.atualizado_em, s.uuid, m.uuid, rs.sequencia, rs.transposicao, rs.arranjo_show
+        FROM repertorios_shows rs
+        JOIN shows s ON rs.id_show = s.id
+        JOIN musicas m ON rs.id_musica = m.id
+        WHERE rs.atualizado_em > :desde OR rs.recebido_em > :desde
+    '''),
+    ("checklists", '''
+        SELECT uuid, atualizado_em, data, titulo FROM checklist
+        WHERE atualizado_em > :desde OR recebido_em > :desde
+    '''),
+    ("checklist_detalhes", '''
+        SELECT cd.uuid, cd.atualizado_em, c.uuid, cd.descricao, cd.status
+        FROM checklist_detail cd
+        JOIN checklist c ON cd.id_checklist = c.id
+        WHERE cd.atualizado_em > :desde OR cd.recebido_em > :desde
+    '''),
+    ("remocoes", '''
+        SELECT uuid, tabela, removido_em FROM remocoes
+        WHERE removido_em > :desde OR recebido_em > :desde
+    '''),
+)
+
+# Seção -> (tabela temporária, colunas); os ids locais dos pais ficam no fim e são
+# resolvidos depois da leitura (as linhas do pacote não os trazem e chegam como NULL)
+TABELAS_SINCRONIZACAO = {
+    "musicas": ("sinc_musicas", ("uuid", "atualizado_em", "musica", "autor", "estilo", "tom", "cifra")),
+    "shows": ("sinc_shows", ("uuid", "atualizado_em", "data_show", "local_show", "artista")),
+    "repertorios": ("sinc_repertorios", (
+        "uuid", "atualizado_em", "uuid_show", "uuid_musica", "sequencia", "transposicao", "arranjo_show",
+        "id_show", "id_musica"
+    )),
+    "checklists": ("sinc_checklists", ("uuid", "atualizado_em", "data", "titulo")),
+    "checklist_detalhes": ("sinc_checklist_detalhes", (
+        "uuid", "atualizado_em", "uuid_checklist", "descricao", "status", "id_checklist"
+    )),
+    "remocoes": ("sinc_remocoes", ("uuid", "tabela", "removido_em")),
+}
+
+# Seção -> (tabela, chave natural usada quando o uuid ainda não é conhecido, descrição para
+# o relatório de conflitos); as colunas gravadas são as mesmas do registro de alterações
+MESCLAGEM_SINCRONIZACAO = {
+    "musicas": ("musicas", ("musica", "autor"), "l.musica"),
+    "shows": ("shows", ("data_show", "local_show", "artista"), "l.data_show || ' - ' || l.local_show"),
+    "repertorios": ("repertorios_shows", ("id_show", "id_musica"), '''(
+        SELECT s.data_show || ' - ' || s.local_show || ': ' || m.musica
+        FROM shows s, musicas m WHERE s.id = l.id_show AND m.id = l.id_musica
+    )'''),
+    "checklists": ("checklist", ("data", "titulo"), "l.titulo"),
+    "checklist_detalhes": ("checklist_detail", ("id_checklist", "descricao"), "l.descricao"),
+}
+
+# Colunas com o id local de um pai: (coluna, coluna com o uuid do pai, seção do pai)
+PAIS_SINCRONIZACAO = {
+    "repertorios": (("id_show", "uuid_show", "shows"), ("id_musica", "uuid_musica", "musicas")),
+    "checklist_detalhes": (("id_checklist", "uuid_checklist", "checklists"),),
+}
+
+# Remoções vindas do outro aparelho: filhos antes dos pais, e cada pai leva os seus filhos
+ORDEM_REMOCAO = ("checklist_detail", "repertorios_shows", "checklist", "shows", "musicas")
+FILHOS = {
+    "musicas": (("repertorios_shows", "id_musica"),),
+    "shows": (("repertorios_shows", "id_show"),),
+    "checklist": (("checklist_detail", "id_checklist"),),
+}
+SECAO_DA_TABELA = {tabela: secao for secao, (tabela, _, _) in MESCLAGEM_SINCRONIZACAO.items()}
+
+def preparar_sincronizacao(cursor):
+    """Garante uuid e carimbo de alteração em todas as tabelas, as remoções e o id deste aparelho
+
+    Bancos antigos ganham as colunas, e os registros que já existiam recebem um uuid novo e
+    o carimbo da migração. Daí em diante os gatilhos mantêm os dois campos. recebido_em
+    guarda quando a sincronização gravou o registro aqui (o carimbo continua o de origem),
+    para que ele siga no próximo pacote para um terceiro aparelho.
+    """
+    cursor.execute("CREATE TABLE IF NOT EXISTS dispositivo (id TEXT NOT NULL)")
+    cursor.execute("SELECT id FROM dispositivo")
+    if cursor.fetchone() is None:
+        cursor.execute("INSERT INTO dispositivo (id) VALUES (?)", (str(uuid.uuid4()),))
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS remocoes (
+            uuid TEXT PRIMARY KEY,
+            tabela TEXT NOT NULL,
+            removido_em TEXT NOT NULL,
+            recebido_em TEXT
+        ) WITHOUT ROWID
+    ''')
+    # Por aparelho: até onde aplicamos os pacotes dele (no relógio dele), quando foi isso
+    # (no nosso) e até onde ele confirmou ter aplicado os nossos (no nosso)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sincronizacoes (
+            dispositivo TEXT PRIMARY KEY,
+            gerado_em TEXT NOT NULL,
+            sincronizado_em TEXT NOT NULL,
+            confirmado_em TEXT
+        )
+    ''')
+    for tabela, (_, colunas, _) in TABELAS_REGISTRADAS.items():
+        cursor.execute(f"PRAGMA table_info({tabela})")
+        existentes = [coluna[1] for coluna in cursor.fetchall()]
+        if "uuid" not in existentes:
+            cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN uuid TEXT")
+            cursor.execute(f"UPDATE {tabela} SET uuid = {NOVO_UUID}")
+        if "atualizado_em" not in existentes:
+            cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN atualizado_em TEXT")
+            cursor.execute(f"UPDATE {tabela} SET atualizado_em = {AGORA}")
+        if "recebido_em" not in existentes:
+            cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN recebido_em TEXT")
+        cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{tabela}_uuid ON {tabela}(uuid)")
+
+        mudou = " OR ".join(f"OLD.{coluna} IS NOT NEW.{coluna}" for coluna in colunas)
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS sincronizacao_{tabela}_inclusao AFTER INSERT ON {tabela}
+            WHEN NEW.uuid IS NULL OR NEW.atualizado_em IS NULL
+            BEGIN
+                UPDATE {tabela} SET uuid = COALESCE(NEW.uuid, {NOVO_UUID}),
+                                    atualizado_em = COALESCE(NEW.atualizado_em, {AGORA})
+                WHERE id = NEW.id;
+            END
+        ''')
+        # Quem grava o carimbo junto (a própria sincronização) mantém o que gravou
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS sincronizacao_{tabela}_alteracao AFTER UPDATE ON {tabela}
+            WHEN ({mudou}) AND NEW.atualizado_em IS OLD.atualizado_em
+            BEGIN
+                UPDATE {tabela} SET atualizado_em = {AGORA} WHERE id = NEW.id;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS sincronizacao_{tabela}_exclusao AFTER DELETE ON {tabela}
+            WHEN OLD.uuid IS NOT NULL
+            BEGIN
+                INSERT OR REPLACE INTO remocoes (uuid, tabela, removido_em) VALUES (OLD.uuid, '{tabela}', {AGORA});
+            END
+        ''')
+
+def dispositivo_local(cursor):
+    cursor.execute("SELECT id FROM dispositivo")
+    return cursor.fetchone()[0]
+
+def agora(cursor):
+    """Carimbo de hora atual no formato de atualizado_em"""
+    cursor.execute(f"SELECT {AGORA}")
+    return cursor.fetchone()[0]
+
+def inicio_pacote(cursor):
+    """A partir de quando o próximo pacote precisa ir: o que todos os aparelhos já confirmaram
+
+    Vazio (pacote completo) se ainda não há aparelho conhecido ou algum nunca confirmou.
+    """
+    cursor.execute("SELECT COUNT(*), COUNT(confirmado_em), MIN(confirmado_em) FROM sincronizacoes")
+    aparelhos, confirmados, desde = cursor.fetchone()
+    if not aparelhos or confirmados < aparelhos:
+        return ""
+    return desde
+
+def recebidos(cursor):
+    """Até onde aplicamos os pacotes de cada aparelho, para ele saber o que já temos"""
+    cursor.execute("SELECT dispositivo, gerado_em FROM sincronizacoes")
+    return dict(cursor.fetchall())
+
+def _resolver_pais(cursor, secao):
+    """Preenche os ids locais dos pais de uma seção filha a partir dos uuids do pacote"""
+    staging = TABELAS_SINCRONIZACAO[secao][0]
+    for coluna, coluna_uuid, secao_pai in PAIS_SINCRONIZACAO.get(secao, ()):
+        tabela_pai = MESCLAGEM_SINCRONIZACAO[secao_pai][0]
+        cursor.execute(f'''
+            UPDATE {staging} SET {coluna} = COALESCE(
+                (SELECT id_local FROM sinc_mapa WHERE secao = '{secao_pai}' AND uuid_remoto = {staging}.{coluna_uuid}),
+                (SELECT id FROM {tabela_pai} WHERE uuid = {staging}.{coluna_uuid})
+            )
+        ''')
+
+def _mapear(cursor, secao):
+    """Liga cada registro do pacote ao registro local: pelo uuid e, se não houver, pela chave natural"""
+    tabela, chave, _ = MESCLAGEM_SINCRONIZACAO[secao]
+    staging = TABELAS_SINCRONIZACAO[secao][0]
+    cursor.execute(f'''
+        INSERT INTO sinc_mapa (secao, uuid_remoto, id_local, por_chave)
+        SELECT '{secao}', s.uuid, l.id, 0 FROM {staging} s JOIN {tabela} l ON l.uuid = s.uuid
+    ''')
+    # Registros criados separadamente nos dois aparelhos (antes de sincronizar) têm uuids
+    # diferentes; cada local fica com um único registro do pacote, o de menor uuid
+    mesma_chave = " AND ".join(f"l.{coluna} IS s.{coluna}" for coluna in chave)
+    cursor.execute(f'''
+        INSERT INTO sinc_mapa (secao, uuid_remoto, id_local, por_chave)
+        SELECT '{secao}', MIN(u.uuid), u.id_local, 1
+        FROM (
+            SELECT s.uuid, (
+                SELECT MIN(l.id) FROM {tabela} l
+                WHERE {mesma_chave}
+                  AND l.id NOT IN (SELECT id_local FROM sinc_mapa WHERE secao = '{secao}')
+            ) AS id_local
+            FROM {staging} s
+            WHERE s.uuid NOT IN (SELECT uuid_remoto FROM sinc_mapa WHERE secao = '{secao}')
+        ) u
+        WHERE u.id_local IS NOT NULL
+        GROUP BY u.id_local
+    ''')
+
+def _mesclar_secao(cursor, secao, remoto_desde, local_desde):
+    """Aplica uma seção do pacote; retorna (incluídas, atualizadas, conflitos)"""
+    tabela, _, descricao = MESCLAGEM_SINCRONIZACAO[secao]
+    staging = TABELAS_SINCRONIZACAO[secao][0]
+    colunas = TABELAS_REGISTRADAS[tabela][1]
+    diferente = " OR ".join(f"l.{coluna} IS NOT s.{coluna}" for coluna in colunas)
+    pais_conhecidos = " AND ".join(
+        ["1"] + [f"s.{coluna} IS NOT NULL" for coluna, _, _ in PAIS_SINCRONIZACAO.get(secao, ())]
+    )
+    condicoes = f"p.secao = '{secao}' AND {pais_conhecidos} AND ({diferente})"
+    ligados = f'''
+        FROM sinc_mapa p
+        JOIN {staging} s ON s.uuid = p.uuid_remoto
+        JOIN {tabela} l ON l.id = p.id_local
+        WHERE {condicoes}
+    '''
+
+    # Alterado nos dois aparelhos desde a última sincronização entre eles: fica o mais novo
+    cursor.execute(f"SELECT {descricao}, l.atualizado_em, s.atualizado_em {ligados} AND s.atualizado_em > ? AND l.atualizado_em > ?",
+                   (remoto_desde, local_desde))
+    conflitos = [
+        (secao, descricao_registro or "", local, remoto, "remoto" if remoto > local else "local")
+        for descricao_registro, local, remoto in cursor.fetchall()
+    ]
+
+    if secao == "musicas":
+        # Cifras que vão mudar precisam ser reindexadas depois
+        cursor.execute(f"SELECT l.id {ligados} AND s.atualizado_em > l.atualizado_em AND l.cifra IS NOT s.cifra")
+        cifras_alteradas = [linha[0] for linha in cursor.fetchall()]
+
+    atribuicoes = ", ".join(f"{coluna} = s.{coluna}" for coluna in colunas)
+    cursor.execute(f'''
+        UPDATE {tabela} AS l SET {atribuicoes}, atualizado_em = s.atualizado_em, recebido_em = {AGORA}
+        FROM sinc_mapa p JOIN {staging} s ON s.uuid = p.uuid_remoto
+        WHERE {condicoes} AND l.id = p.id_local AND s.atualizado_em > l.atualizado_em
+    ''')
+    atualizadas = cursor.rowcount
+
+    # Os dois aparelhos adotam o menor dos dois uuids e passam a se reconhecer pelo uuid
+    cursor.execute(f'''
+        UPDATE {tabela} SET uuid = p.uuid_remoto
+        FROM sinc_mapa p
+        WHERE p.secao = '{secao}' AND p.por_chave = 1 AND {tabela}.id = p.id_local AND p.uuid_remoto < {tabela}.uuid
+    ''')
+
+    # Novos, a não ser que tenham sido apagados aqui depois da última alteração lá
+    cursor.execute(f'''
+        INSERT INTO {tabela} (uuid, atualizado_em, recebido_em, {", ".join(colunas)})
+        SELECT s.uuid, s.atualizado_em, {AGORA}, {", ".join(f"s.{coluna}" for coluna in colunas)}
+        FROM {staging} s
+        WHERE {pais_conhecidos}
+          AND s.uuid NOT IN (SELECT uuid_remoto FROM sinc_mapa WHERE secao = '{secao}')
+          AND NOT EXISTS (SELECT 1 FROM remocoes r WHERE r.uuid = s.uuid AND r.removido_em >= s.atualizado_em)
+        ORDER BY s.rowid
+    ''')
+    incluidas = cursor.rowcount
+
+    if secao == "musicas":
+        for id_musica in cifras_alteradas:
+            cursor.execute("SELECT cifra FROM musicas WHERE id = ?", (id_musica,))
+            indexar_musica(cursor, id_musica, cursor.fetchone()[0])
+    return incluidas, atualizadas, conflitos
+
+def _aplicar_remocoes(cursor):
+    """Apaga o que foi removido no outro aparelho depois da última alteração feita aqui
+
+    Retorna quantos registros foram apagados por seção.
+    """
+    removidas = {secao: 0 for secao in MESCLAGEM_SINCRONIZACAO}
+    for tabela in ORDEM_REMOCAO:
+        removido = f'''
+            SELECT t.id FROM {tabela} t JOIN sinc_remocoes r ON r.uuid = t.uuid
+            WHERE r.tabela = '{tabela}' AND r.removido_em >= t.atualizado_em
+        '''
+        for tabela_filho, coluna in FILHOS.get(tabela, ()):
+            cursor.execute(f"DELETE FROM {tabela_filho} WHERE {coluna} IN ({removido})")
+            removidas[SECAO_DA_TABELA[tabela_filho]] += cursor.rowcount
+        if tabela == "musicas":
+            cursor.execute(removido)
+            for (id_musica,) in cursor.fetchall():
+                remover_musica(cursor, id_musica)
+        cursor.execute(f"DELETE FROM {tabela} WHERE id IN ({removido})")
+        removidas[SECAO_DA_TABELA[tabela]] += cursor.rowcount
+    # As remoções de lá passam a ser daqui também, para seguirem para um terceiro aparelho
+    cursor.execute(f'''
+        INSERT INTO remocoes (uuid, tabela, removido_em, recebido_em)
+        SELECT uuid, tabela, removido_em, {AGORA} FROM sinc_remocoes WHERE 1
+        ON CONFLICT (uuid) DO UPDATE SET removido_em = max(removido_em, excluded.removido_em),
+                                         recebido_em = excluded.recebido_em
+    ''')
+    return removidas
+
+def sincronizar(conn, linhas, cabecalho, ao_progresso=None, cancelar=None):
+    """Mescla um pacote de sincronização de outro aparelho em uma única transação
+
+    Cada registro é achado pelo uuid (ou pela chave natural, na primeira vez) e só é gravado
+    se for mais novo do que o daqui; o que foi alterado nos dois lados desde a última
+    sincronização com aquele aparelho é informado como conflito. ao_progresso(etapa, seção,
+    linhas) segue a importação de backup. Erros e cancelamento desfazem tudo.
+    Retorna (resumo por seção, conflitos, segundos); cada conflito é
+    (seção, descrição, carimbo local, carimbo remoto, versão que ficou).
+    """
+    def avisar(etapa, secao, linhas=0):
+        if ao_progresso:
+            ao_progresso(etapa, secao, linhas)
+
+    inicio = time.perf_counter()
+    cursor = conn.cursor()
+    remoto = cabecalho.get("dispositivo")
+    if not remoto or not cabecalho.get("gerado_em"):
+        raise ValueError("Pacote de sincronização sem identificação do aparelho")
+    if remoto == dispositivo_local(cursor):
+        raise ValueError("Este pacote foi gerado neste mesmo aparelho")
+
+    cursor.execute("SELECT gerado_em, sincronizado_em FROM sincronizacoes WHERE dispositivo = ?", (remoto,))
+    remoto_desde, local_desde = cursor.fetchone() or ("", "")
+    # Um pacote parcial pressupõe que já temos tudo o que o outro aparelho tinha até "desde"
+    if remoto_desde < cabecalho.get("desde", ""):
+        raise ValueError(
+            "O pacote só traz as alterações recentes do outro aparelho; "
+            "exporte lá um pacote completo e importe de novo"
+        )
+    confirmado = cabecalho.get("recebidos", {}).get(dispositivo_local(cursor))
+
+    if not conn.in_transaction:
+        cursor.execute("BEGIN")
+    try:
+        criar_staging(cursor, TABELAS_SINCRONIZACAO)
+        cursor.execute("DROP TABLE IF EXISTS temp.sinc_mapa")
+        cursor.execute("CREATE TEMP TABLE sinc_mapa (secao TEXT, uuid_remoto TEXT, id_local INTEGER, por_chave INTEGER)")
+        cursor.execute("CREATE INDEX temp.idx_sinc_mapa_remoto ON sinc_mapa (secao, uuid_remoto)")
+        cursor.execute("CREATE INDEX temp.idx_sinc_mapa_local ON sinc_mapa (secao, id_local)")
+        carregadas = carregar_staging(
+            cursor, linhas, TABELAS_SINCRONIZACAO,
+            ao_progresso=lambda secao, lidas: avisar("leitura", secao, lidas), cancelar=cancelar
+        )
+        for tabela, _ in TABELAS_SINCRONIZACAO.values():
+            cursor.execute(f"CREATE INDEX temp.idx_{tabela} ON {tabela} (uuid)")
+
+        verificar_cancelamento(cancelar)
+        avisar("mesclagem", "remocoes", carregadas["remocoes"])
+        removidas = _aplicar_remocoes(cursor)
+
+        resumo = {}
+        conflitos = []
+        for secao in MESCLAGEM_SINCRONIZACAO:
+            verificar_cancelamento(cancelar)
+            avisar("mesclagem", secao, carregadas[secao])
+            _resolver_pais(cursor, secao)
+            _mapear(cursor, secao)
+            incluidas, atualizadas, conflitos_secao = _mesclar_secao(cursor, secao, remoto_desde, local_desde)
+            resumo[secao] = {"incluidas": incluidas, "atualizadas": atualizadas, "removidas": removidas[secao]}
+            conflitos += conflitos_secao
+
+        verificar_cancelamento(cancelar)
+        avisar("indice", None)
+        reindexar_pendentes(cursor)
+
+        cursor.execute(f'''
+            INSERT INTO sincronizacoes (dispositivo, gerado_em, sincronizado_em, confirmado_em) VALUES (?, ?, {AGORA}, ?)
+            ON CONFLICT (dispositivo) DO UPDATE SET gerado_em = excluded.gerado_em,
+                                                   sincronizado_em = excluded.sincronizado_em,
+                                                   confirmado_em = excluded.confirmado_em
+        ''', (remoto, cabecalho["gerado_em"], confirmado))
+
+        verificar_cancelamento(cancelar)
+        remover_staging(cursor, TABELAS_SINCRONIZACAO)
+        cursor.execute("DROP TABLE IF EXISTS temp.sinc_mapa")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        remover_staging(cursor, TABELAS_SINCRONIZACAO)
+        cursor.execute("DROP TABLE IF EXISTS temp.sinc_mapa")
+        raise
+    return resumo, conflitos, time.perf_counter() - inicio
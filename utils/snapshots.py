@@ -0,0 +1,140 @@
+import os
+import re
+import shutil
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+DIRETORIO_SNAPSHOTS = "snapshots"
+PAGINAS_POR_PASSO = 256
+INTERVALO_AUTOMATICO = 6 * 60 * 60  # segundos entre snapshots automáticos
+ATRASO_INICIAL = 60  # espera depois de abrir o app antes do primeiro snapshot automático
+MAX_AUTOMATICOS = 10
+DIAS_RETENCAO = 30
+
+TIPOS_SNAPSHOT = {
+    "manual": "Manual",
+    "automatico": "Automático",
+    "pre-restauracao": "Antes de restaurar",
+}
+
+FORMATO_DATA = "%Y%m%d-%H%M%S"
+PADRAO_NOME = re.compile(r'^repertorio-(\d{8}-\d{6})(?:-\d+)?-(manual|automatico|pre-restauracao)\.db$')
+
+def _nome_livre(diretorio, tipo):
+    """Nome do próximo snapshot; acrescenta um contador se já houver outro no mesmo segundo"""
+    carimbo = datetime.now().strftime(FORMATO_DATA)
+    nome = f"repertorio-{carimbo}-{tipo}.db"
+    contador = 1
+    while os.path.exists(os.path.join(diretorio, nome)):
+        contador += 1
+        nome = f"repertorio-{carimbo}-{contador}-{tipo}.db"
+    return os.path.join(diretorio, nome)
+
+def criar_snapshot(caminho_db, diretorio=DIRETORIO_SNAPSHOTS, tipo="manual", ao_progresso=None):
+    """Copia o banco página a página com a API de backup do SQLite; retorna o caminho do snapshot
+
+    A cópia é feita em passos de PAGINAS_POR_PASSO páginas, então o app continua lendo e
+    gravando durante o snapshot. O arquivo só aparece com o nome final quando está completo.
+    ao_progresso(paginas_copiadas, total_paginas) é chamado a cada passo.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    destino = _nome_livre(diretorio, tipo)
+    temporario = f"{destino}.tmp"
+
+    def progresso(status, restantes, total):
+        if ao_progresso:
+            ao_progresso(total - restantes, total)
+
+    origem = sqlite3.connect(caminho_db)
+    copia = sqlite3.connect(temporario)
+    try:
+        origem.backup(copia, pages=PAGINAS_POR_PASSO, progress=progresso)
+        copia.close()
+        os.replace(temporario, destino)
+        return destino
+    finally:
+        origem.close()
+        copia.close()
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+def listar_snapshots(diretorio=DIRETORIO_SNAPSHOTS):
+    """(caminho, data, tipo, tamanho em bytes) dos snapshots, do mais novo para o mais antigo"""
+    if not os.path.isdir(diretorio):
+        return []
+    snapshots = []
+    for nome in os.listdir(diretorio):
+        correspondencia = PADRAO_NOME.match(nome)
+        if correspondencia:
+            caminho = os.path.join(diretorio, nome)
+            data = datetime.strptime(correspondencia.group(1), FORMATO_DATA)
+            snapshots.append((caminho, data, correspondencia.group(2), os.path.getsize(caminho)))
+    # No mesmo segundo, desempata pela hora de gravação do arquivo
+    snapshots.sort(key=lambda snapshot: (snapshot[1], os.path.getmtime(snapshot[0])), reverse=True)
+    return snapshots
+
+def aplicar_retencao(diretorio=DIRETORIO_SNAPSHOTS, maximo=MAX_AUTOMATICOS, dias=DIAS_RETENCAO):
+    """Apaga os snapshots automáticos além dos `maximo` mais novos ou mais velhos que `dias`
+
+    Snapshots manuais e os feitos antes de uma restauração nunca são apagados aqui.
+    Retorna quantos arquivos foram removidos.
+    """
+    limite = datetime.now() - timedelta(days=dias)
+    automaticos = [snapshot for snapshot in listar_snapshots(diretorio) if snapshot[2] == "automatico"]
+    removidos = 0
+    for posicao, (caminho, data, _, _) in enumerate(automaticos):
+        if posicao >= maximo or data < limite:
+            os.remove(caminho)
+            removidos += 1
+    return removidos
+
+def segundos_para_proximo_automatico(diretorio=DIRETORIO_SNAPSHOTS):
+    """Quanto esperar pelo próximo snapshot automático, contando do último já feito"""
+    automaticos = [snapshot for snapshot in listar_snapshots(diretorio) if snapshot[2] == "automatico"]
+    if not automaticos:
+        return ATRASO_INICIAL
+    decorrido = (datetime.now() - automaticos[0][1]).total_seconds()
+    return max(INTERVALO_AUTOMATICO - decorrido, ATRASO_INICIAL)
+
+def snapshot_automatico(caminho_db, diretorio=DIRETORIO_SNAPSHOTS):
+    """Snapshot automático com retenção; não faz nada se o banco não mudou desde o último"""
+    snapshots = listar_snapshots(diretorio)
+    if snapshots and os.path.getmtime(caminho_db) <= max(os.path.getmtime(snapshot[0]) for snapshot in snapshots):
+        return None
+    caminho = criar_snapshot(caminho_db, diretorio, tipo="automatico")
+    aplicar_retencao(diretorio)
+    return caminho
+
+def verificar_snapshot(caminho_snapshot):
+    """Confere a integridade do arquivo antes de restaurar; levanta ValueError se estiver corrompido"""
+    if not os.path.isfile(caminho_snapshot):
+        raise ValueError("Snapshot não encontrado")
+    conn = sqlite3.connect(caminho_snapshot)
+    try:
+        resultado = conn.execute("PRAGMA quick_check").fetchone()[0]
+        tabelas = {linha[0] for linha in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    except sqlite3.DatabaseError as ex:
+        raise ValueError(f"Snapshot inválido: {ex}")
+    finally:
+        conn.close()
+    if resultado != "ok":
+        raise ValueError(f"Snapshot corrompido: {resultado}")
+    if not {"musicas", "shows", "repertorios_shows"} <= tabelas:
+        raise ValueError("O arquivo não é um snapshot do repertório")
+
+def restaurar_arquivo(caminho_db, caminho_snapshot):
+    """Troca o arquivo do banco pelo snapshot (a conexão com o banco precisa estar fechada)
+
+    O snapshot é copiado ao lado do banco e colocado no lugar com os.replace, que é atômico:
+    ou o banco antigo continua inteiro, ou o restaurado está completo.
+    """
+    temporario = f"{caminho_db}.restaurando"
+    shutil.copyfile(caminho_snapshot, temporario)
+    # Um diário de transação que sobrou do banco antigo não pode ser aplicado ao restaurado
+    for sufixo in ("-journal", "-wal", "-shm"):
+        if os.path.exists(caminho_db + sufixo):
+            os.remove(caminho_db + sufixo)
+    os.replace(temporario, caminho_db)
+    # Marca a restauração como alteração, para o próximo snapshot automático não ser pulado
+    os.utime(caminho_db, (time.time(), time.time()))
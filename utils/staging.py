@@ -0,0 +1,62 @@
+# Tabelas temporárias que recebem um arquivo (backup ou pacote de sincronização) como veio,
+# antes da mesclagem em conjunto; usadas pela importação e pela sincronização
+
+LINHAS_POR_LOTE = 1000
+
+class ImportacaoCancelada(Exception):
+    """Importação interrompida pelo usuário (a transação é desfeita)"""
+
+def criar_staging(cursor, tabelas):
+    """Cria as tabelas temporárias (só desta conexão) de {seção: (tabela, colunas)}"""
+    for tabela, colunas in tabelas.values():
+        cursor.execute(f"DROP TABLE IF EXISTS temp.{tabela}")
+        cursor.execute(f"CREATE TEMP TABLE {tabela} ({', '.join(colunas)})")
+
+def remover_staging(cursor, tabelas):
+    """Apaga as tabelas temporárias criadas por criar_staging"""
+    for tabela, _ in tabelas.values():
+        cursor.execute(f"DROP TABLE IF EXISTS temp.{tabela}")
+
+def gravar_lote(cursor, tabela, colunas, lote):
+    """Insere um lote de linhas de uma seção na tabela temporária com executemany
+
+    Linhas com menos colunas (arquivos antigos) são completadas com NULL.
+    """
+    quantidade = len(colunas)
+    cursor.executemany(
+        f"INSERT INTO {tabela} VALUES ({', '.join('?' for _ in colunas)})",
+        [(list(linha) + [None] * quantidade)[:quantidade] for linha in lote]
+    )
+
+def verificar_cancelamento(cancelar):
+    """Levanta ImportacaoCancelada se o evento cancelar foi acionado"""
+    if cancelar is not None and cancelar.is_set():
+        raise ImportacaoCancelada("Importação cancelada")
+
+def carregar_staging(cursor, linhas, tabelas, ao_progresso=None, cancelar=None):
+    """Carrega (seção, linha) nas tabelas temporárias em lotes; retorna quantas linhas por seção
+
+    Seções fora de tabelas são ignoradas. ao_progresso(seção, linhas lidas da seção) é
+    chamado a cada lote gravado.
+    """
+    carregadas = {secao: 0 for secao in tabelas}
+    secao_atual = None
+    lote = []
+    for secao, linha in linhas:
+        if secao not in tabelas:
+            continue
+        if secao != secao_atual or len(lote) >= LINHAS_POR_LOTE:
+            if lote:
+                gravar_lote(cursor, *tabelas[secao_atual], lote)
+                if ao_progresso:
+                    ao_progresso(secao_atual, carregadas[secao_atual])
+                verificar_cancelamento(cancelar)
+            secao_atual = secao
+            lote = []
+        lote.append(linha)
+        carregadas[secao] += 1
+    if lote:
+        gravar_lote(cursor, *tabelas[secao_atual], lote)
+        if ao_progresso:
+            ao_progresso(secao_atual, carregadas[secao_atual])
+    return carregadas
@@ -0,0 +1,82 @@
+from html import escape
+from functools import lru_cache
+from utils.cifra import tokenizar_cifra, ACORDE
+
+CSS_PAGINA = """
+    @page { size: A4 landscape; margin: 0.5cm; }
+"""
+
+CSS_SIMPLIFICADO = CSS_PAGINA + """
+    body { font-family: Arial, sans-serif; font-size: 30px; font-weight: bold;
+           background-color: #F0F0F0; margin: 0; padding: 0; }
+    table { width: 100%; border-collapse: collapse; table-layout: fixed; }
+    td { vertical-align: top; padding: 5px 15px; width: 50%; }
+    .musica { margin-bottom: 10px; line-height: 1.3; display: block; white-space: nowrap; }
+    .numero { color: black; font-weight: bold; display: inline-block; min-width: 40px;
+              text-align: right; margin-right: 10px; }
+    .conteudo { display: inline-block; }
+    .nome { color: black; }
+    .tom { color: #8B4513; }
+"""
+
+CSS_CIFRADO = CSS_PAGINA + """
+    body { font-family: Arial, sans-serif; font-weight: bold; background-color: #F0F0F0;
+           margin: 0; padding: 0.5cm; line-height: 1.0; }
+    .musica { margin-bottom: 0.1cm; line-height: 1.0; page-break-inside: avoid; }
+    .seta { color: red; font-weight: bold; }
+    .nome { color: black; font-weight: bold; }
+    .tom { color: #8B4513; font-weight: bold; }
+    .cifra { color: black; background-color: yellow; font-weight: bold; padding: 0.02cm 0.05cm; }
+    .colchetes { color: blue; background-color: #F0F0F0; font-weight: normal; }
+"""
+
+def _montar_cabecalho(css):
+    """Monta o início do documento HTML com o CSS embutido"""
+    return f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="UTF-8">\n<style>{css}</style>\n</head>\n<body>\n'
+
+CABECALHO_SIMPLIFICADO = _montar_cabecalho(CSS_SIMPLIFICADO) + "<table>\n<tr>\n<td>\n"
+SEPARADOR_COLUNAS = "</td>\n<td>\n"
+RODAPE_SIMPLIFICADO = "</td>\n</tr>\n</table>\n</body>\n</html>"
+RODAPE = "</body>\n</html>"
+
+@lru_cache(maxsize=32)
+def cabecalho_cifrado(tamanho_fonte):
+    """Cabeçalho do PDF cifrado; só o tamanho da fonte varia entre exportações"""
+    return _montar_cabecalho(CSS_CIFRADO + f"    body {{ font-size: {tamanho_fonte}px; }}\n")
+
+def escapar(valor):
+    """Escapa texto do usuário para o HTML"""
+    if not valor:
+        return ""
+    if '<' in valor or '>' in valor or '&' in valor:
+        return escape(valor, quote=False)
+    return valor
+
+@lru_cache(maxsize=1024)
+def processar_cifra_para_pdf(cifra):
+    """Escapa a cifra, destaca texto entre colchetes em azul e substitui -- por →"""
+    if not cifra:
+        return cifra
+
+    # O escape não cria nem desfaz colchetes, setas ou quebras, então os tokens da cifra
+    # escapada são os mesmos da original (e, sem <, > ou &, o mesmo item do cache do tokenizador)
+    return "".join([
+        f'<span class="colchetes">[{valor}]</span>' if tipo == ACORDE else valor
+        for tipo, valor in tokenizar_cifra(escapar(cifra))
+    ])
+
+class ConstrutorHTML:
+    """Acumula fragmentos em uma lista e junta tudo uma vez só no final"""
+
+    def __init__(self, inicio=""):
+        self._partes = [inicio] if inicio else []
+        self.bruto = self._partes.append
+        self.estender = self._partes.extend
+
+    def texto(self, valor):
+        """Adiciona texto do usuário escapado"""
+        self._partes.append(escapar(valor))
+
+    def render(self):
+        """Retorna o documento completo"""
+        return "".join(self._partes)
@@ -0,0 +1,261 @@
+import re
+from functools import lru_cache
+from utils.cifra import linhas_cifra, so_acordes, TEXTO, ACORDE, SETA, PADRAO_ACORDE
+from utils.indice_acordes import indexar_musica
+
+# Tabelas de semitons calculadas uma vez na importação
+SUSTENIDOS = ("C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B")
+BEMOIS = ("C", "Db", "D", "Eb", "E", "F", "Gb", "G", "Ab", "A", "Bb", "B")
+SEMITOM_NOTA = {nota: i for i, nota in enumerate(SUSTENIDOS)}
+SEMITOM_NOTA.update({nota: i for i, nota in enumerate(BEMOIS)})
+SEMITOM_NOTA.update({"Cb": 11, "B#": 0, "E#": 5, "Fb": 4})
+
+# (nota, semitons, bemóis) -> nota transposta, para qualquer deslocamento de -11 a +11
+TABELA_TRANSPOSICAO = {
+    (nota, semitons, bemois): (BEMOIS if bemois else SUSTENIDOS)[(indice + semitons) % 12]
+    for nota, indice in SEMITOM_NOTA.items()
+    for semitons in range(-11, 12)
+    for bemois in (False, True)
+}
+
+# Tons que se escrevem com bemóis (maiores e relativos menores)
+TONS_BEMOIS = {"F", "Bb", "Eb", "Ab", "Db", "Gb", "Dm", "Gm", "Cm", "Fm", "Bbm", "Ebm"}
+
+PADRAO_PARTES_ACORDE = re.compile(r'([A-G][#b]?)(.*?)(?:/([A-G][#b]?))?')
+PADRAO_PALAVRAS = re.compile(r'([\s|;]+)')
+PADRAO_SUFIXO_VERSAO = re.compile(r' \(versão (?:em [^)]*|transposta)\)$')
+
+def normalizar_semitons(semitons):
+    """Leva o deslocamento para o intervalo -5..+6 (o caminho mais curto)"""
+    semitons %= 12
+    return semitons - 12 if semitons > 6 else semitons
+
+@lru_cache(maxsize=4096)
+def analisar_acorde(acorde):
+    """Separa tônica, complemento e baixo de um acorde; None se não for acorde"""
+    if not PADRAO_ACORDE.fullmatch(acorde):
+        return None
+    return PADRAO_PARTES_ACORDE.fullmatch(acorde).groups()
+
+@lru_cache(maxsize=8192)
+def transpor_acorde(acorde, semitons, bemois=False):
+    """Transpõe um acorde; o que não for acorde volta igual"""
+    partes = analisar_acorde(acorde)
+    if partes is None or semitons % 12 == 0:
+        return acorde
+    raiz, complemento, baixo = partes
+    semitons = normalizar_semitons(semitons)
+    resultado = TABELA_TRANSPOSICAO[(raiz, semitons, bemois)] + complemento
+    if baixo:
+        resultado += "/" + TABELA_TRANSPOSICAO[(baixo, semitons, bemois)]
+    return resultado
+
+def _transpor_texto(texto, semitons, bemois):
+    """Transpõe as palavras que são acordes preservando espaços e separadores"""
+    partes = PADRAO_PALAVRAS.split(texto)
+    # Índices pares são palavras, ímpares são os separadores capturados
+    for i in range(0, len(partes), 2):
+        if partes[i]:
+            partes[i] = transpor_acorde(partes[i], semitons, bemois)
+    return "".join(partes)
+
+def usa_bemois(tom):
+    """Indica se o tom (com ou sem parênteses) se escreve com bemóis"""
+    return (tom or "").strip("() ") in TONS_BEMOIS
+
+@lru_cache(maxsize=1024)
+def transpor_tom(tom, semitons):
+    """Transpõe o tom mantendo os parênteses do cadastro; ex.: (F#m) +1 -> (Gm)"""
+    if not tom or semitons % 12 == 0:
+        return tom
+    nucleo = tom.strip("() ")
+    partes = analisar_acorde(nucleo)
+    if partes is None:
+        return tom
+    # Escreve com bemóis se o tom de destino for um tom de bemóis
+    transposto = transpor_acorde(nucleo, semitons, False)
+    if usa_bemois(transposto) or usa_bemois(transpor_acorde(nucleo, semitons, True)):
+        transposto = transpor_acorde(nucleo, semitons, True)
+    return f"({transposto})" if tom.startswith("(") else transposto
+
+@lru_cache(maxsize=1024)
+def transpor_cifra(cifra, semitons, bemois=False):
+    """Transpõe os acordes da cifra e devolve o texto da cifra
+
+    Só muda o que está entre colchetes (quando é acorde) e as palavras das linhas de acordes:
+    a letra fica como está, mesmo começando com "E", "A" ou "Em".
+    """
+    if not cifra or semitons % 12 == 0:
+        return cifra
+    partes = []
+    for linha_de_acordes, tokens in linhas_cifra(cifra):
+        for tipo, valor in tokens:
+            if tipo == TEXTO:
+                partes.append(_transpor_texto(valor, semitons, bemois) if linha_de_acordes else valor)
+            elif tipo == ACORDE:
+                partes.append(f"[{_transpor_texto(valor, semitons, bemois) if so_acordes(valor) else valor}]")
+            elif tipo == SETA:
+                partes.append("--")
+            else:
+                partes.append(valor)
+    return "".join(partes)
+
+def transpor_musica(tom, cifra, semitons):
+    """Tom e cifra transpostos, escolhendo sustenidos ou bemóis pelo tom de destino"""
+    tom_novo = transpor_tom(tom, semitons)
+    return tom_novo, transpor_cifra(cifra, semitons, usa_bemois(tom_novo))
+
+def semitons_entre(tom_origem, tom_destino):
+    """Deslocamento em semitons de um tom para outro; None se algum não for reconhecido"""
+    origem = analisar_acorde((tom_origem or "").strip("() "))
+    destino = analisar_acorde((tom_destino or "").strip("() "))
+    if origem is None or destino is None:
+        return None
+    return normalizar_semitons(SEMITOM_NOTA[destino[0]] - SEMITOM_NOTA[origem[0]])
+
+@lru_cache(maxsize=2048)
+def resolver_musica_show(tom, cifra, transposicao=0, arranjo=None):
+    """Tom e cifra com que a música é tocada no show: arranjo próprio (se houver) e transposição"""
+    return transpor_musica(tom, arranjo or cifra, transposicao or 0)
+
+def previa_transposicao(musicas, semitons):
+    """Resultado da transposição de (id, nome, tom, cifra, deslocamento atual) sem gravar nada"""
+    return [
+        (id_musica, nome, tom, *transpor_musica(tom, cifra, deslocamento + semitons))
+        for id_musica, nome, tom, cifra, deslocamento in musicas
+    ]
+
+def _nome_versao(nome, tom):
+    """Nome da nova versão de uma música em outro tom"""
+    # Transpor uma versão de novo troca o sufixo em vez de acumular
+    nome = PADRAO_SUFIXO_VERSAO.sub("", nome)
+    return f"{nome} (versão em {tom.strip('() ')})" if tom else f"{nome} (versão transposta)"
+
+def _gravar_versao(cursor, id_original, semitons, arranjo=None):
+    """Cria (ou atualiza, se já existir) a versão transposta de uma música; retorna o id"""
+    cursor.execute("SELECT musica, autor, estilo, tom, cifra FROM musicas WHERE id=?", (id_original,))
+    nome, autor, estilo, tom, cifra = cursor.fetchone()
+    cifra = arranjo or cifra
+    tom_novo, cifra_nova = transpor_musica(tom, cifra, semitons)
+    nome_versao = _nome_versao(nome, tom_novo)
+
+    cursor.execute(
+        "SELECT id FROM musicas WHERE musica=? AND (autor=? OR (autor IS NULL AND ? IS NULL))",
+        (nome_versao, autor, autor)
+    )
+    existente = cursor.fetchone()
+    if existente:
+        cursor.execute("UPDATE musicas SET tom=?, cifra=? WHERE id=?", (tom_novo, cifra_nova, existente[0]))
+        id_versao = existente[0]
+    else:
+        cursor.execute(
+            "INSERT INTO musicas (musica, autor, estilo, tom, cifra) VALUES (?, ?, ?, ?, ?)",
+            (nome_versao, autor, estilo, tom_novo, cifra_nova)
+        )
+        id_versao = cursor.lastrowid
+    indexar_musica(cursor, id_versao, cifra_nova)
+    return id_versao
+
+def _repontar_itens(cursor, destinos):
+    """Aponta cada item do repertório para a música de destino sem ferir o UNIQUE(id_show, id_musica)
+
+    destinos é uma lista de (id_item, id_musica atual, id_musica de destino), em ordem de sequência.
+    Dois itens com o mesmo destino viram um só: fica o primeiro e os outros saem do repertório.
+    Um item só é apontado quando nenhum outro ainda ocupa o destino; itens que trocariam de
+    música entre si (um ciclo, raro) ficam como estavam. Retorna (ids repetidos, ids mantidos).
+    """
+    repetidos = []
+    pendentes = []
+    destinos_usados = set()
+    for id_item, atual, destino in destinos:
+        if destino in destinos_usados:
+            repetidos.append(id_item)
+        else:
+            destinos_usados.add(destino)
+            pendentes.append((id_item, atual, destino))
+    if repetidos:
+        cursor.executemany("DELETE FROM repertorios_shows WHERE id=?", [(id_item,) for id_item in repetidos])
+
+    ocupadas = {atual: id_item for id_item, atual, _ in pendentes}
+    apontados = set()
+    while pendentes:
+        restantes = []
+        for id_item, atual, destino in pendentes:
+            if ocupadas.get(destino, id_item) != id_item:
+                restantes.append((id_item, atual, destino))
+                continue
+            cursor.execute(
+                "UPDATE repertorios_shows SET id_musica=?, transposicao=0, arranjo_show=NULL WHERE id=?",
+                (destino, id_item)
+            )
+            ocupadas.pop(atual, None)
+            ocupadas[destino] = id_item
+            apontados.add(id_item)
+        if len(restantes) == len(pendentes):
+            break
+        pendentes = restantes
+    mantidos = [id_item for id_item, _, _ in pendentes if id_item not in apontados]
+    return repetidos, mantidos
+
+def transpor_show(conn, id_show, semitons, modo="show"):
+    """Transpõe o repertório inteiro do show em uma única transação
+
+    modo "show": grava o deslocamento só no repertório do show, sem mexer nas músicas;
+    modo "versao": cria versões transpostas das músicas e aponta o repertório para elas.
+    Retorna {"alteradas": ids das músicas criadas ou atualizadas, "repetidas": nomes das músicas
+    que saíram do repertório porque a versão já estava nele, "mantidas": nomes das que ficaram
+    como estavam (ver _repontar_itens)}.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            '''
+            SELECT rs.id, rs.id_musica, rs.transposicao, rs.arranjo_show, m.musica
+            FROM repertorios_shows rs JOIN musicas m ON m.id = rs.id_musica
+            WHERE rs.id_show=? ORDER BY rs.sequencia
+            ''',
+            (id_show,)
+        )
+        itens = cursor.fetchall()
+
+        resultado = {"alteradas": [], "repetidas": [], "mantidas": []}
+        if modo == "show":
+            cursor.executemany(
+                "UPDATE repertorios_shows SET transposicao=? WHERE id=?",
+                [(normalizar_semitons(deslocamento + semitons), id_item) for id_item, _, deslocamento, _, _ in itens]
+            )
+        else:
+            destinos = []
+            for id_item, id_musica, deslocamento, arranjo, _ in itens:
+                if (deslocamento + semitons) % 12 == 0 and not arranjo:
+                    # Volta ao tom do cadastro: usa a própria música, sem criar versão
+                    destinos.append((id_item, id_musica, id_musica))
+                    continue
+                # O arranjo do show, se houver, vira a cifra da nova versão
+                id_versao = _gravar_versao(cursor, id_musica, deslocamento + semitons, arranjo)
+                destinos.append((id_item, id_musica, id_versao))
+                resultado["alteradas"].append(id_versao)
+            # Uma versão que já está no show (ou que dois itens geram) não pode entrar duas vezes
+            repetidos, mantidos = _repontar_itens(cursor, destinos)
+            nomes = {id_item: nome for id_item, _, _, _, nome in itens}
+            resultado["repetidas"] = [nomes[id_item] for id_item in repetidos]
+            resultado["mantidas"] = [nomes[id_item] for id_item in mantidos]
+        conn.commit()
+        return resultado
+    except Exception:
+        conn.rollback()
+        raise
+
+def transpor_musica_cadastrada(conn, id_musica, semitons):
+    """Transpõe uma música criando uma nova versão no novo tom; o cadastro original não muda
+
+    Retorna o id da versão.
+    """
+    cursor = conn.cursor()
+    try:
+        id_versao = _gravar_versao(cursor, id_musica, semitons)
+        conn.commit()
+        return id_versao
+    except Exception:
+        conn.rollback()
+        raise
@@ -0,0 +1,236 @@
+import time
+from utils.backup import Conferencia, ler_cabecalho, iterar_backup, iterar_diferencial
+from utils.diferencial import TAMANHO_CHAVE, PAIS, ORDEM_SECOES, INSERIR, ALTERAR, REMOVER
+from utils.sincronizacao import TIPO_PACOTE
+
+MAX_PROBLEMAS = 50
+LINHAS_POR_AVISO = 2000
+
+# Seção -> (mínimo e máximo de colunas, posições que não podem ser nulas, posições inteiras)
+# Os mínimos aceitam os backups antigos (repertórios sem tom e arranjo do show)
+ESTRUTURA_BACKUP = {
+    "musicas": (5, 5, (0,), ()),
+    "shows": (3, 3, (0, 1, 2), ()),
+    "repertorios": (6, 8, (0, 1, 2, 3, 5), (5, 6)),
+    "checklists": (2, 2, (0, 1), ()),
+    "checklist_detalhes": (4, 4, (0, 1, 2), (3,)),
+}
+ESTRUTURA_SINCRONIZACAO = {
+    "musicas": (7, 7, (0, 1, 2), ()),
+    "shows": (5, 5, (0, 1, 2, 3, 4), ()),
+    "repertorios": (7, 7, (0, 1, 2, 3, 4), (4, 5)),
+    "checklists": (4, 4, (0, 1, 2, 3), ()),
+    "checklist_detalhes": (5, 5, (0, 1, 2, 3), (4,)),
+    "remocoes": (3, 3, (0, 1, 2), ()),
+}
+
+# Chaves naturais do que já está no banco, nas mesmas posições das linhas do backup
+CONSULTAS_EXISTENTES = {
+    "musicas": "SELECT musica, autor FROM musicas",
+    "shows": "SELECT data_show, local_show, artista FROM shows",
+    "repertorios": '''
+        SELECT s.data_show, s.local_show, s.artista, m.musica, m.autor
+        FROM repertorios_shows rs
+        JOIN shows s ON rs.id_show = s.id
+        JOIN musicas m ON rs.id_musica = m.id
+    ''',
+    "checklists": "SELECT data, titulo FROM checklist",
+    "checklist_detalhes": '''
+        SELECT c.data, c.titulo, cd.descricao
+        FROM checklist_detail cd
+        JOIN checklist c ON cd.id_checklist = c.id
+    ''',
+}
+
+# Pacote de sincronização: coluna com o uuid do pai -> seção do pai
+PAIS_SINCRONIZACAO = {
+    "repertorios": ((2, "shows"), (3, "musicas")),
+    "checklist_detalhes": ((2, "checklists"),),
+}
+TABELAS_UUID = {"musicas": "musicas", "shows": "shows", "checklists": "checklist"}
+
+def _problema_estrutura(linha, estrutura):
+    """Descrição do defeito da linha, ou None se ela tem o formato da seção"""
+    if estrutura is None:
+        return "seção desconhecida"
+    minimo, maximo, obrigatorias, inteiras = estrutura
+    if not isinstance(linha, list):
+        return "registro não é uma lista"
+    if not minimo <= len(linha) <= maximo:
+        esperado = minimo if minimo == maximo else f"{minimo} a {maximo}"
+        return f"{len(linha)} colunas, esperado {esperado}"
+    for posicao in obrigatorias:
+        if linha[posicao] is None or linha[posicao] == "":
+            return f"coluna {posicao + 1} vazia"
+    for posicao in inteiras:
+        if posicao < len(linha) and linha[posicao] is not None and not isinstance(linha[posicao], int):
+            return f"coluna {posicao + 1} deveria ser um número inteiro"
+    return None
+
+class _Relatorio:
+    """Acumula contagens e problemas (só os MAX_PROBLEMAS primeiros são guardados)"""
+
+    def __init__(self, tipo, ao_progresso):
+        self.tipo = tipo
+        self.lidas = {}
+        self.novas = None
+        self.problemas = []
+        self.total_problemas = 0
+        self.ao_progresso = ao_progresso
+        self.total_lidas = 0
+
+    def anotar(self, problema):
+        self.total_problemas += 1
+        if len(self.problemas) < MAX_PROBLEMAS:
+            self.problemas.append(problema)
+
+    def contar(self, secao):
+        self.lidas[secao] = self.lidas.get(secao, 0) + 1
+        self.total_lidas += 1
+        if self.ao_progresso and self.total_lidas % LINHAS_POR_AVISO == 0:
+            self.ao_progresso(secao, self.lidas[secao])
+        return self.lidas[secao]
+
+    def resultado(self, inicio):
+        return {
+            "tipo": self.tipo,
+            "lidas": self.lidas,
+            "novas": self.novas,
+            "problemas": self.problemas,
+            "total_problemas": self.total_problemas,
+            "valido": self.total_problemas == 0,
+            "segundos": time.perf_counter() - inicio,
+        }
+
+def _verificar_completo(caminho, cursor, relatorio, conferencia):
+    """Estrutura, referências dos repertórios e itens, e o que a importação acrescentaria"""
+    existentes = {secao: set() for secao in CONSULTAS_EXISTENTES}
+    if cursor is not None:
+        for secao, consulta in CONSULTAS_EXISTENTES.items():
+            cursor.execute(consulta)
+            existentes[secao] = set(cursor.fetchall())
+    conhecidas = {secao: set(chaves) for secao, chaves in existentes.items() if secao not in PAIS}
+    vistas = {secao: set() for secao in CONSULTAS_EXISTENTES}
+    novas = {secao: 0 for secao in CONSULTAS_EXISTENTES}
+    pendentes = []
+
+    def pais_conhecidos(secao, chave):
+        return all(chave[inicio:fim] in conhecidas[pai] for pai, inicio, fim in PAIS.get(secao, ()))
+
+    def contar_nova(secao, chave):
+        # Como na mesclagem: fica a primeira ocorrência e só entra o que o banco não tem
+        if chave not in vistas[secao]:
+            vistas[secao].add(chave)
+            if chave not in existentes[secao]:
+                novas[secao] += 1
+            if secao in conhecidas:
+                conhecidas[secao].add(chave)
+
+    for secao, linha in iterar_backup(caminho, conferencia):
+        numero = relatorio.contar(secao)
+        problema = _problema_estrutura(linha, ESTRUTURA_BACKUP.get(secao))
+        if problema:
+            relatorio.anotar(f"{secao}, registro {numero}: {problema}")
+            continue
+        chave = tuple(linha[:TAMANHO_CHAVE[secao]])
+        if pais_conhecidos(secao, chave):
+            contar_nova(secao, chave)
+        else:
+            # O pai pode vir mais adiante no arquivo: confere no fim
+            pendentes.append((secao, numero, chave))
+
+    for secao, numero, chave in pendentes:
+        if pais_conhecidos(secao, chave):
+            contar_nova(secao, chave)
+            continue
+        for pai, inicio, fim in PAIS[secao]:
+            if chave[inicio:fim] not in conhecidas[pai]:
+                relatorio.anotar(
+                    f"{secao}, registro {numero}: {pai} {list(chave[inicio:fim])} "
+                    f"não está no backup nem no banco"
+                )
+    relatorio.novas = novas
+
+def _verificar_sincronizacao(caminho, cabecalho, cursor, relatorio, conferencia):
+    """Estrutura e pais (por uuid) no próprio pacote ou, se houver banco, nele"""
+    uuids = {secao: set() for secao in TABELAS_UUID}
+    if cursor is not None:
+        for secao, tabela in TABELAS_UUID.items():
+            cursor.execute(f"SELECT uuid FROM {tabela}")
+            uuids[secao] = {linha[0] for linha in cursor.fetchall()}
+    pendentes = []
+    for secao, linha in iterar_backup(caminho, conferencia):
+        numero = relatorio.contar(secao)
+        problema = _problema_estrutura(linha, ESTRUTURA_SINCRONIZACAO.get(secao))
+        if problema:
+            relatorio.anotar(f"{secao}, registro {numero}: {problema}")
+            continue
+        if secao in uuids:
+            uuids[secao].add(linha[0])
+        for posicao, pai in PAIS_SINCRONIZACAO.get(secao, ()):
+            pendentes.append((secao, numero, pai, linha[posicao]))
+    # Um pacote parcial só traz os pais alterados: sem o banco, não dá para conferir
+    if cursor is not None or not cabecalho.get("desde"):
+        for secao, numero, pai, uuid_pai in pendentes:
+            if uuid_pai not in uuids[pai]:
+                relatorio.anotar(f"{secao}, registro {numero}: {pai} {uuid_pai} não está no pacote nem no banco")
+
+def _verificar_diferencial(caminho, relatorio, conferencia):
+    """Operação, seção, chave e linha de cada alteração"""
+    for numero, alteracao in enumerate(iterar_diferencial(caminho, conferencia), 1):
+        relatorio.contar("alteracoes")
+        if len(alteracao) != 4:
+            relatorio.anotar(f"alteração {numero}: {len(alteracao)} campos, esperado 4")
+            continue
+        operacao, secao, chave, linha = alteracao
+        if operacao not in (INSERIR, ALTERAR, REMOVER) or secao not in ORDEM_SECOES:
+            relatorio.anotar(f"alteração {numero}: operação ou seção desconhecida ({operacao}, {secao})")
+            continue
+        if operacao != INSERIR and (not isinstance(chave, list) or len(chave) != TAMANHO_CHAVE[secao]):
+            relatorio.anotar(f"alteração {numero}: chave de {secao} inválida")
+            continue
+        if operacao != REMOVER:
+            problema = _problema_estrutura(linha, ESTRUTURA_BACKUP[secao])
+            if problema:
+                relatorio.anotar(f"alteração {numero} ({secao}): {problema}")
+
+def verificar_backup(caminho, conn=None, ao_progresso=None):
+    """Lê o arquivo inteiro sem gravar nada e diz se ele pode ser importado
+
+    Confere a estrutura de cada registro, os totais e o sha256 gravados no arquivo, as
+    referências dos repertórios (show e música) e dos itens de checklist e, se for um backup
+    completo e houver conexão, quantos registros a importação acrescentaria em cada seção.
+    A conexão só é lida. ao_progresso(seção, registros lidos) é chamado a cada LINHAS_POR_AVISO.
+    Retorna um dicionário com tipo, lidas, novas, problemas, total_problemas, valido e segundos.
+    """
+    inicio = time.perf_counter()
+    try:
+        cabecalho = ler_cabecalho(caminho)
+    except (OSError, EOFError, UnicodeDecodeError) as ex:
+        relatorio = _Relatorio(None, ao_progresso)
+        relatorio.anotar(f"Arquivo ilegível: {ex}")
+        return relatorio.resultado(inicio)
+    tipo = cabecalho.get("tipo", "completo") if cabecalho else "antigo"
+    relatorio = _Relatorio(tipo, ao_progresso)
+    conferencia = Conferencia()
+    cursor = conn.cursor() if conn is not None else None
+    try:
+        if tipo == "diferencial":
+            _verificar_diferencial(caminho, relatorio, conferencia)
+        elif tipo == TIPO_PACOTE:
+            _verificar_sincronizacao(caminho, cabecalho, cursor, relatorio, conferencia)
+        else:
+            _verificar_completo(caminho, cursor, relatorio, conferencia)
+    except (ValueError, OSError, EOFError) as ex:
+        relatorio.anotar(f"Leitura interrompida depois de {relatorio.total_lidas} registros: {ex}")
+        return relatorio.resultado(inicio)
+
+    for problema in conferencia.problemas():
+        relatorio.anotar(problema)
+    # Backups sem conferência (anteriores a ela) ainda têm os totais no cabeçalho
+    if cabecalho and not conferencia.ativa:
+        esperadas = {"alteracoes": cabecalho["alteracoes"]} if tipo == "diferencial" else cabecalho.get("totais", {})
+        for secao, total in esperadas.items():
+            if relatorio.lidas.get(secao, 0) != total:
+                relatorio.anotar(f"Seção {secao}: {relatorio.lidas.get(secao, 0)} registros lidos, {total} no cabeçalho")
+    return relatorio.resultado(inicio)
@@ -0,0 +1,28 @@
+import flet as ft
+from utils.cifra import tokenizar_cifra, ACORDE
+
+# Fora de utils/cifra.py para os workers do PDF, que usam o tokenizador, não carregarem o Flet
+
+def formatar_cifra_para_visualizacao(cifra, tamanho=16):
+    """Formata a cifra para visualização estilo Cifra Club (tela da música e modo palco)"""
+    if not cifra:
+        return [ft.Text("Nenhuma cifra cadastrada", italic=True, color=ft.colors.GREY_600)]
+    
+    # A cifra inteira vira um único Text com trechos estilizados, em vez de um
+    # controle por trecho e uma Row por linha
+    estilo_acorde = ft.TextStyle(weight=ft.FontWeight.BOLD, color=ft.colors.BLUE_700)
+    trechos = []
+    texto_atual = ""
+    for tipo, valor in tokenizar_cifra(cifra):
+        if tipo != ACORDE:
+            texto_atual += valor
+            continue
+        if texto_atual:
+            trechos.append(ft.TextSpan(texto_atual))
+            texto_atual = ""
+        trechos.append(ft.TextSpan(valor, style=estilo_acorde))
+    
+    if texto_atual:
+        trechos.append(ft.TextSpan(texto_atual))
+    
+    return [ft.Text(spans=trechos, size=tamanho)]